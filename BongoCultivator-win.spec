@@ -1,4 +1,9 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+
+# 静态数据包不入库，缺失时直接中止打包 (先运行 python tools/build_static_pack.py)
+if not os.path.exists(os.path.join('src', 'data', 'static_data.db')):
+    raise SystemExit('src/data/static_data.db 不存在，请先运行 python tools/build_static_pack.py')
 
 
 a = Analysis(
@@ -1,11 +1,12 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QListWidget, QPushButton, 
-                             QHBoxLayout, QListWidgetItem, QProgressBar)
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QListView, QPushButton, 
+                             QHBoxLayout, QProgressBar)
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPainter, QColor, QPen, QBrush
 from src.state import PetState
 from src.logger import logger
 
 from src.ui.base_window import DraggableWindow
+from src.ui.list_models import RecipeListModel
 
 class AlchemyWindow(DraggableWindow):
     def __init__(self, cultivator, pet_window, parent=None):
@@ -35,10 +36,12 @@ class AlchemyWindow(DraggableWindow):
         title.setAlignment(Qt.AlignmentFlag.AlignCenter)
         main_layout.addWidget(title)
         
-        # Recipe List
-        self.recipe_list = QListWidget()
+        # Recipe List (model 随可炼制状态变化逐行更新)
+        self.recipe_model = RecipeListModel(self.cultivator, self)
+        self.recipe_list = QListView()
+        self.recipe_list.setModel(self.recipe_model)
         self.style_list_widget(self.recipe_list)
-        self.recipe_list.itemClicked.connect(self.show_recipe_detail)
+        self.recipe_list.clicked.connect(self.show_recipe_detail)
         main_layout.addWidget(self.recipe_list)
         
         # Details Area
@@ -94,49 +97,8 @@ class AlchemyWindow(DraggableWindow):
         painter.drawRoundedRect(rect, 10, 10)
 
     def refresh_recipes(self):
-        self.recipe_list.clear()
-        
-        tier = min(self.cultivator.layer_index, 8)
-        # Show recipes for current tier (and maybe previous?)
-        # Let's show current tier only for now to keep list clean
-        
-        pills = self.item_manager.tier_lists.get(tier, {}).get("pills", [])
-        
-        for pill_id in pills:
-            info = self.item_manager.get_item(pill_id)
-            name = info.get("name", pill_id)
-            recipe = info.get("recipe", {})
-            
-            # Skip items without a recipe (cannot be drafted)
-            if not recipe:
-                continue
-
-            # Check if craftable
-            can_craft = self.check_ingredients(recipe)
-            
-            status_str = " [可炼制]" if can_craft else " [材料不足]"
-            color_code = "#00FF00" if can_craft else "#888888"
-            
-            # Use HTML for color
-            # QListWidgetItem doesn't support HTML directly easily unless we use custom widget
-            # Let's just append text
-            
-            item = QListWidgetItem(f"{name}{status_str}")
-            item.setData(Qt.ItemDataRole.UserRole, pill_id)
-            
-            if not can_craft:
-                item.setForeground(QBrush(QColor(150, 150, 150)))
-            else:
-                item.setForeground(QBrush(QColor(255, 215, 0)))
-                
-            self.recipe_list.addItem(item)
-            
-    def check_ingredients(self, recipe):
-        if not recipe: return False
-        for mat_id, count in recipe.items():
-            if self.cultivator.inventory.get(mat_id, 0) < count:
-                return False
-        return True
+        # 可炼制状态由 recipe_model 增量更新，只有境界变化时才切换列表
+        self.recipe_model.set_tier(min(self.cultivator.layer_index, 8))
 
     def show_recipe_detail(self, item):
         pill_id = item.data(Qt.ItemDataRole.UserRole)
@@ -150,23 +112,20 @@ class AlchemyWindow(DraggableWindow):
         recipe = info.get("recipe", {})
         
         # Build Ingredients Text
+        missing = self.cultivator.craft_tracker.missing.get(pill_id, ())
         ing_text = ""
-        can_craft = True
-        
+
         for mat_id, req_count in recipe.items():
             mat_info = self.item_manager.get_item(mat_id)
             mat_name = mat_info["name"] if mat_info else mat_id
             has_count = self.cultivator.inventory.get(mat_id, 0)
-            
-            color = "white" if has_count >= req_count else "red"
-            if has_count < req_count: can_craft = False
-            
+            color = "red" if mat_id in missing else "white"
             ing_text += f" - {mat_name}: <font color='{color}'>{has_count}/{req_count}</font><br>"
-            
+
         full_text = f"<b>{name}</b><br>{desc}<br><br>所需材料:<br>{ing_text}"
         self.detail_label.setText(full_text)
-        
-        self.craft_btn.setEnabled(can_craft)
+
+        self.craft_btn.setEnabled(self.cultivator.craft_tracker.is_craftable(pill_id))
 
     def start_crafting(self):
         # Prevent double click
@@ -198,18 +157,18 @@ class AlchemyWindow(DraggableWindow):
 
     def style_list_widget(self, list_widget):
         list_widget.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: rgba(0, 0, 0, 40);
                 border: 1px solid rgba(255, 100, 100, 30);
                 border-radius: 4px;
                 color: #DDD;
                 outline: none;
             }
-            QListWidget::item {
+            QListView::item {
                 border-bottom: 1px solid rgba(255, 255, 255, 10);
                 padding: 4px;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: rgba(255, 100, 100, 30);
                 color: #FFD700;
             }
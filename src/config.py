@@ -37,3 +37,37 @@ DAILY_REWARD_BIG_THRESHOLD = 10000
 
 # 掉落物品的最小间隔 (秒)
 DROP_COOLDOWN_SECONDS = 5.0
+
+# APM 统计窗口 (秒): 5秒用于状态判定，300秒用于持续修炼加成，其余用于长期强度展示
+APM_WINDOWS = (5, 60, 300, 3600)
+
+# 持续修炼: 近 SUSTAINED_WINDOW 秒 (须在 APM_WINDOWS 中) 的总 APM 达到阈值时，
+# 活跃状态 (历练/悟道/斗法) 获得修为加成，历练掉落率提高
+SUSTAINED_WINDOW = 300
+SUSTAINED_APM = 30
+SUSTAINED_EXP_BONUS = 0.20
+SUSTAINED_DROP_BONUS = 0.002
+
+# 按键分类 (钩子线程查表归类，按分钟持久化为 activity_logs_minute.key_<分类> 列)
+KEY_CATEGORIES = ("char", "space", "enter", "backspace", "modifier", "navigation", "other")
+
+# 分钟活动记录的批量落库间隔 (分钟)，期间先写入内存缓冲与追加日志 (journal)
+ACTIVITY_FLUSH_MINUTES = 5
+
+# SQLite 连接调优 (所有连接统一由 src/utils/sqlite_factory.py 创建)
+SQLITE_CACHE_SIZE_KB = 8 * 1024        # 每个连接的页缓存 (KB)
+SQLITE_MMAP_SIZE = 64 * 1024 * 1024    # 内存映射读取的上限 (字节)
+SQLITE_POOL_SIZE = 4                   # 连接池常驻连接数 (GUI 线程 + 持久化线程 + 余量)
+
+# 自动存档: 最后一次变更后静默 N 秒写入 (合并连续的掉落/炼丹/出售)，
+# 持续有变更时 (如每秒增长的修为) 最多间隔 M 秒也会写入一次
+AUTOSAVE_DEBOUNCE_SECONDS = 5
+AUTOSAVE_MAX_STALENESS_SECONDS = 60
+
+# 数据保留: 超过 N 天的分钟活动记录删除 (已汇总在小时/日汇总表中)，
+# 超过 M 天的事件日志归档到压缩文件后删除
+ACTIVITY_RETENTION_DAYS = 90
+EVENT_RETENTION_DAYS = 90
+# 数据库维护 (清理 + 增量 VACUUM) 只在空闲 (N 分钟无输入) 时进行，每天最多一次
+MAINTENANCE_IDLE_SECONDS = 300
+MAINTENANCE_INTERVAL_SECONDS = 24 * 3600
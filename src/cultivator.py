@@ -1,6 +1,7 @@
 import random
+import threading
 from src.logger import logger
-from src.item_manager import ItemManager
+from src.item_manager import ItemManager, CraftTracker
 from src.services.event_engine import EventEngine
 from src.services.achievement_manager import achievement_manager
 from src.services.dialogue_manager import dialogue_manager
@@ -9,14 +10,50 @@ from src.config import (
     LAYERS, EXP_TABLE, 
     EVENT_INTERVAL_SECONDS, MARKET_REFRESH_INTERVAL,
     DAILY_REWARD_THRESHOLD, DAILY_REWARD_SMALL, DAILY_REWARD_BIG, DAILY_REWARD_BIG_THRESHOLD,
-    DROP_COOLDOWN_SECONDS
+    DROP_COOLDOWN_SECONDS, SUSTAINED_WINDOW, SUSTAINED_APM, SUSTAINED_EXP_BONUS, SUSTAINED_DROP_BONUS
 )
+from src.utils.tracked import TrackedDict, TrackedSet, TrackedList
+from src.services.save_delta import SaveDelta
+
+# 存档字段: Cultivator 属性名 -> player_status 列名 (赋值时自动标记为脏)
+_STATUS_FIELDS = {
+    "layer_index": "layer_index",
+    "exp": "current_exp",
+    "money": "money",
+    "body": "stat_body",
+    "mind": "stat_mind",
+    "affection": "stat_luck",
+    "talent_points": "talent_points",
+    "talents": "talent_json",
+    "equipped_title": "equipped_title",
+    "death_count": "death_count",
+    "legacy_points": "legacy_points",
+    "daily_reward_claimed": "daily_reward_claimed",
+    "last_market_refresh": "last_market_refresh_time",
+}
+_UNSET = object()
 
 class Cultivator:
     LAYERS = LAYERS
     EXP_TABLE = EXP_TABLE
     
     def __init__(self):
+        # 脏数据追踪 (增量存档)，必须在其他属性赋值之前初始化
+        self._dirty_listeners = []
+        self._dirty_fields = set()
+        self._inventory_dirty = set()
+        self._used_once_dirty = set()
+        self._inventory_replaced = False
+        self._used_once_replaced = False
+        self._market_dirty = False
+        # 界面变更通知: 背包 callback(item_id, old_count, new_count) / 灵石 callback(old, new)
+        self._inventory_listeners = []
+        self._money_listeners = []
+        # 已提交给持久化线程但尚未落盘的合并 delta
+        self._save_lock = threading.Lock()
+        self._pending_save = None
+        self._inflight_save = None
+        
         self.exp = 0
         self.layer_index = 0
         self.money = 0 # 灵石
@@ -39,6 +76,8 @@ class Cultivator:
         # 初始化 ItemManager 和 EventEngine
         self.item_manager = ItemManager()
         self.event_manager = EventEngine(DB_FILE, self.item_manager)
+        # 可炼制丹方 (随背包变化增量更新)
+        self.craft_tracker = CraftTracker(self.item_manager, self.inventory)
         
         # 天赋系统
         self.talent_points = 0
@@ -60,6 +99,107 @@ class Cultivator:
         # Plan 45: "一面之缘"物品使用记录（同类丹药一世只能吃一次）
         self.used_once_items = set()
         
+        # 多窗口 APM 强度 {窗口秒数: (kb_apm, mouse_apm)}，由 update 传入，无需查询数据库
+        self.apm_windows = {}
+        
+    def __setattr__(self, name, value):
+        # 存档相关属性: 标量比较后标脏；容器包装为 Tracked* 以记录具体变化的键
+        if name in _STATUS_FIELDS:
+            if name == "talents":
+                value = TrackedDict(value, self._mark_talents_dirty)
+                self._dirty_fields.add(name)
+                self._notify_dirty()
+            elif self.__dict__.get(name, _UNSET) != value:
+                self._dirty_fields.add(name)
+                self._notify_dirty()
+        elif name == "inventory":
+            value = TrackedDict(value, self._on_inventory_change)
+            self._inventory_replaced = True
+            self._notify_dirty()
+        elif name == "used_once_items":
+            value = TrackedSet(value, self._mark_used_once_dirty)
+            self._used_once_replaced = True
+            self._notify_dirty()
+        elif name == "market_goods":
+            value = TrackedList(value, self._mark_market_dirty)
+            self._market_dirty = True
+            self._notify_dirty()
+        old = self.__dict__.get(name)
+        object.__setattr__(self, name, value)
+
+        # 界面变更通知 (赋值之后，回调中读取到的已是新值)
+        if name == "money":
+            if old != value:
+                for callback in self._money_listeners:
+                    callback(old or 0, value)
+        elif name == "inventory":
+            tracker = self.__dict__.get("craft_tracker")
+            if tracker is not None:
+                tracker.reset(value)
+            # 整体替换 (读档/导入/轮回) 时按差异逐项通知
+            old = old or {}
+            for item_id in {**old, **value}:
+                self._notify_inventory(item_id, old.get(item_id, 0), value.get(item_id, 0))
+
+    def _mark_talents_dirty(self, key, old=None):
+        self._dirty_fields.add("talents")
+        self._notify_dirty()
+
+    def _on_inventory_change(self, item_id, old):
+        # 背包的任何修改 (gain_item / consume_items / sell_item / 界面直接修改) 都经过这里
+        self._mark_inventory_dirty(item_id)
+        count = self.inventory.get(item_id, 0)
+        tracker = self.__dict__.get("craft_tracker")
+        if tracker is not None:
+            tracker.on_change(item_id, count)
+        self._notify_inventory(item_id, old or 0, count)
+
+    def _notify_inventory(self, item_id, old, new):
+        if old != new:
+            for callback in self._inventory_listeners:
+                callback(item_id, old, new)
+
+    def add_inventory_listener(self, callback):
+        """注册回调 callback(item_id, old_count, new_count)，背包中某个物品数量变化时调用 (不存在计为 0)"""
+        self._inventory_listeners.append(callback)
+
+    def add_money_listener(self, callback):
+        """注册回调 callback(old, new)，灵石变化时调用"""
+        self._money_listeners.append(callback)
+
+    def _mark_inventory_dirty(self, item_id):
+        self._inventory_dirty.add(item_id)
+        self._notify_dirty()
+
+    def _mark_used_once_dirty(self, item_id):
+        self._used_once_dirty.add(item_id)
+        self._notify_dirty()
+
+    def _mark_market_dirty(self, _):
+        self._market_dirty = True
+        self._notify_dirty()
+
+    def add_dirty_listener(self, callback):
+        """注册回调 callback()，存档相关数据每次变化时调用 (用于自动存档)"""
+        self._dirty_listeners.append(callback)
+
+    def _notify_dirty(self):
+        for callback in self._dirty_listeners:
+            callback()
+
+    def has_unsaved_changes(self):
+        return bool(self._dirty_fields or self._inventory_dirty or self._used_once_dirty
+                    or self._inventory_replaced or self._used_once_replaced or self._market_dirty)
+
+    def _reset_dirty(self):
+        """当前内存状态与数据库一致 (刚加载或已生成存档快照)"""
+        self._dirty_fields.clear()
+        self._inventory_dirty.clear()
+        self._used_once_dirty.clear()
+        self._inventory_replaced = False
+        self._used_once_replaced = False
+        self._market_dirty = False
+
     def _log_event(self, event_type, msg):
         """记录日志同时通知UI"""
         import time
@@ -203,6 +343,13 @@ class Cultivator:
     def unequip_title(self):
         self.equipped_title = None
 
+    def get_intensity(self, window):
+        """
+        获取指定窗口 (秒) 的总 APM (键盘+鼠标)，窗口无数据时返回 0
+        """
+        kb, ms = self.apm_windows.get(window, (0, 0))
+        return kb + ms
+
     @property
     def current_layer(self):
         if self.layer_index < len(self.LAYERS):
@@ -380,10 +527,14 @@ class Cultivator:
         self.money += earned
         return earned
 
-    def update(self, kb_apm, mouse_apm):
+    def update(self, kb_apm, mouse_apm, apm_windows=None):
         """
         根据 键鼠APM 更新状态并返回获得的收益描述
+        :param apm_windows: 可选，多窗口 APM {窗口秒数: (kb_apm, mouse_apm)}
         """
+        if apm_windows is not None:
+            self.apm_windows = apm_windows
+            
         gain_msg = ""
         current_state_code = 0 
         
@@ -437,6 +588,9 @@ class Cultivator:
         # Plan 45: 气运修练加成 (每点气运 +1% 修练效率)
         luck_exp_bonus = 1.0 + (self.affection * 0.01)
         exp_efficiency *= luck_exp_bonus
+
+        # 持续修炼: 状态按 5 秒窗口判定，加成看较长窗口的强度，短暂停顿不会立即失去
+        sustained = self.get_intensity(SUSTAINED_WINDOW) >= SUSTAINED_APM
         
         # 1. 判定状态
         if kb_apm < 30 and mouse_apm < 30:
@@ -455,6 +609,8 @@ class Cultivator:
             # Base 0.5% per second (~once per 3 mins)
             luck_drop_bonus = self.affection * 0.001  # 0.1% per point
             drop_bonus = luck_drop_bonus + (talent_drop_bonus * 0.1) 
+            if sustained:
+                drop_bonus += SUSTAINED_DROP_BONUS
             
             # 添加最小掉落间隔 (防刷屏)
             import time
@@ -509,6 +665,9 @@ class Cultivator:
                 self.mind = min(100, self.mind + 1)
                 gain_msg = "杀气过重! 心魔+1"
         
+        if sustained and current_state_code != 0:
+            exp_efficiency *= 1.0 + SUSTAINED_EXP_BONUS
+
         # 应用心魔惩罚
         final_exp = int(base_exp * exp_efficiency)
         if final_exp == 0 and base_exp > 0:
@@ -574,76 +733,79 @@ class Cultivator:
             self.gain_exp(exp_gain)
             self._log_event("offline", f"闭关结束，离线 {diff // 60} 分钟，获得 {exp_gain} 修为")
             
-    def get_random_dialogue(self):
-        return dialogue_manager.get_random_dialogue(self)
+    def get_random_dialogue(self, daily_clicks=0):
+        return dialogue_manager.get_random_dialogue(self, daily_clicks)
 
     def save_data(self, filepath=None):
         # filepath is ignored
-        from src.database import db_manager
-        from src.models import PlayerStatus, PlayerInventory, MarketStock
-        from sqlmodel import delete
+        # 在 GUI 线程上只收集自上次存档以来的变化 (SaveDelta)，实际写入交给持久化线程。
+        # 尚未落盘的 delta 会被合并，同 key 的未执行存档任务只保留一个。
+        from src.services.persistence_worker import persistence_worker
+        
+        delta = self._drain_save_delta()
+        with self._save_lock:
+            if self._pending_save is None:
+                self._pending_save = delta
+            else:
+                self._pending_save = self._pending_save.merged(delta)
+        
+        persistence_worker.submit(
+            self._write_pending_save, key="player_save", description="save_data",
+            after_commit=self._on_save_committed
+        )
+
+    def _drain_save_delta(self):
+        """生成自上次存档以来的变更快照并清空脏标记"""
         import json
         import time
         
-        current_time = int(time.time())
-        talent_json_str = json.dumps(self.talents)
+        status = {}
+        for name in self._dirty_fields:
+            value = getattr(self, name)
+            if name == "talents":
+                value = json.dumps(value)
+            elif name == "last_market_refresh":
+                value = int(value)
+            status[_STATUS_FIELDS[name]] = value
+        # 离线收益按 last_save_time 计算，每次存档都要更新
+        status["last_save_time"] = int(time.time())
+        
+        inventory = self.inventory
+        used_once = self.used_once_items
+        delta = SaveDelta(
+            status=status,
+            inventory_full=dict(inventory) if self._inventory_replaced else None,
+            inventory_changes=None if self._inventory_replaced else {
+                iid: inventory.get(iid, 0) for iid in self._inventory_dirty
+            },
+            used_once_full=set(used_once) if self._used_once_replaced else None,
+            used_once_changes=None if self._used_once_replaced else {
+                iid: iid in used_once for iid in self._used_once_dirty
+            },
+            market=[(goods['id'], goods['price'], goods['discount']) for goods in self.market_goods]
+                   if self._market_dirty else None,
+        )
+        self._reset_dirty()
+        return delta
+
+    def _write_pending_save(self, conn):
+        # 持久化线程: 写入当前合并后的 delta (提交成功后才清除，失败重试时不会丢失)
+        import time
         
-        try:
-            with db_manager.get_session() as session:
-                # 1. Update PlayerStatus
-                player = session.get(PlayerStatus, 1)
-                if not player:
-                    player = PlayerStatus(id=1)
-                    session.add(player)
-                
-                player.layer_index = self.layer_index
-                player.current_exp = self.exp
-                player.money = self.money
-                player.stat_body = self.body
-                player.stat_mind = self.mind
-                player.stat_luck = self.affection
-                player.talent_points = self.talent_points
-                player.talent_json = talent_json_str
-                player.last_save_time = current_time
-                player.equipped_title = self.equipped_title
-                player.death_count = self.death_count
-                player.legacy_points = self.legacy_points
-                player.daily_reward_claimed = self.daily_reward_claimed
-                player.last_market_refresh_time = int(self.last_market_refresh)
-                
-                session.add(player)
-                
-                # 2. Update Inventory
-                # Clear and re-insert
-                session.exec(delete(PlayerInventory))
-                
-                for iid, count in self.inventory.items():
-                    if count > 0:
-                        inv_item = PlayerInventory(item_id=iid, count=count)
-                        session.add(inv_item)
-                        
-                # 3. Update Market Stock
-                session.exec(delete(MarketStock))
-                for goods in self.market_goods:
-                    stock = MarketStock(
-                        item_id=goods['id'],
-                        price=goods['price'],
-                        discount=goods['discount']
-                    )
-                    session.add(stock)
-                
-                # Plan 45: 保存"一面之缘"使用记录
-                from src.models import UsedOnceItem
-                session.exec(delete(UsedOnceItem))
-                for item_id in self.used_once_items:
-                    used_item = UsedOnceItem(item_id=item_id)
-                    session.add(used_item)
-                
-                session.commit()
-                # logger.debug("数据已保存 (SQLModel)")
-                
-        except Exception as e:
-            logger.error(f"保存失败: {e}")
+        with self._save_lock:
+            delta = self._pending_save
+            self._inflight_save = delta
+        if delta is not None:
+            start = time.perf_counter()
+            delta.write(conn)
+            logger.debug(f"存档写入: {delta.change_count()} 项变更, {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    def _on_save_committed(self):
+        with self._save_lock:
+            # 写入期间又有新的存档合并进来时保留 (新 delta 包含已写内容，重写是幂等的)
+            if self._pending_save is self._inflight_save:
+                self._pending_save = None
+            self._inflight_save = None
 
     def load_data(self, filepath=None):
         from src.database import db_manager
@@ -691,6 +853,9 @@ class Cultivator:
                     from src.models import UsedOnceItem
                     used_items = session.exec(select(UsedOnceItem)).all()
                     self.used_once_items = {item.item_id for item in used_items}
+                    
+                    # 内存状态与数据库一致，之后的修改才需要写回
+                    self._reset_dirty()
                         
                     # Offline Progress
                     if player.last_save_time > 0:
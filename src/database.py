@@ -1,9 +1,14 @@
 import os
-import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
 from typing import List, Tuple
-from sqlmodel import create_engine, Session, SQLModel, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlmodel import create_engine, Session, SQLModel, select
 from src.utils.path_helper import get_user_data_dir
+from src.utils.sqlite_factory import connect
 from src.logger import logger
+from src.config import KEY_CATEGORIES, SQLITE_POOL_SIZE
 from src.models import (
     PlayerStatus, PlayerInventory, MarketStock,
     ActivityLog, ItemDefinition, Recipe, Achievement, 
@@ -13,28 +18,75 @@ from src.models import (
 DB_FILE = os.path.join(get_user_data_dir(), "user_data.db")
 DATABASE_URL = f"sqlite:///{DB_FILE}"
 
+# 分钟记录中需要累加进小时/日汇总表的列 (顺序同 make_activity_row 的 timestamp 之后部分)
+ROLLUP_SUM_COLUMNS = ["keys_count", "mouse_count"] + [f"key_{cat}" for cat in KEY_CATEGORIES]
+
+
+def _rollup_upsert_sql(table: str, key_columns: list, extra_sums: list = ()) -> str:
+    """汇总表 upsert: 计数列累加，active_minutes (及 extra_sums) 累加，max_actions 取最大值"""
+    sums = ROLLUP_SUM_COLUMNS + ["active_minutes"] + list(extra_sums)
+    columns = key_columns + ROLLUP_SUM_COLUMNS + ["active_minutes", "max_actions"] + list(extra_sums)
+    updates = [f"{c} = {c} + excluded.{c}" for c in sums]
+    updates.append("max_actions = MAX(max_actions, excluded.max_actions)")
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT({key_columns[0]}) DO UPDATE SET {', '.join(updates)}")
+
+
+_ROLLUP_HOUR_SQL = _rollup_upsert_sql("activity_rollup_hour", ["bucket"])
+_ROLLUP_DAY_SQL = _rollup_upsert_sql("activity_rollup_day", ["day", "weekday"])
+_STAT_TOTALS_SQL = _rollup_upsert_sql("player_stat_totals", ["id"], ["weekend_minutes"])
+
 class DatabaseManager:
     def __init__(self, db_url=None):
         if db_url is None:
             db_url = DATABASE_URL
-        self.engine = create_engine(db_url)
+        self.db_path = make_url(db_url).database
+        # SQLModel 会话与原生 SQL 共用同一个连接池，连接统一由 sqlite_factory 创建 (WAL 等 PRAGMA)
+        self.engine = create_engine(
+            db_url,
+            creator=lambda: connect(self.db_path),
+            poolclass=QueuePool,
+            pool_size=SQLITE_POOL_SIZE,
+            max_overflow=SQLITE_POOL_SIZE,
+        )
         self._init_db()
 
     def get_session(self):
         return Session(self.engine)
         
+    @contextmanager
     def _get_conn(self):
-        # Legacy support for parts I haven't refactored yet or raw access
-        return sqlite3.connect(DB_FILE)
+        """
+        从连接池借出一个原生 sqlite3 连接 (用于 raw SQL)。
+        正常退出时提交，异常时回滚；归还前重置 row_factory。
+        用法: with db_manager._get_conn() as conn: ...
+        """
+        fairy = self.engine.raw_connection()
+        conn = fairy.driver_connection
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.row_factory = None
+            fairy.close()
 
     def _init_db(self):
         try:
             # Plan 46: 自动执行 Schema 迁移 (在 SQLModel 初始化之前)
             # 解决旧存档缺失新字段导致的问题
-            from src.utils.schema_migration import run_schema_migrations
-            run_schema_migrations(DB_FILE)
+            # 迁移失败会抛出并中止初始化: 不能让 create_all() 补出新表、再把旧库标记成最新版本
+            from src.utils.schema_migration import run_schema_migrations, stamp_schema_version
+            is_new_db = not os.path.exists(self.db_path)
+            run_schema_migrations(self.db_path)
             
             SQLModel.metadata.create_all(self.engine)
+            if is_new_db:
+                # 新库由 create_all() 按最新结构创建；已有的库由迁移自己记录版本
+                with self._get_conn() as conn:
+                    stamp_schema_version(conn)
             
             # Ensure PlayerStatus exists
             with self.get_session() as session:
@@ -47,18 +99,94 @@ class DatabaseManager:
             logger.info("数据库初始化完成 (SQLModel)")
         except Exception as e:
             logger.error(f"数据库初始化失败: {e}")
+            raise
 
-    def insert_activity(self, timestamp: int, keys: int, mouse: int):
+    @staticmethod
+    def make_activity_row(timestamp: int, keys: int, mouse: int, key_categories: dict = None) -> tuple:
+        """
+        构造 insert_activities 使用的行元组:
+        (timestamp, keys, mouse, key_<分类>...)，分类顺序同 config.KEY_CATEGORIES
+        """
+        cats = key_categories or {}
+        return (timestamp, keys, mouse) + tuple(cats.get(cat, 0) for cat in KEY_CATEGORIES)
+
+    def insert_activity(self, timestamp: int, keys: int, mouse: int, key_categories: dict = None):
         """
         插入一条分钟级活动记录
+        :param key_categories: 可选，按键分类计数 {分类名: 次数} (见 config.KEY_CATEGORIES)
         """
+        self.insert_activities([self.make_activity_row(timestamp, keys, mouse, key_categories)])
+
+    def insert_activities(self, rows) -> bool:
+        """
+        在一个事务中批量插入分钟级活动记录 (executemany)
+        :param rows: make_activity_row 构造的行元组列表
+        :return: 是否写入成功
+        """
+        if not rows:
+            return True
         try:
-            with self.get_session() as session:
-                log = ActivityLog(timestamp=timestamp, keys_count=keys, mouse_count=mouse)
-                session.add(log)
-                session.commit()
+            with self._get_conn() as conn:
+                self.write_activities(conn, rows)
+            return True
         except Exception as e:
             logger.error(f"保存活动记录失败: {e}")
+            return False
+
+    @staticmethod
+    def write_activities(conn, rows):
+        """
+        在给定连接上写入分钟级活动记录 (不提交，供持久化线程批量使用)
+        同一事务内累加小时/日汇总表与累计统计。
+        """
+        columns = ["timestamp"] + ROLLUP_SUM_COLUMNS
+        sql = (f"INSERT INTO activity_logs_minute ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+        conn.executemany(sql, rows)
+        # 本地时间分桶只用于汇总表 (按小时/日/周末的统计都读取汇总表)
+        buckets = [DatabaseManager.local_buckets(row[0]) for row in rows]
+        DatabaseManager._upsert_rollups(conn, rows, buckets)
+
+    @staticmethod
+    def local_buckets(timestamp: int) -> tuple:
+        """
+        本地时间分桶: (YYYYMMDD, YYYYMMDDHH, weekday)
+        weekday 同 SQLite strftime('%w'): 0=周日, 6=周六
+        """
+        dt = datetime.fromtimestamp(timestamp)
+        day = dt.year * 10000 + dt.month * 100 + dt.day
+        return day, day * 100 + dt.hour, dt.isoweekday() % 7
+
+    @staticmethod
+    def _upsert_rollups(conn, rows, buckets):
+        """先在内存中按小时/日合并，再各用一次 executemany upsert；累计统计由日汇总再合并为一行"""
+        n = len(ROLLUP_SUM_COLUMNS)
+        hours = {}
+        days = {}
+        for row, (day, hour, weekday) in zip(rows, buckets):
+            actions = row[1] + row[2]
+            for rollup, key in ((hours, (hour,)), (days, (day, weekday))):
+                acc = rollup.get(key)
+                if acc is None:
+                    acc = rollup[key] = [0] * (n + 2)
+                for i in range(n):
+                    acc[i] += row[1 + i]
+                acc[n] += 1
+                if actions > acc[n + 1]:
+                    acc[n + 1] = actions
+
+        conn.executemany(_ROLLUP_HOUR_SQL, [key + tuple(acc) for key, acc in hours.items()])
+        conn.executemany(_ROLLUP_DAY_SQL, [key + tuple(acc) for key, acc in days.items()])
+
+        totals = [0] * (n + 2)
+        weekend_minutes = 0
+        for (day, weekday), acc in days.items():
+            for i in range(n + 1):
+                totals[i] += acc[i]
+            totals[n + 1] = max(totals[n + 1], acc[n + 1])
+            if weekday in (0, 6):
+                weekend_minutes += acc[n]
+        conn.execute(_STAT_TOTALS_SQL, (1, *totals, weekend_minutes))
 
     def get_activities_by_range(self, start_ts: int, end_ts: int):
         """
@@ -79,31 +207,43 @@ class DatabaseManager:
 
     def get_aggregated_stats(self, start_ts: int, end_ts: int, group_by: str = 'hour'):
         """
-        获取聚合统计数据 (Raw SQL for SQLite complexity with formatting)
+        获取聚合统计数据 (读取小时/日汇总表，开销与历史长度无关)
+        范围按本地时间对齐: hour/date_hour 包含首尾所在的整小时，day/month 包含首尾所在的整天。
+        :return: [(time_bucket, keys, mouse, active_minutes), ...]
+                 time_bucket: hour='HH', date_hour='YYYY-MM-DD HH:00', day='YYYY-MM-DD', month='YYYY-MM'
         """
-        valid_groups = {
-            'hour': "%H",
-            'day': "%Y-%m-%d",
-            'date_hour': "%Y-%m-%d %H:00"
+        start_day, start_hour, _ = self.local_buckets(start_ts)
+        end_day, end_hour, _ = self.local_buckets(end_ts)
+        
+        queries = {
+            'hour': ("""
+                SELECT bucket % 100 AS h, SUM(keys_count), SUM(mouse_count), SUM(active_minutes)
+                FROM activity_rollup_hour WHERE bucket BETWEEN ? AND ?
+                GROUP BY h ORDER BY h
+            """, (start_hour, end_hour), lambda b: f"{b:02d}"),
+            'date_hour': ("""
+                SELECT bucket, keys_count, mouse_count, active_minutes
+                FROM activity_rollup_hour WHERE bucket BETWEEN ? AND ?
+                ORDER BY bucket
+            """, (start_hour, end_hour),
+                lambda b: f"{b // 1000000:04d}-{b // 10000 % 100:02d}-{b // 100 % 100:02d} {b % 100:02d}:00"),
+            'day': ("""
+                SELECT day, keys_count, mouse_count, active_minutes
+                FROM activity_rollup_day WHERE day BETWEEN ? AND ?
+                ORDER BY day
+            """, (start_day, end_day), lambda d: f"{d // 10000:04d}-{d // 100 % 100:02d}-{d % 100:02d}"),
+            'month': ("""
+                SELECT day / 100 AS m, SUM(keys_count), SUM(mouse_count), SUM(active_minutes)
+                FROM activity_rollup_day WHERE day BETWEEN ? AND ?
+                GROUP BY m ORDER BY m
+            """, (start_day, end_day), lambda m: f"{m // 100:04d}-{m % 100:02d}"),
         }
-        fmt = valid_groups.get(group_by, "%H")
+        sql, params, fmt = queries.get(group_by, queries['hour'])
         
         try:
-            with self.get_session() as session:
-                # Use raw SQL for date formatting convenience in SQLite
-                sql = text(f"""
-                    SELECT 
-                        strftime('{fmt}', timestamp, 'unixepoch', 'localtime') as time_bucket,
-                        SUM(keys_count), 
-                        SUM(mouse_count),
-                        COUNT(*)
-                    FROM activity_logs_minute 
-                    WHERE timestamp >= :start_ts AND timestamp <= :end_ts
-                    GROUP BY time_bucket
-                    ORDER BY time_bucket ASC
-                """)
-                result = session.exec(sql, params={"start_ts": start_ts, "end_ts": end_ts})
-                return result.fetchall()
+            with self._get_conn() as conn:
+                rows = conn.execute(sql, params).fetchall()
+            return [(fmt(b), k, m, mins) for b, k, m, mins in rows]
         except Exception as e:
             logger.error(f"统计查询失败 ({group_by}): {e}")
             return []
@@ -111,14 +251,16 @@ class DatabaseManager:
     def log_event(self, event_type: str, message: str, timestamp: int):
         """
         Record a significant game event.
+        Written asynchronously by the persistence worker.
         """
-        try:
-            with self.get_session() as session:
-                log = PlayerEvent(timestamp=timestamp, event_type=event_type, message=message)
-                session.add(log)
-                session.commit()
-        except Exception as e:
-            logger.error(f"Failed to log event: {e}")
+        from src.services.persistence_worker import persistence_worker
+
+        def job(conn):
+            conn.execute(
+                "INSERT INTO player_events (timestamp, event_type, message) VALUES (?, ?, ?)",
+                (timestamp, event_type, message)
+            )
+        persistence_worker.submit(job, description=f"log_event:{event_type}")
 
     def get_recent_events(self, limit: int = 50):
         """
@@ -1,30 +1,76 @@
 from pynput import keyboard, mouse
 import time
-from threading import Lock
+from src.config import APM_WINDOWS, KEY_CATEGORIES
+from src.utils.apm_ring import ApmRing
+
+_CAT_INDEX = {name: i for i, name in enumerate(KEY_CATEGORIES)}
+_CAT_CHAR = _CAT_INDEX["char"]
+_CAT_OTHER = _CAT_INDEX["other"]
+
+
+def _build_key_category_table():
+    """
+    预先计算 Key 枚举成员 -> 分类下标 的查找表，钩子线程只做一次 dict 查询。
+    带字符的 KeyCode 统一归为 char，其余未列出的特殊键归为 other。
+    """
+    groups = {
+        "space": ("space",),
+        "enter": ("enter",),
+        "backspace": ("backspace",),
+        "modifier": ("alt", "alt_l", "alt_r", "alt_gr", "ctrl", "ctrl_l", "ctrl_r",
+                     "shift", "shift_l", "shift_r", "cmd", "cmd_l", "cmd_r", "caps_lock"),
+        "navigation": ("up", "down", "left", "right", "home", "end",
+                       "page_up", "page_down", "tab"),
+    }
+    table = {}
+    for cat, names in groups.items():
+        for name in names:
+            member = getattr(keyboard.Key, name, None)
+            # 某些平台上不同键共享同一个值 (枚举别名)，先到先得
+            if member is not None and member not in table:
+                table[member] = _CAT_INDEX[cat]
+    return table
+
+
+_KEY_CATEGORY_TABLE = _build_key_category_table()
+
+
+class _Accumulator:
+    """
+    单写者累加器 (每个监听线程独占一个)。
+    只有所属的回调线程会递增 total，读取方通过各自的游标求差值，
+    因此钩子线程上不需要任何锁。
+    """
+    __slots__ = ("total", "categories")
+
+    def __init__(self):
+        self.total = 0
+        self.categories = [0] * len(KEY_CATEGORIES)
+
 
 class InputMonitor:
     def __init__(self):
-        self._lock = Lock()
-        self._kb_count = 0
-        self._mouse_count = 0
+        # 每个回调线程一个累加器: 键盘监听线程只写 _kb_acc，鼠标监听线程只写 _mouse_acc
+        self._kb_acc = _Accumulator()
+        self._mouse_acc = _Accumulator()
+
+        # 读取游标 (仅在 GUI 线程读写): APM 与持久化各自独立消费同一组单调计数
+        self._apm_cursor = [0, 0]
+        self._acc_cursor = [0, 0]
+        self._acc_cat_cursor = [0] * len(KEY_CATEGORIES)
+
         self._start_time = time.time()
         self.last_error = None
         self.permission_denied = False
-        
-        # Debounce: Track currently pressed keys
+
+        # Debounce: Track currently pressed keys (仅键盘监听线程访问)
         self.pressed_keys = set()
-        
-        # 滑动窗口记录 (最近 5 次调用的数据)
-        # 如果 get_stats 每秒调用一次，平滑窗口就是 5 秒
-        from collections import deque
-        self.history_size = 5
-        self.kb_history = deque(maxlen=self.history_size)
-        self.mouse_history = deque(maxlen=self.history_size)
-        
-        # 累积计数 (用于数据持久化，独立于 APM 计算)
-        self._acc_kb_count = 0
-        self._acc_mouse_count = 0
-        
+
+        # 每秒采样的环形缓冲区 (get_stats 每秒调用一次)
+        # 最短窗口用于状态判定，长窗口 (1分/5分/1时) 用于强度展示
+        self.apm_ring = ApmRing(APM_WINDOWS)
+        self.history_size = self.apm_ring.windows[0]
+
         # 监听器
         self.kb_listener = keyboard.Listener(
             on_press=self.on_press,
@@ -36,7 +82,7 @@ class InputMonitor:
             on_scroll=self.on_scroll
         )
         self.mouse_listener.daemon = True
-        
+
         self.running = False
 
     def start(self):
@@ -44,11 +90,10 @@ class InputMonitor:
         self.last_error = None
         self.permission_denied = False
         self.pressed_keys.clear()
-        
+
         # 清空历史
-        self.kb_history.clear()
-        self.mouse_history.clear()
-        
+        self.apm_ring.clear()
+
         try:
             self.kb_listener.start()
             self.mouse_listener.start()
@@ -74,81 +119,111 @@ class InputMonitor:
         self.kb_listener.stop()
         self.mouse_listener.stop()
 
+    @staticmethod
+    def _key_id(key):
+        # KeyCode 用字符 (无字符时用 vk)，Key 枚举直接用自身 (按名称哈希，开销很小)
+        # 避免 str(key) 和 KeyCode.__hash__ (基于 repr) 在钩子线程上的开销
+        if isinstance(key, keyboard.Key):
+            return key
+        k_id = key.char
+        if k_id is None:
+            k_id = key.vk
+        return k_id
+
     def on_press(self, key):
-        # 使用 key hash 或 str 作为 ID
-        # key 可以是 KeyCode 或 Key 对象
-        try:
+        # 与 _key_id 相同的分支，顺带查表得到按键分类
+        if isinstance(key, keyboard.Key):
+            k_id = key
+            cat = _KEY_CATEGORY_TABLE.get(key, _CAT_OTHER)
+        else:
             k_id = key.char
-        except AttributeError:
-            k_id = str(key)
-            
-        with self._lock:
-            # 如果按键已经在集合中，说明是长按重复的一帧，忽略
-            if k_id in self.pressed_keys:
-                return
-            
-            self.pressed_keys.add(k_id)
-            self._kb_count += 1
-            self._acc_kb_count += 1
-            
+            cat = _CAT_CHAR
+            if k_id is None:
+                k_id = key.vk
+                cat = _CAT_OTHER
+
+        # 如果按键已经在集合中，说明是长按重复的一帧，忽略
+        pressed = self.pressed_keys
+        if k_id in pressed:
+            return
+
+        pressed.add(k_id)
+        acc = self._kb_acc
+        acc.categories[cat] += 1
+        acc.total += 1
+
     def on_release(self, key):
-        try:
-            k_id = key.char
-        except AttributeError:
-            k_id = str(key)
-            
-        with self._lock:
-            if k_id in self.pressed_keys:
-                self.pressed_keys.remove(k_id)
+        self.pressed_keys.discard(self._key_id(key))
 
     def on_click(self, x, y, button, pressed):
         if pressed:
-            with self._lock:
-                self._mouse_count += 1
-                self._acc_mouse_count += 1
+            self._mouse_acc.total += 1
 
     def on_scroll(self, x, y, dx, dy):
-        with self._lock:
-             # 滚轮也算鼠标操作
-            self._mouse_count += 1
-            self._acc_mouse_count += 1
+        # 滚轮也算鼠标操作
+        self._mouse_acc.total += 1
+
+    def _drain(self, cursor):
+        """读取自上次调用以来的增量并推进游标"""
+        kb_total = self._kb_acc.total
+        ms_total = self._mouse_acc.total
+        kb = kb_total - cursor[0]
+        ms = ms_total - cursor[1]
+        cursor[0] = kb_total
+        cursor[1] = ms_total
+        return kb, ms
 
     def get_stats(self):
         """
         获取过去 N 秒的平均 APM (滑动窗口)。
         建议每秒调用一次。
         """
-        with self._lock:
-            current_kb = self._kb_count
-            current_ms = self._mouse_count
-            self._kb_count = 0
-            self._mouse_count = 0
-            
-        # 存入历史窗口
-        self.kb_history.append(current_kb)
-        self.mouse_history.append(current_ms)
-        
-        # 计算窗口内的总数
-        # 如果历史数据不足窗口大小，则按实际时间缩放? 
-        # 简单起见，按 len(history) 缩放
-        # APM = (Total / Seconds) * 60
-        
-        valid_seconds = len(self.kb_history)
-        if valid_seconds == 0:
-            return 0, 0
-            
-        avg_kb = sum(self.kb_history) / valid_seconds * 60
-        avg_ms = sum(self.mouse_history) / valid_seconds * 60
-            
-        return int(avg_kb), int(avg_ms)
+        current_kb, current_ms = self._drain(self._apm_cursor)
+
+        # 存入环形缓冲区，各窗口的累计和同步更新
+        self.apm_ring.push(current_kb, current_ms)
+
+        return self.apm_ring.apm(self.history_size)
+
+    def get_apm(self, window):
+        """
+        获取指定窗口 (秒，见 config.APM_WINDOWS) 的平均 APM，不推进采样。
+        :return: (kb_apm, mouse_apm)
+        """
+        return self.apm_ring.apm(window)
+
+    def get_apm_windows(self):
+        """
+        获取所有窗口的 APM: {window: (kb_apm, mouse_apm)}
+        """
+        return self.apm_ring.snapshot()
+
+    def peek_accumulated(self):
+        """
+        自上次 pop 以来的累积计数，不推进游标
+        :return: (kb, mouse)
+        """
+        cursor = self._acc_cursor
+        return self._kb_acc.total - cursor[0], self._mouse_acc.total - cursor[1]
 
     def pop_accumulated_counts(self):
         """
         获取并重置累积计数 (用于数据库写入)
         """
-        with self._lock:
-            kb = self._acc_kb_count
-            ms = self._acc_mouse_count
-            self._acc_kb_count = 0
-            self._acc_mouse_count = 0
+        kb, ms, _ = self.pop_accumulated_detail()
         return kb, ms
+
+    def pop_accumulated_detail(self):
+        """
+        获取并重置累积计数及按键分类计数 (用于数据库写入)
+        :return: (kb, mouse, {分类名: 次数})
+        """
+        kb, ms = self._drain(self._acc_cursor)
+
+        totals = list(self._kb_acc.categories)
+        cursor = self._acc_cat_cursor
+        categories = {}
+        for i, name in enumerate(KEY_CATEGORIES):
+            categories[name] = totals[i] - cursor[i]
+            cursor[i] = totals[i]
+        return kb, ms, categories
@@ -1,9 +1,10 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QListWidget, QPushButton, QHBoxLayout, QMessageBox, QGraphicsDropShadowEffect, QListWidgetItem, QTextEdit
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QListView, QPushButton, QHBoxLayout, QMessageBox, QGraphicsDropShadowEffect, QTextEdit
 from PyQt6.QtCore import Qt, QPoint
 from PyQt6.QtGui import QPainter, QColor, QPen, QBrush, QAction
 from src.logger import logger
 
 from src.ui.base_window import DraggableWindow
+from src.ui.list_models import InventoryListModel
 
 class InventoryWindow(DraggableWindow):
     def __init__(self, cultivator, pet_window=None, parent=None):
@@ -34,10 +35,12 @@ class InventoryWindow(DraggableWindow):
         self.money_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         main_layout.addWidget(self.money_label)
         
-        # 中部：物品列表
-        self.item_list = QListWidget()
+        # 中部：物品列表 (model 随背包变化逐行更新)
+        self.item_model = InventoryListModel(self.cultivator, self.item_text, self)
+        self.item_list = QListView()
+        self.item_list.setModel(self.item_model)
         self.item_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: rgba(0, 0, 0, 50);
                 border: 1px solid rgba(255, 215, 0, 50);
                 border-radius: 4px;
@@ -45,17 +48,17 @@ class InventoryWindow(DraggableWindow):
                 font-size: 13px;
                 outline: none;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 5px;
                 border-bottom: 1px solid rgba(255, 255, 255, 20);
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: rgba(255, 215, 0, 40);
                 color: #FFD700;
             }
         """)
-        self.refresh_list()
-        self.item_list.itemClicked.connect(self.show_item_detail)
+        self.item_list.clicked.connect(self.show_item_detail)
+        self.cultivator.add_money_listener(lambda old, new: self.update_money())
         main_layout.addWidget(self.item_list)
         
         # 底部：详情与操作
@@ -126,22 +129,21 @@ class InventoryWindow(DraggableWindow):
         painter.setPen(QPen(border_color, 1.5))
         painter.drawRoundedRect(rect, 10, 10)
 
-    def refresh_list(self):
-        self.item_list.clear()
+    def item_text(self, item_id, count):
         # cultivator.inventory store keys as item_id now
-        for item_id, count in self.cultivator.inventory.items():
-            if count > 0:
-                item_data = self.item_manager.get_item(item_id)
-                if item_data:
-                    name = item_data["name"]
-                else:
-                    # Fallback translation for legacy items
-                    name = self.translate_legacy_id(item_id)
-                
-                list_item = QListWidgetItem(f"{name} x{count}")
-                list_item.setData(Qt.ItemDataRole.UserRole, item_id) # Store ID
-                self.item_list.addItem(list_item)
-                
+        item_data = self.item_manager.get_item(item_id)
+        if item_data:
+            name = item_data["name"]
+        else:
+            # Fallback translation for legacy items
+            name = self.translate_legacy_id(item_id)
+        return f"{name} x{count}"
+
+    def refresh_list(self):
+        # 物品列表由 item_model 随背包变化逐行更新，这里只需刷新灵石
+        self.update_money()
+
+    def update_money(self):
         self.money_label.setText(f"灵石: {self.cultivator.money}")
 
     def show_item_detail(self, item):
@@ -313,7 +315,6 @@ class InventoryWindow(DraggableWindow):
             # self.detail_text.setHtml(msg) # Maybe not needed clutter
             if self.pet_window:
                 self.pet_window.show_notification(msg)
-            self.refresh_list()
             
             if self.cultivator.inventory[item_id] <= 0:
                 self.detail_text.setHtml("<b>物品已用完</b>")
@@ -3,6 +3,122 @@ import os
 import random
 from src.logger import logger
 
+# Pills 类型包括: pill*, break*, buff, exp, stat, recov, utility, special, cosmetic, consumable
+PILL_TYPES = frozenset(['breakthrough', 'buff', 'exp', 'stat', 'recov', 'utility', 'special', 'cosmetic', 'consumable', 'break'])
+
+# Translate Types
+TYPE_NAMES = {
+    "spirit": "灵植", "mineral": "矿石", "monster": "妖丹",
+    "exp": "修为丹", "stat": "属性丹", "buff": "增益丹",
+    "recov": "恢复丹", "break": "突破丹", "breakthrough": "突破丹",
+    "utility": "功能丹", "special": "特殊", "cosmetic": "外观",
+    "junk": "杂物", "material": "材料", "liquid": "灵液"
+}
+
+
+class ItemRecord:
+    """
+    加载后的物品定义 (effect / recipe 已解析)。
+    保留只读的 dict 接口 (info["name"] / info.get("effect", {}) / "recipe" in info)，
+    值为 None 的可选字段 (effect / recipe / craft_time / success_rate) 视为不存在。
+    """
+    __slots__ = ("id", "name", "type", "tier", "description", "price", "effect",
+                 "recipe", "craft_time", "success_rate", "category")
+
+    def __init__(self, id, name, type, tier, description=None, price=0, effect=None):
+        self.id = id
+        self.name = name
+        self.type = type
+        self.tier = tier
+        self.description = description
+        self.price = price
+        self.effect = effect
+        self.recipe = None
+        self.craft_time = None
+        self.success_rate = None
+        # Categorize: pills/consumables vs materials
+        self.category = "pills" if type in PILL_TYPES or 'pill' in id else "materials"
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getstate__(self):
+        return tuple(getattr(self, k) for k in self.__slots__)
+
+    def __setstate__(self, state):
+        for k, v in zip(self.__slots__, state):
+            setattr(self, k, v)
+
+
+class CraftTracker:
+    """
+    增量维护某个背包可炼制的丹方。
+    每个丹方记录尚未满足的材料集合，背包中某个物品数量变化时只重新检查用到它的丹方
+    (通过 ItemManager.recipe_users 反查)，craftable 始终是最新的可炼制集合。
+    version 在 craftable 变化时递增，界面可据此判断是否需要刷新；
+    也可注册回调 callback(recipe_id)，某个丹方可炼制状态变化时调用 (整体重算时 recipe_id 为 None)。
+    """
+
+    def __init__(self, item_manager, inventory=None):
+        self.item_manager = item_manager
+        self.missing = {}  # recipe_id -> 不足的材料 ID 集合
+        self.craftable = set()
+        self.version = 0
+        self._listeners = []
+        self.reset(inventory or {})
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def _notify(self, recipe_id):
+        for callback in self._listeners:
+            callback(recipe_id)
+
+    def reset(self, inventory):
+        """背包整体替换后重新计算"""
+        self.missing = {}
+        for recipe_id, recipe in self.item_manager.recipes.items():
+            self.missing[recipe_id] = {
+                mat_id for mat_id, count in recipe.items() if inventory.get(mat_id, 0) < count
+            }
+        self.craftable = {recipe_id for recipe_id, short in self.missing.items() if not short}
+        self.version += 1
+        self._notify(None)
+
+    def on_change(self, item_id, count):
+        """背包中 item_id 的数量变为 count"""
+        changed = []
+        for recipe_id, need in self.item_manager.recipe_users.get(item_id, ()):
+            short = self.missing[recipe_id]
+            if count < need:
+                short.add(item_id)
+                if recipe_id in self.craftable:
+                    self.craftable.discard(recipe_id)
+                    changed.append(recipe_id)
+            else:
+                short.discard(item_id)
+                if not short and recipe_id not in self.craftable:
+                    self.craftable.add(recipe_id)
+                    changed.append(recipe_id)
+        if changed:
+            self.version += 1
+            for recipe_id in changed:
+                self._notify(recipe_id)
+
+    def is_craftable(self, recipe_id):
+        return recipe_id in self.craftable
+
+
 class ItemManager:
     _instance = None
 
@@ -16,7 +132,10 @@ class ItemManager:
         if self.initialized:
             return
         
-        self.flat_items = {} 
+        self.flat_items = {}
+        self._detail_html = {}  # item_id -> 渲染好的详情 HTML
+        self.recipes = {}       # recipe_id (产出物品) -> {材料ID: 数量}
+        self.recipe_users = {}  # 材料ID -> [(recipe_id, 所需数量)]
         # Support Tier 0-8
         self.tier_lists = {}
         for i in range(9):
@@ -46,57 +165,57 @@ class ItemManager:
             logger.error(f"Failed to load items from DB: {e}")
 
     def _load_from_db(self):
-        from src.database import db_manager
+        from src.services.data_loader import DataLoader
+        from src.services.static_cache import static_cache
         import json
         
+        self._detail_html = {}
+        cached = static_cache.get("items")
+        if cached:
+            self.flat_items, self.tier_lists = cached
+            self._build_recipe_index()
+            return
+
         try:
-            with db_manager._get_conn() as conn:
-                conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
-                cursor = conn.cursor()
-                
-                cursor.execute("SELECT * FROM item_definitions")
-                rows = cursor.fetchall()
-                
-                for row in rows:
-                    item_id = row['id']
-                    tier = row['tier']
-                    itype = row['type']
-                    
+            with DataLoader.static_conn() as conn:
+                rows = conn.execute(
+                    "SELECT id, name, type, tier, description, price, effect_json FROM item_definitions"
+                ).fetchall()
+                for item_id, name, itype, tier, description, price, effect_json in rows:
                     # Parse effect
-                    if row['effect_json']:
-                        row['effect'] = json.loads(row['effect_json'])
-                        
-                    # Fetch recipe if needed (optional optimization: fetch all recipes once)
-                    # For now, let's just make sure item data is robust
-                    
-                    self.flat_items[item_id] = row
-                    
-                    # Categorize: pills/consumables vs materials
-                    # Pills 类型包括: pill*, break*, buff, exp, stat, recov, utility, special, cosmetic, consumable
-                    pill_types = ['breakthrough', 'buff', 'exp', 'stat', 'recov', 'utility', 'special', 'cosmetic', 'consumable', 'break']
-                    if itype in pill_types or 'pill' in item_id:
-                        cat = "pills"
-                    else:
-                        cat = "materials"
-                        
+                    effect = json.loads(effect_json) if effect_json else None
+                    item = ItemRecord(item_id, name, itype, tier, description, price, effect)
+                    self.flat_items[item_id] = item
                     if tier in self.tier_lists:
-                        self.tier_lists[tier][cat].append(item_id)
-            
-                # 3. Load Recipes
-                cursor.execute("SELECT * FROM recipes")
-                recipe_rows = cursor.fetchall()
-                for r_row in recipe_rows:
-                    res_id = r_row['result_item_id']
-                    if res_id in self.flat_items:
-                        ing_json = r_row['ingredients_json']
+                        self.tier_lists[tier][item.category].append(item_id)
+
+                # Load Recipes
+                recipe_rows = conn.execute(
+                    "SELECT result_item_id, ingredients_json, craft_time, success_rate FROM recipes"
+                ).fetchall()
+                for res_id, ing_json, craft_time, success_rate in recipe_rows:
+                    item = self.flat_items.get(res_id)
+                    if item is not None:
                         if ing_json:
-                            self.flat_items[res_id]['recipe'] = json.loads(ing_json)
-                        # Could also load usage craft_time, success_rate if needed
-                        self.flat_items[res_id]['craft_time'] = r_row['craft_time']
-                        self.flat_items[res_id]['success_rate'] = r_row['success_rate']
-                        
+                            item.recipe = json.loads(ing_json)
+                        item.craft_time = craft_time
+                        item.success_rate = success_rate
+
         except Exception as e:
             logger.error(f"Load from DB failed: {e}")
+            return
+
+        self._build_recipe_index()
+        if self.flat_items:
+            static_cache.put("items", (self.flat_items, self.tier_lists))
+
+    def _build_recipe_index(self):
+        """材料 -> 丹方 反查表 (CraftTracker 增量更新使用)"""
+        self.recipes = {iid: item.recipe for iid, item in self.flat_items.items() if item.recipe}
+        self.recipe_users = {}
+        for recipe_id, recipe in self.recipes.items():
+            for mat_id, count in recipe.items():
+                self.recipe_users.setdefault(mat_id, []).append((recipe_id, count))
 
     def _process_data(self):
         pass # Deprecated
@@ -105,26 +224,26 @@ class ItemManager:
         return self.flat_items.get(item_id)
 
     def get_item_details_html(self, item_id):
-        info = self.get_item(item_id)
-        if not info:
-            return "<b>未知物品</b>"
-            
+        """物品详情 HTML (背包/坊市点击时调用)，每个物品只渲染一次"""
+        html = self._detail_html.get(item_id)
+        if html is None:
+            info = self.get_item(item_id)
+            if not info:
+                return "<b>未知物品</b>"
+            html = self._detail_html[item_id] = self._render_details_html(info)
+        return html
+
+    @staticmethod
+    def _render_details_html(info):
         name = info.get("name", "未知")
         tier = info.get("tier", 0)
         item_type = info.get("type", "misc")
         price = info.get("price", 0)
         desc = info.get("desc", "暂无描述")
         effects = info.get("effect", {})
-        
-        # Translate Types
-        type_cn = {
-            "spirit": "灵植", "mineral": "矿石", "monster": "妖丹", 
-            "exp": "修为丹", "stat": "属性丹", "buff": "增益丹",
-            "recov": "恢复丹", "break": "突破丹", "breakthrough": "突破丹",
-            "utility": "功能丹", "special": "特殊", "cosmetic": "外观",
-            "junk": "杂物", "material": "材料", "liquid": "灵液"
-        }.get(item_type, item_type.capitalize())
-        
+
+        type_cn = TYPE_NAMES.get(item_type, item_type.capitalize())
+
         # Format Effects
         effect_str = ""
         if effects:
@@ -134,20 +253,20 @@ class ItemManager:
                 suffix = "%" if val < 1.0 else ""
                 val_disp = int(val * 100) if val < 1 else val
                 effect_list.append(f"修为 +{val_disp}{suffix}")
-            
+
             if "stat_body" in effects: effect_list.append(f"体魄 +{effects['stat_body']}")
             if "mind_heal" in effects: effect_list.append(f"心魔 -{effects['mind_heal']}")
             if "affection" in effects:
                 val = effects['affection']
                 once_tag = "（一面之缘）" if effects.get('once_per_life') else ""
                 effect_list.append(f"气运 +{val}{once_tag}")
-            if "breakthrough_chance" in effects: 
+            if "breakthrough_chance" in effects:
                 val = effects['breakthrough_chance']
                 effect_list.append(f"突破成功率 +{int(val*100)}%")
-                
+
             if effect_list:
                 effect_str = "<br><b>【功效】</b> " + " ".join(effect_list)
-        
+
         html = f"""
         <div style='font-family: Microsoft YaHei; color: #EEE;'>
             <div style='font-size: 16px; color: #FFD700;'><b>{name}</b> <span style='font-size:12px; color:#AAA;'>[{tier}阶 {type_cn}]</span></div>
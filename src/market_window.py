@@ -1,10 +1,13 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QListWidget, QPushButton, 
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QListWidget, QListView, QPushButton, 
                              QHBoxLayout, QTabWidget, QMessageBox, QListWidgetItem, QTextEdit)
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPainter, QColor, QPen, QBrush
 from src.logger import logger
 
 from src.ui.base_window import DraggableWindow
+from src.ui.list_models import InventoryListModel
+
+TIER_NAMES = {0: "凡", 1: "一", 2: "二", 3: "三", 4: "四", 5: "五", 6: "六", 7: "七", 8: "八", 9: "九"}
 
 class MarketWindow(DraggableWindow):
     def __init__(self, cultivator, parent=None):
@@ -261,9 +264,13 @@ class MarketWindow(DraggableWindow):
         layout = QVBoxLayout(self.sell_tab)
         layout.setContentsMargins(0, 10, 0, 0)
         
-        self.sell_list = QListWidget()
+        # 背包 model 随背包变化逐行更新 (出售、炼丹、事件掉落等)
+        self.sell_model = InventoryListModel(self.cultivator, self.sell_text, self)
+        self.sell_list = QListView()
+        self.sell_list.setModel(self.sell_model)
         self.style_list_widget(self.sell_list)
-        self.sell_list.itemClicked.connect(self.show_sell_detail)
+        self.sell_list.clicked.connect(self.show_sell_detail)
+        self.cultivator.add_money_listener(lambda old, new: self.update_money())
         layout.addWidget(self.sell_list)
         
         # Detail View
@@ -299,48 +306,22 @@ class MarketWindow(DraggableWindow):
         self.sell_msg.setStyleSheet("color: #888; font-size: 10px;")
         layout.addWidget(self.sell_msg)
 
-    def refresh_sell_list(self):
-        current_row = self.sell_list.currentRow()
-        current_item = self.sell_list.currentItem()
-        selected_item_id = current_item.data(Qt.ItemDataRole.UserRole) if current_item else None
-
-        self.sell_list.clear() # Clears list but we have the ID
-
-        # Sort items? By Tier/Name
-        # inventory is dict {id: count}
-        # Let's simple list
+    def sell_text(self, item_id, count):
+        info = self.item_manager.get_item(item_id)
+        name = info.get("name", item_id) if info else item_id
+        tier = info.get("tier", 0) if info else 0
         
-        tier_map = {0: "凡", 1: "一", 2: "二", 3: "三", 4: "四", 5: "五", 6: "六", 7: "七", 8: "八", 9: "九"}
-
-        restore_item = None
-
-        for item_id, count in self.cultivator.inventory.items():
-            if count > 0:
-                info = self.item_manager.get_item(item_id)
-                name = info.get("name", item_id) if info else item_id
-                tier = info.get("tier", 0) if info else 0
-                
-                base_price = info.get("price", 1) if info else 1
-                sell_price = max(1, int(base_price * 0.5))
-                
-                # Show Tier
-                cn_tier = tier_map.get(tier, str(tier))
-                tier_str = f"[{cn_tier}{'阶' if tier > 0 else '物'}]"
-                
-                text = f"{tier_str} {name} x{count}\n售价: {sell_price} 灵石/个"
-                
-                item = QListWidgetItem(text)
-                item.setData(Qt.ItemDataRole.UserRole, item_id)
-                self.sell_list.addItem(item)
-                
-                if selected_item_id and item_id == selected_item_id:
-                    restore_item = item
-        
-        if restore_item:
-            self.sell_list.setCurrentItem(restore_item)
-            self.sell_list.scrollToItem(restore_item)
-
+        base_price = info.get("price", 1) if info else 1
+        sell_price = max(1, int(base_price * 0.5))
+        
+        # Show Tier
+        cn_tier = TIER_NAMES.get(tier, str(tier))
+        tier_str = f"[{cn_tier}{'阶' if tier > 0 else '物'}]"
         
+        return f"{tier_str} {name} x{count}\n售价: {sell_price} 灵石/个"
+
+    def refresh_sell_list(self):
+        # 出售列表由 sell_model 随背包变化逐行更新 (选中项自然保留)，这里只需刷新灵石
         self.update_money()
 
     def show_sell_detail(self, item):
@@ -349,8 +330,8 @@ class MarketWindow(DraggableWindow):
         self.sell_detail.setHtml(html)
 
     def _get_selected_item_info(self):
-        current_item = self.sell_list.currentItem()
-        if not current_item:
+        current_item = self.sell_list.currentIndex()
+        if not current_item.isValid():
             return None, 0, 0
         item_id = current_item.data(Qt.ItemDataRole.UserRole)
         count = self.cultivator.inventory.get(item_id, 0)
@@ -367,7 +348,6 @@ class MarketWindow(DraggableWindow):
 
         if self.cultivator.sell_item(item_id, 1, sell_price) > 0:
             self.sell_msg.setText(f"出售成功! +{sell_price}灵石")
-            self.refresh_sell_list()
 
     def sell_item_all(self):
         item_id, count, sell_price = self._get_selected_item_info()
@@ -376,7 +356,6 @@ class MarketWindow(DraggableWindow):
         total_earn = self.cultivator.sell_item(item_id, count, sell_price)
         if total_earn > 0:
             self.sell_msg.setText(f"出售 {count}个! 获得 {total_earn} 灵石")
-            self.refresh_sell_list()
 
     # --- Utils ---
     def update_money(self):
@@ -389,18 +368,18 @@ class MarketWindow(DraggableWindow):
 
     def style_list_widget(self, list_widget):
         list_widget.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: rgba(0, 0, 0, 40);
                 border: 1px solid rgba(255, 215, 0, 30);
                 border-radius: 4px;
                 color: #DDD;
                 outline: none;
             }
-            QListWidget::item {
+            QListView::item {
                 border-bottom: 1px solid rgba(255, 255, 255, 10);
                 padding: 4px;
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: rgba(255, 215, 0, 30);
                 color: #FFD700;
             }
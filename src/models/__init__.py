@@ -1,3 +1,6 @@
 from .player import PlayerStatus, PlayerInventory, MarketStock, UsedOnceItem
-from .system import ActivityLog, SystemMetadata, EventHistory, PlayerEvent
+from .system import (
+    ActivityLog, SystemMetadata, EventHistory, PlayerEvent,
+    ActivityRollupHour, ActivityRollupDay, PlayerStatTotals
+)
 from .static_data import ItemDefinition, Recipe, Achievement, EventDefinition
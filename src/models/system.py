@@ -1,12 +1,24 @@
 from typing import Optional
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, SQLModel, Index
 
 class ActivityLog(SQLModel, table=True):
     __tablename__ = "activity_logs_minute"
+    # 覆盖索引: 按时间范围查询/聚合 (timestamp, keys, mouse) 时无需回表
+    __table_args__ = (
+        Index("ix_activity_logs_minute_ts_cover", "timestamp", "keys_count", "mouse_count"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     timestamp: int
     keys_count: int = Field(default=0)
     mouse_count: int = Field(default=0)
+    # 按键分类计数 (见 config.KEY_CATEGORIES)，每个分类一列
+    key_char: int = Field(default=0)
+    key_space: int = Field(default=0)
+    key_enter: int = Field(default=0)
+    key_backspace: int = Field(default=0)
+    key_modifier: int = Field(default=0)
+    key_navigation: int = Field(default=0)
+    key_other: int = Field(default=0)
 
 class SystemMetadata(SQLModel, table=True):
     __tablename__ = "system_metadata"
@@ -20,7 +32,70 @@ class EventHistory(SQLModel, table=True):
 
 class PlayerEvent(SQLModel, table=True):
     __tablename__ = "player_events"
+    # 最近事件 (ORDER BY timestamp DESC LIMIT N) 直接按索引倒序读取
+    __table_args__ = (
+        Index("ix_player_events_timestamp", "timestamp"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     timestamp: int
     event_type: str
     message: str
+
+class ActivityRollupHour(SQLModel, table=True):
+    """
+    按本地小时汇总的活动数据，随分钟记录写入同步累加 (upsert)。
+    bucket 为本地时间 YYYYMMDDHH 整数，可直接按范围查询。
+    """
+    __tablename__ = "activity_rollup_hour"
+    bucket: int = Field(primary_key=True)
+    keys_count: int = Field(default=0)
+    mouse_count: int = Field(default=0)
+    active_minutes: int = Field(default=0)
+    max_actions: int = Field(default=0) # 单分钟最大操作数 (keys + mouse)
+    key_char: int = Field(default=0)
+    key_space: int = Field(default=0)
+    key_enter: int = Field(default=0)
+    key_backspace: int = Field(default=0)
+    key_modifier: int = Field(default=0)
+    key_navigation: int = Field(default=0)
+    key_other: int = Field(default=0)
+
+class ActivityRollupDay(SQLModel, table=True):
+    """
+    按本地日期汇总的活动数据，day 为本地时间 YYYYMMDD 整数。
+    weekday 同 SQLite strftime('%w'): 0=周日, 6=周六。
+    """
+    __tablename__ = "activity_rollup_day"
+    day: int = Field(primary_key=True)
+    weekday: int = Field(default=0)
+    keys_count: int = Field(default=0)
+    mouse_count: int = Field(default=0)
+    active_minutes: int = Field(default=0)
+    max_actions: int = Field(default=0)
+    key_char: int = Field(default=0)
+    key_space: int = Field(default=0)
+    key_enter: int = Field(default=0)
+    key_backspace: int = Field(default=0)
+    key_modifier: int = Field(default=0)
+    key_navigation: int = Field(default=0)
+    key_other: int = Field(default=0)
+
+class PlayerStatTotals(SQLModel, table=True):
+    """
+    全部历史的累计统计 (单行 id=1)，随分钟记录写入同步累加，供成就检查直接读取。
+    weekend_minutes: 本地时间周六/周日的活跃分钟数。
+    """
+    __tablename__ = "player_stat_totals"
+    id: int = Field(default=1, primary_key=True)
+    keys_count: int = Field(default=0)
+    mouse_count: int = Field(default=0)
+    active_minutes: int = Field(default=0)
+    max_actions: int = Field(default=0)
+    weekend_minutes: int = Field(default=0)
+    key_char: int = Field(default=0)
+    key_space: int = Field(default=0)
+    key_enter: int = Field(default=0)
+    key_backspace: int = Field(default=0)
+    key_modifier: int = Field(default=0)
+    key_navigation: int = Field(default=0)
+    key_other: int = Field(default=0)
@@ -6,6 +6,8 @@ from PyQt6.QtGui import QPixmap, QAction, QMouseEvent, QCursor
 from src.state import PetState
 from src.input_monitor import InputMonitor
 from src.services.activity_recorder import ActivityRecorder
+from src.services.autosave import AutoSaveScheduler
+from src.services.retention_manager import RetentionManager
 from src.cultivator import Cultivator
 from src.logger import logger
 from src.utils.path_helper import get_resource_path, get_user_data_dir
@@ -24,6 +26,11 @@ class PetWindow(QWidget):
         self.save_path = os.path.join(get_user_data_dir(), 'save_data.json')
         
         self.cultivator.load_data(self.save_path)
+        
+        # 防抖自动存档 (变更静默后写入，最长间隔有上限)
+        self.autosave = AutoSaveScheduler(self.cultivator, parent=self)
+        self.autosave.start()
+        
         self.load_assets() # 只有在UI初始化后才能加载资源
         
         # 拖拽相关
@@ -39,6 +46,15 @@ class PetWindow(QWidget):
         # 启动活动记录器 (每分钟存库)
         self.recorder = ActivityRecorder(self.monitor)
         self.recorder.start()
+
+        # 数据保留与压缩 (空闲时每天一次)
+        self.retention = RetentionManager(self.monitor, parent=self)
+        self.retention.start()
+
+        # 托盘 / 右键菜单的 "退出" 直接调用 app.quit()，不会经过 closeEvent，
+        # 在事件循环结束前同样保存并等待持久化线程落盘
+        self._shut_down = False
+        QApplication.instance().aboutToQuit.connect(self.shutdown)
         
         # 炼丹状态
         self.is_alchemying = False
@@ -95,8 +111,10 @@ class PetWindow(QWidget):
                     # 炼丹中不获取常规收益
                     return 
 
-        # 2. 调用新的 Cultivator 更新逻辑
-        gain_msg, state_code = self.cultivator.update(kb_apm, mouse_apm)
+        # 2. 调用新的 Cultivator 更新逻辑 (附带 1分/5分/1时 等长期强度)
+        gain_msg, state_code = self.cultivator.update(
+            kb_apm, mouse_apm, self.monitor.get_apm_windows()
+        )
         
         # 3. 状态映射 (Cultivator 返回的是 int code, 转为 Enum)
         # 0:IDLE, 1:COMBAT, 2:WORK, 3:READ
@@ -142,10 +160,13 @@ class PetWindow(QWidget):
                 f"【{self.cultivator.current_layer}】\n"
                 f"修为: {self.cultivator.exp}/{self.cultivator.max_exp}\n"
                 f"灵石: {self.cultivator.money}\n"
-                f"状态: {state_cn}"
+                f"状态: {state_cn}\n"
+                f"强度: {self.cultivator.get_intensity(60)} APM (近1时 {self.cultivator.get_intensity(3600)})"
             )
             self.tray.set_tooltip(tooltip)
 
+        self.update_craft_badge()
+
         # 5. 检查事件日志
         state_cn = { # Re-map for logic if needed or just pass
              # ... existing logic ...
@@ -156,6 +177,23 @@ class PetWindow(QWidget):
             self.show_notification(latest_event)
             self.cultivator.events.clear()
                 
+    def craftable_recipes(self):
+        """当前境界材料已齐全的丹方 (与炼丹房列表一致)"""
+        tier = min(self.cultivator.layer_index, 8)
+        item_manager = self.cultivator.item_manager
+        return [rid for rid in self.cultivator.craft_tracker.craftable
+                if item_manager.get_item(rid).tier == tier]
+
+    def update_craft_badge(self):
+        # 只在境界/可炼制集合/炼丹状态变化时重新计算
+        key = (self.cultivator.layer_index, self.cultivator.craft_tracker.version, self.is_alchemying)
+        if key == self._craft_badge_key:
+            return
+        self._craft_badge_key = key
+        count = 0 if self.is_alchemying else len(self.craftable_recipes())
+        self.craft_badge.setToolTip(f"可炼制丹方: {count}")
+        self.craft_badge.setVisible(count > 0)
+
     def set_always_on_top(self, enabled: bool):
         flags = self.windowFlags()
         if enabled:
@@ -255,6 +293,7 @@ class PetWindow(QWidget):
         self.alchemy_target_time = 10 
         
         self.set_state(PetState.ALCHEMY)
+        self.update_craft_badge()
         logger.info(f"开始炼制: {target_pill_id}")
         self.show_notification("开始闭关炼丹... (请勿高频操作)")
 
@@ -343,12 +382,26 @@ class PetWindow(QWidget):
         self.set_state(PetState.IDLE)
 
     def closeEvent(self, event):
+        self.shutdown()
+        super().closeEvent(event)
+
+    def shutdown(self):
+        """保存存档、提交剩余活动记录并等待落盘 (关闭窗口与退出程序共用，只执行一次)"""
+        if getattr(self, '_shut_down', False):
+            return
+        self._shut_down = True
         logger.info("程序关闭，保存数据...")
+        if hasattr(self, 'autosave'):
+            self.autosave.stop()
+        if hasattr(self, 'retention'):
+            self.retention.stop()
         self.cultivator.save_data(self.save_path)
         if hasattr(self, 'recorder'):
             self.recorder.stop()
+        # 等待持久化线程写完存档与剩余活动记录
+        from src.services.persistence_worker import persistence_worker
+        persistence_worker.flush()
         self.monitor.stop()
-        super().closeEvent(event)
 
     def init_ui(self):
         # 1. 窗口属性设置
@@ -417,6 +470,24 @@ class PetWindow(QWidget):
         self.info_label.hide() # 默认隐藏
         self.info_label.setWordWrap(True)
 
+        # 5.5 可炼制提示角标 (当前境界有丹方材料齐全时显示)
+        self.craft_badge = QLabel("丹", self.image_container)
+        self.craft_badge.setFixedSize(22, 22)
+        self.craft_badge.move(172, 6)
+        self.craft_badge.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.craft_badge.setStyleSheet("""
+            QLabel {
+                color: #FFFFFF;
+                font-size: 12px;
+                font-weight: bold;
+                background-color: rgba(220, 60, 40, 220);
+                border: 1px solid #FFD700;
+                border-radius: 11px;
+            }
+        """)
+        self.craft_badge.hide()
+        self._craft_badge_key = None
+
         # 6. 呼吸/悬浮动画定时器
         self.float_timer = QTimer(self)
         self.float_timer.timeout.connect(self.update_floating_animation)
@@ -974,7 +1045,7 @@ class PetWindow(QWidget):
             
     def on_pet_clicked(self):
         # 播放随机对话
-        dialogue = self.cultivator.get_random_dialogue()
+        dialogue = self.cultivator.get_random_dialogue(self.recorder.today_mouse_count())
         self.show_notification(dialogue)
         
         # 简单的点击反馈动画 (例如稍微缩放一下，或者震动一下)
@@ -1035,7 +1106,8 @@ class PetWindow(QWidget):
         menu.addSeparator()
 
         # 炼丹
-        alchemy_action = QAction('开炉炼丹', self)
+        craftable = len(self.craftable_recipes())
+        alchemy_action = QAction(f'开炉炼丹 (可炼 {craftable})' if craftable else '开炉炼丹', self)
         alchemy_action.triggered.connect(self.open_alchemy_window)
         menu.addAction(alchemy_action)
 
@@ -1203,11 +1275,7 @@ class PetWindow(QWidget):
             self.set_state(PetState.IDLE)
             self.show_notification(message)
             
-            # 刷新打开的子窗口（如果有）
-            if hasattr(self, 'inventory_window') and self.inventory_window and self.inventory_window.isVisible():
-                self.inventory_window.refresh_inventory()
-            if hasattr(self, 'market_window') and self.market_window and self.market_window.isVisible():
-                self.market_window.refresh_display()
+            # 打开的子窗口通过背包/灵石变更通知自动更新
         else:
             ConfirmationDialog.alert(self, "导入失败", message)
 
@@ -1,5 +1,6 @@
 from src.database import db_manager
 from src.logger import logger
+from src.services.persistence_worker import persistence_worker
 import time
 import json
 
@@ -15,25 +16,108 @@ TITLE_EFFECTS = {
     "title_resilient":   {"name": "[百折不挠]", "desc": "心魔自然衰减速度 +10%", "buff": {"mind_decay": 0.10}},
 }
 
+# 不依赖任何统计键、每次检查都需要评估的成就 (未知的条件类型)
+_ALWAYS = "*"
+
 class AchievementManager:
     def __init__(self):
         self.cached_achievements = []
         self.last_check_time = 0
         self.check_interval = 60 # Check every minute
+        # 内存中的成就表 {id: row dict}，首次使用时加载
+        self._achievements = None
+        # 未解锁成就按依赖的统计键索引 {stat_key: [row dict]}
+        self._index = {}
+        # 上一次检查时的统计值，只评估依赖变化的成就
+        self._last_stats = {}
+        # 进度视图缓存: 统计或成就状态变化时失效 (progress_version 递增)
+        self._progress = None
+        self.progress_version = 0
 
-    def get_all_achievements(self):
-        """
-        Return list of dicts: {id, name, desc, status, progress_str, reward_desc}
-        """
+    def reload(self):
+        """从数据库重新加载成就 (外部直接修改 achievements 表后调用，如导入进度)"""
         try:
             with db_manager._get_conn() as conn:
                 conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM achievements ORDER BY status DESC, id ASC")
-                return cursor.fetchall()
+                rows = conn.execute("SELECT * FROM achievements").fetchall()
         except Exception as e:
-            logger.error(f"Failed to fetch achievements: {e}")
-            return []
+            logger.error(f"Failed to load achievements: {e}")
+            rows = []
+        self._build_index(rows)
+
+    def _build_index(self, rows):
+        self.invalidate_progress()
+        self._achievements = {row['id']: row for row in rows}
+        self._index = {}
+        for ach in rows:
+            if ach['status'] == 0:
+                for key in self._dependencies(ach):
+                    self._index.setdefault(key, []).append(ach)
+        self._last_stats = {}
+
+    def _ensure_loaded(self):
+        if self._achievements is None:
+            self.reload()
+
+    @staticmethod
+    def _dependencies(ach):
+        """成就条件依赖的统计键 (与 _evaluate 的取值方式对应)"""
+        ctype = ach['condition_type']
+        target = ach['condition_target']
+        if ctype in ('stat_total', 'stat_max', 'event_trigger'):
+            return (target,)
+        if ctype == 'currency':
+            return ('money',)
+        if ctype == 'currency_low':
+            return ('money', 'keyboard')
+        if ctype == 'special':
+            if target == 'inventory_fullness':
+                return ('inventory_fullness',)
+            if target == 'weekend_activity_hours':
+                return ('weekend_hours',)
+            if target == 'afk_hours':
+                return ()  # 尚未实现，永远不会解锁
+        return (_ALWAYS,)
+
+    def get_all_achievements(self):
+        """
+        Return list of dicts: {id, name, desc, status, progress_str, reward_desc}
+        """
+        self._ensure_loaded()
+        achievements = sorted(self._achievements.values(), key=lambda a: (-a['status'], a['id']))
+        return [dict(ach) for ach in achievements]
+
+    def invalidate_progress(self):
+        self._progress = None
+        self.progress_version += 1
+
+    def get_progress(self, cultivator):
+        """
+        成就进度视图: get_all_achievements() 的每一项增加
+        current (当前值，无法度量时为 None) 与 progress (0~1，无法度量时为 None)。
+        使用最近一次检查的统计值，结果缓存到统计或成就状态变化为止。
+        """
+        self._ensure_loaded()
+        if self._progress is None:
+            stats = self._last_stats
+            if not stats:
+                stats = self._fetch_global_stats()
+                stats['money'] = cultivator.money
+                stats['inventory_fullness'] = len(cultivator.inventory)
+
+            progress = []
+            for ach in self.get_all_achievements():
+                current = self._current_value(ach, stats, cultivator)
+                ach['current'] = current
+                if current is None:
+                    ach['progress'] = None
+                elif ach['threshold'] > 0:
+                    ach['progress'] = min(1.0, current / ach['threshold'])
+                else:
+                    ach['progress'] = 1.0
+                progress.append(ach)
+            self._progress = progress
+        return self._progress
 
     def get_title_effect(self, title_id):
         return TITLE_EFFECTS.get(title_id, None)
@@ -47,7 +131,6 @@ class AchievementManager:
             return []
         
         self.last_check_time = time.time()
-        new_unlocks = []
 
         # 1. Fetch Aggregated Stats
         stats = self._fetch_global_stats()
@@ -57,190 +140,185 @@ class AchievementManager:
         stats['inventory_fullness'] = len(cultivator.inventory) # Simple count for now, logic calls for %?
         # Assuming bag size is soft-capped or we just use item count
         
-        # 3. Check Locked Achievements
-        try:
-            with db_manager._get_conn() as conn:
-                conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM achievements WHERE status = 0")
-                locked_achs = cursor.fetchall()
-                
-                for ach in locked_achs:
-                    if self._evaluate(ach, stats, cultivator):
-                        self._unlock(conn, ach['id'])
-                        new_unlocks.append(ach)
-                        
-                conn.commit()
-        except Exception as e:
-            logger.error(f"Achievement check failed: {e}")
-            
-        return new_unlocks
+        # 3. Check Locked Achievements (只评估依赖变化的成就)
+        return self._check(stats, cultivator)
 
     def check_trigger(self, cultivator, trigger_type, value=None):
         """
         Event-driven check (sell, event trigger, etc)
         """
+        stats = self._fetch_global_stats() # Still need base stats for mixed conditions
+        stats['money'] = cultivator.money
+        stats['inventory_fullness'] = len(cultivator.inventory)
+        
+        # Manual override for trigger values
+        if trigger_type == 'loot_tier_7':
+            stats['loot_tier_7'] = 1
+        
+        return self._check(stats, cultivator, extra_keys=(trigger_type,))
+
+    def _check(self, stats, cultivator, extra_keys=()):
+        self._ensure_loaded()
+        changed = {key for key, val in stats.items() if self._last_stats.get(key) != val}
+        if changed:
+            self.invalidate_progress()
+        changed.update(extra_keys)
+        changed.add(_ALWAYS)
+        self._last_stats = stats
+
         new_unlocks = []
-        try:
-            with db_manager._get_conn() as conn:
-                conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
-                cursor = conn.cursor()
-                # Only check achievements with matching trigger type or relevant condition
-                # Simplify: check all 'stat_total' is too slow? No, just check specific category?
-                # Actually, iterate all locked is fine if count is small (<100)
-                cursor.execute("SELECT * FROM achievements WHERE status = 0")
-                locked_achs = cursor.fetchall()
-
-                stats = self._fetch_global_stats() # Still need base stats for mixed conditions
-                stats['money'] = cultivator.money
-                
-                # Manual override for trigger values
-                if trigger_type == 'loot_tier_7':
-                    stats['loot_tier_7'] = 1
-                
-                for ach in locked_achs:
+        seen = set()
+        for key in changed:
+            for ach in self._index.get(key, ()):
+                if ach['id'] in seen:
+                    continue
+                seen.add(ach['id'])
+                try:
                     if self._evaluate(ach, stats, cultivator):
-                        self._unlock(conn, ach['id'])
                         new_unlocks.append(ach)
-                
-                conn.commit()
-        except Exception as e:
-            logger.error(f"Trigger check failed: {e}")
-        return new_unlocks
+                except Exception as e:
+                    logger.error(f"Achievement check failed ({ach['id']}): {e}")
+
+        self._unlock(new_unlocks)
+        return [dict(ach) for ach in new_unlocks]
 
     def claim_reward(self, cultivator, ach_id):
         """
         Claim reward for an unlocked achievement
+        状态以内存中的成就表为准 (解锁时已同步更新)；领取状态提交给持久化线程，
+        排在此前的解锁写入之后，不阻塞 GUI 线程。
         """
+        self._ensure_loaded()
+        ach = self._achievements.get(ach_id)
+        if ach is None or ach['status'] != 1:
+            return False, "Achievement not unlocked or already claimed"
+
         try:
-            with db_manager._get_conn() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM achievements WHERE id = ?", (ach_id,))
-                row = cursor.fetchone()
-                # dict factory might not be set if we used _get_conn raw
-                # safe to just map by index if we know schema, or set factory
-                # Let's rely on fetchall from get_all_achievements for UI, here we careful.
-                
-                col_names = [col[0] for col in cursor.description]
-                ach = dict(zip(col_names, row))
-
-                if ach['status'] != 1:
-                    return False, "Achievement not unlocked or already claimed"
-
-                # Grant Reward
-                msg = ""
-                if ach['reward_type'] == 'item':
-                    # Value format: "item_id:count"
-                    parts = ach['reward_value'].split(':')
-                    item_id = parts[0]
-                    count = int(parts[1]) if len(parts) > 1 else 1
-                    cultivator.gain_item(item_id, count)
-                    item_name = cultivator.item_manager.get_item_name(item_id)
-                    msg = f"获得物品: {item_name} x{count}"
-
-                elif ach['reward_type'] == 'title':
-                    title_id = ach['reward_value']
-                    # Just unlock title availability (stored in achievement status=2)
-                    # No extra inventory item needed, just the status change is enough.
-                    eff = TITLE_EFFECTS.get(title_id, {})
-                    title_name = eff.get('name', title_id)
-                    msg = f"解锁称号: {title_name}"
-
-                # Update Status to 2 (Claimed)
-                cursor.execute("UPDATE achievements SET status = 2 WHERE id = ?", (ach_id,))
-                conn.commit()
-                
-                return True, msg
+            # Grant Reward
+            msg = ""
+            if ach['reward_type'] == 'item':
+                # Value format: "item_id:count"
+                parts = ach['reward_value'].split(':')
+                item_id = parts[0]
+                count = int(parts[1]) if len(parts) > 1 else 1
+                cultivator.gain_item(item_id, count)
+                item_name = cultivator.item_manager.get_item_name(item_id)
+                msg = f"获得物品: {item_name} x{count}"
 
+            elif ach['reward_type'] == 'title':
+                title_id = ach['reward_value']
+                # Just unlock title availability (stored in achievement status=2)
+                # No extra inventory item needed, just the status change is enough.
+                eff = TITLE_EFFECTS.get(title_id, {})
+                title_name = eff.get('name', title_id)
+                msg = f"解锁称号: {title_name}"
         except Exception as e:
             logger.error(f"Claim reward failed: {e}")
             return False, f"系统错误: {e}"
 
-    def _evaluate(self, ach, stats, cultivator):
+        # Update Status to 2 (Claimed)
+        ach['status'] = 2
+        self.invalidate_progress()
+
+        def job(conn):
+            conn.execute("UPDATE achievements SET status = 2 WHERE id = ?", (ach_id,))
+
+        def done():
+            logger.info(f"Achievement reward claimed: {ach_id}")
+
+        persistence_worker.submit(job, description=f"claim {ach_id}", after_commit=done)
+        return True, msg
+
+    def _current_value(self, ach, stats, cultivator):
+        """
+        成就条件的当前值 (与 threshold 比较)，无法度量进度时返回 None
+        统计中没有的目标 (如 events_triggered / deaths 等尚未统计的计数) 也返回 None，不显示为 0 进度
+        """
         ctype = ach['condition_type']
         target = ach['condition_target']
-        threshold = ach['threshold']
 
-        val = 0
-        if ctype == 'stat_total':
-            val = stats.get(target, 0)
-        elif ctype == 'stat_max':
-            val = stats.get(target, 0)
+        if ctype in ('stat_total', 'stat_max', 'event_trigger'):
+            return stats.get(target)
         elif ctype == 'currency':
-            val = stats.get('money', 0)
-        elif ctype == 'currency_low':
-            # Special: Money < Threshold AND Total Earned > 1000? 
-            # Simplified: Money < Threshold AND Total Keys > 1000 (as proxy for playtime)
-            curr = stats.get('money', 0)
-            if curr < threshold and stats.get('keyboard', 0) > 1000:
-                return True
-            return False
-        elif ctype == 'event_trigger':
-             if target in stats and stats[target] >= threshold:
-                 return True
+            return stats.get('money', 0)
         elif ctype == 'special':
             if target == 'inventory_fullness':
                 # Threshold is %
                 # Assume bag capacity is 100 slots? logic needed.
                 # Current logic: cultivator.inventory size
                 # Let's say max slots = 50 for now
-                fullness = (len(cultivator.inventory) / 50) * 100
-                val = fullness
+                return (len(cultivator.inventory) / 50) * 100
             elif target == 'weekend_activity_hours':
-                val = stats.get('weekend_hours', 0)
-            elif target == 'afk_hours':
-                # Hard to track specific AFK session max length without new logic
-                # For now use max(active_minutes) inverse?
-                # Placeholder: return False unless implemented
-                return False
-                
-        return val >= threshold
+                return stats.get('weekend_hours')
+        # currency_low (低于阈值才达成) / afk_hours 等尚未实现的条件
+        return None
+
+    def _evaluate(self, ach, stats, cultivator):
+        ctype = ach['condition_type']
+        target = ach['condition_target']
+        threshold = ach['threshold']
 
-    def _unlock(self, connection, ach_id):
+        if ctype == 'currency_low':
+            # Special: Money < Threshold AND Total Earned > 1000? 
+            # Simplified: Money < Threshold AND Total Keys > 1000 (as proxy for playtime)
+            curr = stats.get('money', 0)
+            if curr < threshold and stats.get('keyboard', 0) > 1000:
+                return True
+            return False
+        elif ctype == 'special' and target == 'afk_hours':
+            # Hard to track specific AFK session max length without new logic
+            # For now use max(active_minutes) inverse?
+            # Placeholder: return False unless implemented
+            return False
+
+        val = self._current_value(ach, stats, cultivator)
+        return (val or 0) >= threshold
+
+    def _unlock(self, achs):
+        """批量解锁: 立即更新内存状态，一次提交给持久化线程，单条 executemany 写入"""
+        if not achs:
+            return
         ts = int(time.time())
-        connection.execute("UPDATE achievements SET status = 1, unlocked_at = ? WHERE id = ?", (ts, ach_id))
-        logger.info(f"Achievement Unlocked: {ach_id}")
+        for ach in achs:
+            ach['status'] = 1
+            ach['unlocked_at'] = ts
+        self.invalidate_progress()
+        unlocked = {ach['id'] for ach in achs}
+        for key, bucket in list(self._index.items()):
+            bucket[:] = [a for a in bucket if a['id'] not in unlocked]
+            if not bucket:
+                del self._index[key]
+
+        rows = [(ts, ach['id']) for ach in achs]
+
+        def job(conn):
+            conn.executemany("UPDATE achievements SET status = 1, unlocked_at = ? WHERE id = ?", rows)
+
+        persistence_worker.submit(job, description=f"unlock x{len(rows)}")
+        for ach in achs:
+            logger.info(f"Achievement Unlocked: {ach['id']}")
 
     def _fetch_global_stats(self):
         """
-        Aggregates stats from activity_logs_minute
-        Expensive query!
+        Reads the running totals row (player_stat_totals),
+        累加于每次分钟记录写入，读取开销与历史长度无关
         """
         stats = {}
         try:
             with db_manager._get_conn() as conn:
-                cursor = conn.cursor()
-                
-                # Basic sums
-                cursor.execute("SELECT SUM(keys_count), SUM(mouse_count), COUNT(*) FROM activity_logs_minute")
-                row = cursor.fetchone()
-                stats['keyboard'] = row[0] or 0
-                stats['mouse'] = row[1] or 0
-                stats['uptime_minutes'] = row[2] or 0
+                row = conn.execute("""
+                    SELECT keys_count, mouse_count, active_minutes, max_actions,
+                           key_backspace, key_enter, weekend_minutes
+                    FROM player_stat_totals WHERE id = 1
+                """).fetchone() or (0,) * 7
+                stats['keyboard'] = row[0]
+                stats['mouse'] = row[1]
+                stats['uptime_minutes'] = row[2]
                 stats['uptime_hours'] = stats['uptime_minutes'] / 60
-                
-                # Max APM
-                cursor.execute("SELECT MAX(keys_count + mouse_count) FROM activity_logs_minute")
-                row = cursor.fetchone()
-                stats['apm'] = row[0] or 0
-
-                # Specific Keys (Need 'key_type' column which we DON'T have in simple schema)
-                # We only have total keys. 
-                # !!! Constraint: We cannot track 'Backspace' or 'Enter' specifically with current DB schema.
-                # !!! Workaround: We can't implement 'ach_back_1k' properly without schema change in ActivityLog.
-                # For now, we set them to 0 or mock them.
-                # Let's Mock them as "Not Supported" or simply 0.
-                stats['key_backspace'] = 0
-                stats['key_enter'] = 0
-                
-                # Weekend Hours
-                # SQLite strftime('%w') -> 0=Sunday, 6=Saturday
-                cursor.execute("""
-                    SELECT COUNT(*) FROM activity_logs_minute 
-                    WHERE strftime('%w', timestamp, 'unixepoch', 'localtime') IN ('0', '6')
-                """)
-                row = cursor.fetchone()
-                stats['weekend_hours'] = (row[0] or 0) / 60
+                stats['apm'] = row[3]
+                stats['key_backspace'] = row[4]
+                stats['key_enter'] = row[5]
+                stats['weekend_hours'] = row[6] / 60
                 
         except Exception as e:
             logger.error(f"Global stats fetch error: {e}")
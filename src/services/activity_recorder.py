@@ -1,39 +1,184 @@
 from PyQt6.QtCore import QObject, QTimer
+import glob
+import os
 import time
 from src.logger import logger
 from src.database import db_manager
+from src.config import ACTIVITY_FLUSH_MINUTES
+from src.services.persistence_worker import persistence_worker
+from src.utils.path_helper import get_user_data_dir
+
+# 追加写日志: 尚未落库的分钟记录，每行一条 (逗号分隔的整数)，崩溃后下次启动重放
+# 落库时当前 journal 被封存为 <JOURNAL_FILE>.<序号>，提交成功后由持久化线程删除
+JOURNAL_FILE = os.path.join(get_user_data_dir(), "activity_journal.log")
 
 class ActivityRecorder(QObject):
-    def __init__(self, monitor):
+    def __init__(self, monitor, journal_path=None):
         super().__init__()
         self.monitor = monitor
+        self.journal_path = journal_path or JOURNAL_FILE
         self.timer = QTimer(self)
         self.timer.timeout.connect(self._record_activity)
         # Record every 60 seconds
-        self.interval_ms = 60 * 1000 
-        
+        self.interval_ms = 60 * 1000
+
+        # Write-behind: 分钟记录先进入内存缓冲 + journal，每 N 分钟一次性落库
+        self.flush_interval = ACTIVITY_FLUSH_MINUTES
+        self._buffer = []
+        self._minutes_since_flush = 0
+
+        # 今日鼠标操作计数 (对话条件 min_daily_clicks 使用): 启动时从日汇总读取一次，之后每分钟累加
+        self._today = None
+        self._today_mouse = 0
+
     def start(self):
-        logger.info("启动 ActivityRecorder (每 60 秒记录一次)...")
+        logger.info(f"启动 ActivityRecorder (每 60 秒记录一次，每 {self.flush_interval} 分钟落库)...")
+        self._replay_journal()
+        self._load_today_mouse()
         self.timer.start(self.interval_ms)
-        
+
     def stop(self):
         logger.info("停止 ActivityRecorder...")
         self.timer.stop()
-        # Try to record one last time if there's pending data?
-        # Maybe better not to block exit, or just do a quick check.
-        self._record_activity()
-
-    def _record_activity(self):
-        kb, mouse = self.monitor.pop_accumulated_counts()
-        
-        # If no activity, maybe skip? 
+        # 记录最后不足一分钟的数据，并把缓冲区全部提交给持久化线程
+        self._record_activity(flush=False)
+        self.flush()
+
+    def _record_activity(self, flush=True):
+        kb, mouse, key_categories = self.monitor.pop_accumulated_detail()
+        self._minutes_since_flush += 1
+
+        # If no activity, maybe skip?
         # Plan says: "如果 1 分钟内无操作，则不写入（节省空间）。"
-        if kb == 0 and mouse == 0:
-            return
-            
         timestamp = int(time.time())
+        self._count_mouse(timestamp, mouse)
+        if kb or mouse:
+            row = db_manager.make_activity_row(timestamp, kb, mouse, key_categories)
+            self._buffer.append(row)
+            self._append_journal(row)
+            logger.debug(f"缓冲活动记录: Time={timestamp}, Keys={kb}, Mouse={mouse}")
+
+        if flush and self._minutes_since_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        将缓冲区中的分钟记录交给持久化线程 (单事务写入)，不阻塞 GUI 线程。
+        对应的 journal 段在提交成功后删除；若写入失败则留待下次启动重放。
+        """
+        self._minutes_since_flush = 0
+        if not self._buffer:
+            return
+
+        rows = self._buffer
+        self._buffer = []
+        segment = self._seal_journal()
+
+        def job(conn):
+            db_manager.write_activities(conn, rows)
+
+        def done():
+            logger.info(f"已归档活动记录 {len(rows)} 条")
+            self._remove_file(segment)
+
+        persistence_worker.submit(job, description=f"activity x{len(rows)}", after_commit=done)
+
+    # --- 今日计数 ---
+    def _load_today_mouse(self):
+        self._today = db_manager.local_buckets(int(time.time()))[0]
         try:
-            db_manager.insert_activity(timestamp, kb, mouse)
-            logger.info(f"已归档活动记录: Time={timestamp}, Keys={kb}, Mouse={mouse}")
+            with db_manager._get_conn() as conn:
+                row = conn.execute(
+                    "SELECT mouse_count FROM activity_rollup_day WHERE day = ?", (self._today,)
+                ).fetchone()
+            self._today_mouse = row[0] if row else 0
         except Exception as e:
-            logger.error(f"归档活动记录失败: {e}")
+            logger.warning(f"读取今日活动统计失败: {e}")
+            self._today_mouse = 0
+
+    def _count_mouse(self, timestamp, mouse):
+        day = db_manager.local_buckets(timestamp)[0]
+        if day != self._today:
+            self._today = day
+            self._today_mouse = 0
+        self._today_mouse += mouse
+
+    def today_mouse_count(self):
+        """今日鼠标操作数 (含尚未记录的当前分钟)，不查询数据库"""
+        if self._today != db_manager.local_buckets(int(time.time()))[0]:
+            return self.monitor.peek_accumulated()[1]
+        return self._today_mouse + self.monitor.peek_accumulated()[1]
+
+    # --- Journal ---
+    def _append_journal(self, row):
+        try:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(",".join(str(v) for v in row) + "\n")
+                # 每分钟一行，逐行落盘的开销可以忽略；否则崩溃/断电时缓冲区中的记录仍会丢失
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            logger.warning(f"写入活动 journal 失败: {e}")
+
+    def _seal_journal(self):
+        """将当前 journal 重命名为待提交段，之后的新记录写入新的 journal"""
+        if not os.path.exists(self.journal_path):
+            return None
+        segment = f"{self.journal_path}.{time.time_ns()}"
+        try:
+            os.replace(self.journal_path, segment)
+            return segment
+        except Exception as e:
+            logger.warning(f"封存活动 journal 失败: {e}")
+            return None
+
+    @staticmethod
+    def _remove_file(path):
+        if not path:
+            return
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except Exception as e:
+            logger.warning(f"删除活动 journal 失败: {e}")
+
+    def _replay_journal(self):
+        """
+        启动时重放上次异常退出遗留的 journal (含未提交的封存段)。
+        已存在于数据库中的时间戳会被跳过 (崩溃发生在落库之后、删除之前)。
+        """
+        paths = [p for p in glob.glob(glob.escape(self.journal_path) + "*") if os.path.isfile(p)]
+        if not paths:
+            return
+
+        rows = []
+        row_len = len(db_manager.make_activity_row(0, 0, 0))
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            row = tuple(int(v) for v in line.strip().split(","))
+                        except ValueError:
+                            continue # 崩溃时写了一半的行
+                        if len(row) == row_len:
+                            rows.append(row)
+            except Exception as e:
+                logger.warning(f"读取活动 journal 失败: {e}")
+                return
+
+        if rows:
+            start_ts = min(r[0] for r in rows)
+            end_ts = max(r[0] for r in rows)
+            existing = {r[0] for r in db_manager.get_activities_by_range(start_ts, end_ts)}
+            pending = []
+            for r in rows:
+                if r[0] not in existing:
+                    existing.add(r[0])
+                    pending.append(r)
+            if not db_manager.insert_activities(pending):
+                return
+            logger.info(f"已从 journal 恢复活动记录 {len(pending)} 条 (跳过已存在 {len(rows) - len(pending)} 条)")
+
+        for path in paths:
+            self._remove_file(path)
@@ -0,0 +1,73 @@
+from PyQt6.QtCore import QObject, QTimer
+import time
+from src.logger import logger
+from src.config import AUTOSAVE_DEBOUNCE_SECONDS, AUTOSAVE_MAX_STALENESS_SECONDS
+
+
+class AutoSaveScheduler(QObject):
+    """
+    防抖自动存档
+
+    监听 Cultivator 的脏数据通知: 最后一次变更后静默 debounce 秒再存档，
+    连续变更时距第一次未保存的变更最多 max_staleness 秒也会存档。
+    存档在 GUI 线程上只生成增量快照，写入由持久化线程完成。
+    """
+
+    def __init__(self, cultivator, debounce=AUTOSAVE_DEBOUNCE_SECONDS,
+                 max_staleness=AUTOSAVE_MAX_STALENESS_SECONDS, parent=None):
+        super().__init__(parent)
+        self.cultivator = cultivator
+        self.debounce = debounce
+        self.max_staleness = max_staleness
+
+        self._first_dirty = None  # 第一次未保存变更的时间 (monotonic)
+        self._last_change = 0.0
+        self._running = False
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timer)
+
+        cultivator.add_dirty_listener(self._on_dirty)
+
+    def start(self):
+        logger.info(f"启动自动存档 (静默 {self.debounce}s / 最长 {self.max_staleness}s)")
+        self._running = True
+        # 加载后已有的变更 (如离线收益) 也需要写回
+        if self.cultivator.has_unsaved_changes():
+            self._first_dirty = None
+            self._on_dirty()
+
+    def stop(self):
+        self._running = False
+        self.timer.stop()
+
+    def _on_dirty(self):
+        now = time.monotonic()
+        self._last_change = now
+        if self._first_dirty is None:
+            self._first_dirty = now
+            if self._running:
+                self.timer.start(int(self.debounce * 1000))
+
+    def _on_timer(self):
+        now = time.monotonic()
+        quiet = now - self._last_change
+        stale = now - self._first_dirty
+        if quiet < self.debounce and stale < self.max_staleness:
+            # 仍在连续变更中: 等到静默期结束或达到最长间隔
+            wait = min(self.debounce - quiet, self.max_staleness - stale)
+            self.timer.start(max(1, int(wait * 1000)))
+            return
+        self.save_now()
+
+    def save_now(self):
+        self.timer.stop()
+        first_dirty, self._first_dirty = self._first_dirty, None
+        if not self.cultivator.has_unsaved_changes():
+            return # 期间已被其他路径 (如刷新坊市) 保存
+
+        start = time.perf_counter()
+        self.cultivator.save_data()
+        age = time.monotonic() - first_dirty if first_dirty is not None else 0
+        logger.debug(f"自动存档: 快照 {(time.perf_counter() - start) * 1000:.2f} ms (距首次变更 {age:.0f}s)")
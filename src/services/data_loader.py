@@ -1,202 +1,296 @@
+import hashlib
 import json
-import sqlite3
 import os
+import sqlite3
+import time
+from contextlib import contextmanager
 from src.logger import logger
 from src.utils.path_helper import get_resource_path
-from src.database import DB_FILE
+from src.utils.sqlite_factory import connect_readonly
+
+# 静态数据源: 名称 -> 资源文件 (由 DataLoader._sync_<名称> 写入对应的表)
+STATIC_SOURCES = {
+    "items": "src/data/items.json",
+    "events": "src/data/events.json",
+    "dialogues": "src/data/dialogues.json",
+}
+
+# system_metadata 中记录各数据文件内容哈希的键前缀
+HASH_KEY_PREFIX = "data_hash:"
+
+# 预编译的只读静态数据包 (tools/build_static_pack.py 生成，随程序发布)
+STATIC_PACK_FILE = get_resource_path("src/data/static_data.db")
+STATIC_PACK_FORMAT = "1"
+STATIC_TABLES = ("item_definitions", "recipes", "event_definitions", "dialogue_definitions")
+
 
 class DataLoader:
     """
     负责将静态配置数据 (JSON) 加载到 SQLite 数据库中。
     主要用于初始化或数据迁移。
+
+    每个数据文件的 sha256 记录在 system_metadata 中，启动时只重新导入内容变化的文件对应的表。
+
+    发布版本自带只读的静态数据包 (STATIC_PACK_FILE)，与数据文件一致时直接读取数据包，
+    不再导入用户数据库；数据包缺失或过期 (开发时修改了 JSON) 时回退到导入用户数据库。
+    静态数据的读取方统一使用 DataLoader.static_conn()。
     """
     
-    DATA_VERSION = "006" # 初始版本号，每次修改静态数据(JSON)请递增
+    DATA_VERSION = "006" # 强制全量同步的版本号: 高于数据库中的版本时忽略哈希，重新导入所有数据
+
+    _use_static_pack = None  # None: 尚未检查
+
+    @staticmethod
+    def source_paths():
+        return {name: get_resource_path(rel) for name, rel in STATIC_SOURCES.items()}
+
+    @staticmethod
+    def _version_key(version):
+        # 数字版本按数值比较 ("1000" > "999")，其他按字符串比较
+        return (0, int(version), "") if str(version).isdigit() else (1, 0, str(version))
+
+    @staticmethod
+    def _read_source(path):
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError as e:
+            logger.warning(f"无法读取数据文件: {path} ({e})")
+            return None
+
+    @staticmethod
+    def static_pack_available(path=None):
+        """静态数据包存在、格式匹配且与当前数据文件一致 (结果缓存)"""
+        if path is None and DataLoader._use_static_pack is not None:
+            return DataLoader._use_static_pack
+        path = path or STATIC_PACK_FILE
+
+        available = False
+        if os.path.exists(path):
+            try:
+                conn = connect_readonly(path)
+                try:
+                    meta = dict(conn.execute("SELECT key, value FROM system_metadata").fetchall())
+                finally:
+                    conn.close()
+
+                stale = [name for name, src in DataLoader.source_paths().items()
+                         if os.path.exists(src)
+                         and meta.get(HASH_KEY_PREFIX + name) != hashlib.sha256(DataLoader._read_source(src) or b"").hexdigest()]
+                if meta.get("pack_format") != STATIC_PACK_FORMAT:
+                    logger.warning(f"静态数据包格式不匹配，使用用户数据库中的静态数据: {path}")
+                elif stale:
+                    logger.warning(f"静态数据包已过期 ({', '.join(stale)})，使用用户数据库中的静态数据 "
+                                   f"(可运行 tools/build_static_pack.py 重新生成)")
+                else:
+                    available = True
+            except sqlite3.Error as e:
+                logger.warning(f"静态数据包无法读取: {path} ({e})")
+
+        if path == STATIC_PACK_FILE:
+            DataLoader._use_static_pack = available
+        return available
+
+    @staticmethod
+    @contextmanager
+    def static_conn():
+        """
+        读取静态数据表 (item_definitions / recipes / event_definitions / dialogue_definitions) 的连接:
+        静态数据包可用时为只读的数据包连接，否则为用户数据库连接。
+        """
+        if DataLoader.static_pack_available():
+            conn = connect_readonly(STATIC_PACK_FILE)
+            try:
+                yield conn
+            finally:
+                conn.close()
+        else:
+            from src.database import db_manager
+            with db_manager._get_conn() as conn:
+                yield conn
+
+    @staticmethod
+    def _clear_user_static_data(conn):
+        """静态数据包可用时，删除之前导入用户数据库的静态数据副本 (缩小存档)"""
+        if not conn.execute("SELECT 1 FROM system_metadata WHERE key LIKE ? LIMIT 1",
+                            (HASH_KEY_PREFIX + "%",)).fetchone():
+            return
+        for table in STATIC_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("DELETE FROM system_metadata WHERE key LIKE ?", (HASH_KEY_PREFIX + "%",))
+        logger.info("静态数据包可用，已清理用户数据库中的静态数据副本")
 
     @staticmethod
     def check_data_update():
         """
-        检查代码中的数据版本号是否高于数据库中的版本号。
-        如果是，则强制执行 load_initial_data 更新静态数据。
+        比较数据文件哈希与数据库记录，只同步变化的数据文件。
+        如果代码中的数据版本号高于数据库中的版本号，则强制全量同步。
+        静态数据包可用时跳过同步。
         """
+        from src.database import db_manager
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            
-            # Get current DB version
-            cursor.execute("SELECT value FROM system_metadata WHERE key = 'data_version'")
-            row = cursor.fetchone()
-            db_version = row[0] if row else "000"
-            
-            logger.info(f"数据版本检查: Code={DataLoader.DATA_VERSION}, DB={db_version}")
-            
-            if DataLoader.DATA_VERSION > db_version:
-                logger.info("检测到数据更新，正在同步静态数据...")
-                if DataLoader.load_initial_data():
+            with db_manager._get_conn() as conn:
+                if DataLoader.static_pack_available():
+                    logger.info(f"使用静态数据包: {STATIC_PACK_FILE}")
+                    DataLoader._clear_user_static_data(conn)
+                    return
+
+                cursor = conn.cursor()
+                
+                # Get current DB version
+                cursor.execute("SELECT value FROM system_metadata WHERE key = 'data_version'")
+                row = cursor.fetchone()
+                db_version = row[0] if row else "000"
+                force = DataLoader._version_key(DataLoader.DATA_VERSION) > DataLoader._version_key(db_version)
+                
+                logger.info(f"数据版本检查: Code={DataLoader.DATA_VERSION}, DB={db_version}")
+                
+                synced = DataLoader.sync(conn, DataLoader.source_paths(), force=force)
+                if force:
                     # Update version in DB
                     cursor.execute("INSERT OR REPLACE INTO system_metadata (key, value) VALUES ('data_version', ?)", (DataLoader.DATA_VERSION,))
-                    conn.commit()
                     logger.info(f"数据更新完成，版本号更新为 {DataLoader.DATA_VERSION}")
-            else:
-                logger.debug("数据已是最新，跳过更新。")
-                
-            conn.close()
+                if not synced:
+                    logger.debug("数据已是最新，跳过更新。")
         except Exception as e:
             logger.error(f"版本检查失败: {e}")
 
     @staticmethod
     def load_initial_data():
         """
-        从资源文件加载所有初始数据 (Items, Recipes, Events) 并写入数据库。
+        从资源文件加载所有初始数据 (Items, Recipes, Events, Dialogues) 并写入数据库。
+        之后静态数据改为从用户数据库读取 (不再使用静态数据包)。
         """
         logger.info("开始加载数据库数据...")
-        
-        # 1. 获取资源路径
-        # 注意: get_resource_path 会处理打包后的路径映射
-        items_v1_path = get_resource_path("src/data/items.json")
-        # items_v2_path = get_resource_path("src/data/items_v2.json")
-        events_path = get_resource_path("src/data/events.json")
-        dialogues_path = get_resource_path("src/data/dialogues.json")
-        achievements_path = get_resource_path("src/data/achievements.json") # 如果有
-
-        # 2. 加载 JSON
-        v1_items = DataLoader.load_json(items_v1_path)
-        # v2_items = DataLoader.load_json(items_v2_path) # Merged
-
-        events_data = DataLoader.load_json(events_path)
-        dialogues_data = DataLoader.load_json(dialogues_path)
-        
-        # 3. 处理物品数据合并
-        combined_items = {}
-        
-        def process_tier_data(tier_data):
-            if not tier_data: return
-            for category in ["materials", "pills", "equipments", "books"]:
-                if category in tier_data:
-                    for item in tier_data[category]:
-                        item_id = item.get("id")
-                        if not item_id: continue
-                        
-                        effect_val = json.dumps(item.get("effect", {})) if isinstance(item.get("effect"), dict) else item.get("effect", "{}")
-                        recipe_val = json.dumps(item.get("recipe", {})) if isinstance(item.get("recipe"), dict) else item.get("recipe", "{}")
-                        
-                        combined_items[item_id] = {
-                            "id": item_id,
-                            "name": item.get("name"),
-                            "type": item.get("type"),
-                            "tier": item.get("tier"),
-                            "price": item.get("price"),
-                            "description": item.get("desc"),
-                            "effect": effect_val,
-                            "recipe": recipe_val
-                        }
-
-        # v1 first (base), then v2 (override)
-        for data in v1_items.values(): process_tier_data(data)
-        # for data in v2_items.values(): process_tier_data(data)
-        
-        logger.info(f"解析到 {len(combined_items)} 个物品定义")
-
-        # 4. 写入数据库
+        from src.database import db_manager
         try:
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            
-            # --- Items ---
-            # 清空旧数据? 既然是初始化，通常是空的，但为了安全可以用 INSERT OR REPLACE
-            # 或者先 DELETE ALL
-            # 这里我们假设是初始化，使用 REPLACE
-            
-            # (Re)Create Table just in case, though database.py does this.
-            # We rely on existing schema.
-            
-            count_items = 0
-            for item in combined_items.values():
-                cursor.execute("""
-                    INSERT OR REPLACE INTO item_definitions (id, name, type, tier, description, price, effect_json)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (item["id"], item["name"], item["type"], item["tier"], item["description"], item["price"], item["effect"]))
-                count_items += 1
-                
-            # --- Recipes ---
-            # Clear old recipes to avoid duplicates if re-running
-            cursor.execute("DELETE FROM recipes") 
-            count_recipes = 0
-            for item in combined_items.values():
-                recipe_str = item["recipe"]
-                if recipe_str and recipe_str != "{}":
-                    # Parse to check validity?
-                    cursor.execute("""
-                        INSERT INTO recipes (result_item_id, ingredients_json, craft_time, success_rate)
-                        VALUES (?, ?, ?, ?)
-                    """, (item["id"], recipe_str, 5, 1.0))
-                    count_recipes += 1
-
-            # --- Events ---
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS event_definitions (
-                    id TEXT PRIMARY KEY,
-                    type TEXT,
-                    weight INTEGER,
-                    data_json TEXT
-                )
-            """)
-            cursor.execute("DELETE FROM event_definitions")
-            
-            count_events = 0
-            if isinstance(events_data, list):
-                for event in events_data:
-                    evt_id = event.get("id")
-                    evt_type = event.get("type", "random")
-                    evt_weight = event.get("weight", 10)
-                    evt_json = json.dumps(event)
-                    
-                    cursor.execute("""
-                        INSERT INTO event_definitions (id, type, weight, data_json)
-                        VALUES (?, ?, ?, ?)
-                    """, (evt_id, evt_type, evt_weight, evt_json))
-                    count_events += 1
-
-
-            # --- Dialogues ---
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS dialogue_definitions (
-                    id TEXT PRIMARY KEY,
-                    text TEXT,
-                    type TEXT,
-                    conditions_json TEXT,
-                    weight INTEGER
-                )
-            """)
-            
-            count_dialogues = 0
-            if isinstance(dialogues_data, list):
-                for dia in dialogues_data:
-                    did = dia.get("id")
-                    dtext = dia.get("text")
-                    dtype = dia.get("type")
-                    dweight = dia.get("weight", 10)
-                    dcond = json.dumps(dia.get("conditions", {}))
-                    
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO dialogue_definitions (id, text, type, conditions_json, weight)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (did, dtext, dtype, dcond, dweight))
-                    count_dialogues += 1
-            
-            # Set initial version if not present
-            cursor.execute("INSERT OR IGNORE INTO system_metadata (key, value) VALUES ('data_version', ?)", (DataLoader.DATA_VERSION,))
-
-            conn.commit()
-            conn.close()
-            
-            logger.info(f"数据库数据加载完成: Items={count_items}, Recipes={count_recipes}, Events={count_events}, Dialogues={count_dialogues}")
+            with db_manager._get_conn() as conn:
+                DataLoader.sync(conn, DataLoader.source_paths(), force=True)
+                # Set initial version if not present
+                conn.execute("INSERT OR IGNORE INTO system_metadata (key, value) VALUES ('data_version', ?)", (DataLoader.DATA_VERSION,))
+            DataLoader._use_static_pack = False
+            from src.services.static_cache import static_cache
+            static_cache.invalidate()
             return True
             
         except Exception as e:
             logger.error(f"数据库数据加载失败: {e}")
             return False
 
+    @staticmethod
+    def sync(conn, paths, force=False):
+        """
+        在当前事务中同步静态数据 (不提交)。
+        :param paths: {数据源名称: 文件路径}
+        :param force: 忽略已记录的哈希，全部重新导入
+        :return: 重新导入的数据源名称列表
+        """
+        start = time.perf_counter()
+        stored = dict(conn.execute(
+            "SELECT key, value FROM system_metadata WHERE key LIKE ?", (HASH_KEY_PREFIX + "%",)
+        ).fetchall())
+
+        synced = []
+        for name, path in paths.items():
+            raw = DataLoader._read_source(path)
+            if raw is None:
+                continue
+
+            digest = hashlib.sha256(raw).hexdigest()
+            if not force and stored.get(HASH_KEY_PREFIX + name) == digest:
+                continue
+
+            counts = getattr(DataLoader, f"_sync_{name}")(conn, json.loads(raw.decode('utf-8')))
+            conn.execute(
+                "INSERT OR REPLACE INTO system_metadata (key, value) VALUES (?, ?)",
+                (HASH_KEY_PREFIX + name, digest)
+            )
+            synced.append(name)
+            logger.info(f"静态数据同步 [{name}]: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+
+        if synced:
+            from src.services.static_cache import static_cache
+            static_cache.invalidate()
+            logger.info(f"静态数据同步完成: {', '.join(synced)} ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        return synced
+
+    @staticmethod
+    def parse_items(items_data):
+        """将分阶数据 {tier_X: {materials: [...], ...}} 展开为 {item_id: 物品行}"""
+        combined_items = {}
+        if not isinstance(items_data, dict):
+            return combined_items
+
+        for tier_data in items_data.values():
+            if not tier_data: continue
+            for category in ["materials", "pills", "equipments", "books"]:
+                for item in tier_data.get(category, []):
+                    item_id = item.get("id")
+                    if not item_id: continue
+                    
+                    effect_val = json.dumps(item.get("effect", {})) if isinstance(item.get("effect"), dict) else item.get("effect", "{}")
+                    recipe_val = json.dumps(item.get("recipe", {})) if isinstance(item.get("recipe"), dict) else item.get("recipe", "{}")
+                    
+                    combined_items[item_id] = {
+                        "id": item_id,
+                        "name": item.get("name"),
+                        "type": item.get("type"),
+                        "tier": item.get("tier"),
+                        "price": item.get("price"),
+                        "description": item.get("desc"),
+                        "effect": effect_val,
+                        "recipe": recipe_val
+                    }
+        return combined_items
+
+    @staticmethod
+    def _sync_items(conn, items_data):
+        combined_items = DataLoader.parse_items(items_data)
+
+        # --- Items --- (REPLACE: 已删除的物品定义保留，背包中的旧物品仍可显示)
+        conn.executemany("""
+            INSERT OR REPLACE INTO item_definitions (id, name, type, tier, description, price, effect_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(item["id"], item["name"], item["type"], item["tier"], item["description"], item["price"], item["effect"])
+              for item in combined_items.values()])
+
+        # --- Recipes --- 整表重建
+        recipes = [(item["id"], item["recipe"], 5, 1.0)
+                   for item in combined_items.values() if item["recipe"] and item["recipe"] != "{}"]
+        conn.execute("DELETE FROM recipes")
+        conn.executemany("""
+            INSERT INTO recipes (result_item_id, ingredients_json, craft_time, success_rate)
+            VALUES (?, ?, ?, ?)
+        """, recipes)
+        return {"Items": len(combined_items), "Recipes": len(recipes)}
+
+    @staticmethod
+    def _sync_events(conn, events_data):
+        # 表结构由模型定义 (create_all) 与 schema_migration 负责
+        rows = []
+        if isinstance(events_data, list):
+            rows = [(event.get("id"), event.get("type", "random"), event.get("weight", 10), json.dumps(event))
+                    for event in events_data]
+        conn.execute("DELETE FROM event_definitions")
+        conn.executemany("""
+            INSERT INTO event_definitions (id, type, weight, data_json)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+        return {"Events": len(rows)}
+
+    @staticmethod
+    def _sync_dialogues(conn, dialogues_data):
+        rows = []
+        if isinstance(dialogues_data, list):
+            rows = [(dia.get("id"), dia.get("text"), dia.get("type"),
+                     json.dumps(dia.get("conditions", {})), dia.get("weight", 10))
+                    for dia in dialogues_data]
+        conn.executemany("""
+            INSERT OR REPLACE INTO dialogue_definitions (id, text, type, conditions_json, weight)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        return {"Dialogues": len(rows)}
+
     @staticmethod
     def load_json(filepath):
         try:
@@ -205,3 +299,4 @@ class DataLoader:
         except Exception as e:
             logger.warning(f"无法读取数据文件: {filepath} ({e})")
             return {}
+
@@ -1,7 +1,25 @@
 import random
 import json
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
 from src.logger import logger
 
+
+class DialoguePool:
+    """某个玩家上下文下可用的对话，预计算累积权重，抽取时二分查找"""
+    __slots__ = ("texts", "cumulative", "total")
+
+    def __init__(self, dialogues):
+        self.texts = [d["text"] for d in dialogues]
+        self.cumulative = list(accumulate(d["weight"] for d in dialogues))
+        self.total = self.cumulative[-1] if self.cumulative else 0
+
+    def draw(self):
+        if not self.texts:
+            return "..."
+        i = bisect_left(self.cumulative, random.uniform(0, self.total))
+        return self.texts[min(i, len(self.texts) - 1)]
+
 class DialogueManager:
     _instance = None
     
@@ -16,34 +34,39 @@ class DialogueManager:
             return
             
         self.dialogues = []
+        self._pools = {}
+        self._mind_thresholds = []
+        self._click_thresholds = []
         self.reload()
         self.initialized = True
 
     def reload(self):
-        from src.database import db_manager
-        from src.models.static_data import DialogueDefinition
-        from sqlmodel import select
+        from src.services.data_loader import DataLoader
+        from src.services.static_cache import static_cache
         
         try:
-            with db_manager.get_session() as session:
-                rows = session.exec(select(DialogueDefinition)).all()
+            self.dialogues = static_cache.get("dialogues")
+            if self.dialogues is None:
+                with DataLoader.static_conn() as conn:
+                    rows = conn.execute("SELECT id, text, type, conditions_json, weight FROM dialogue_definitions").fetchall()
                 self.dialogues = []
-                for row in rows:
+                for did, text, dtype, conditions_json, weight in rows:
                     cond = {}
-                    if row.conditions_json:
+                    if conditions_json:
                         try:
-                            cond = json.loads(row.conditions_json)
+                            cond = json.loads(conditions_json)
                         except:
                             pass
                             
                     d = {
-                        "id": row.id,
-                        "text": row.text,
-                        "type": row.type,
+                        "id": did,
+                        "text": text,
+                        "type": dtype,
                         "conditions": cond,
-                        "weight": row.weight
+                        "weight": weight
                     }
                     self.dialogues.append(d)
+                static_cache.put("dialogues", self.dialogues)
             logger.info(f"DialogueManager loaded {len(self.dialogues)} dialogues.")
             
             # --- Inject Cheat Hints (Plan: Leaking Secrets) ---
@@ -68,78 +91,51 @@ class DialogueManager:
             # --------------------------------------------------
         except Exception as e:
             logger.error(f"DialogueManager load failed: {e}")
+        self.invalidate()
+
+    def invalidate(self):
+        """对话列表变化后调用: 重新收集阈值并清空候选池缓存"""
+        conds = [d["conditions"] for d in self.dialogues]
+        self._mind_thresholds = sorted({c["min_mind"] for c in conds if "min_mind" in c})
+        self._click_thresholds = sorted({c["min_daily_clicks"] for c in conds if "min_daily_clicks" in c})
+        self._pools = {}
 
-    def get_random_dialogue(self, cultivator):
+    def get_random_dialogue(self, cultivator, daily_clicks=0):
         """
         Get a random dialogue based on cultivator state.
+        候选池按 (境界, 心魔档位, 状态, 今日点击档位) 缓存，档位由所有对话的阈值划分，
+        同一档位内条件结果相同，因此点击时只需一次二分抽取。
         :param cultivator: Cultivator instance
+        :param daily_clicks: 今日鼠标操作数 (min_daily_clicks 条件)
         :return: str dialogue text
         """
-        candidates = []
-        total_weight = 0
-        
-        # State Context
         layer = getattr(cultivator, 'layer_index', 0)
         mind = getattr(cultivator, 'mind', 0)
-        # We assume cultivator might have daily_clicks if we patch it, or we rely on 'state' string
-        # To handle daily clicks, we'd need to fetch it. 
-        # For now, let's skip 'clicks' condition if we can't access it easily, OR 
-        # we try to access `cultivator.daily_clicks` if meaningful.
-        # Check if `cultivator.history_context` exists (Plan...?)
-        # Let's support 'click' ONLY if passed in context, otherwise 0.
-        # But `cultivator` parameter is likely just `self`.
-        
-        # We can scan conditions to see if they need clicks.
-        pass_clicks = 0 
-        # If we want to support click dialogues, we need to pass it.
-        # Let's assume we update Cultivator to have a property `current_daily_stats`.
-        # Taking a shortcut: ignore clicks for now or mock it if unavailable.
-        # Actually I can read `sys.modules['src.services.input_monitor']`? NO.
-        # Clean way: `get_random_dialogue(cultivator, context={})`
-        
+        # Cultivator 在事件检查时记录当前状态 (update 每 event_interval 次更新一次)
+        state = getattr(cultivator, 'current_state_name', 'IDLE')
+
+        # 档位 i 表示已达到前 i 个阈值
+        mind_band = bisect_right(self._mind_thresholds, mind)
+        click_band = bisect_right(self._click_thresholds, daily_clicks)
+        key = (layer, mind_band, state, click_band)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = self._build_pool(layer, mind_band, state, click_band)
+        return pool.draw()
+
+    def _build_pool(self, layer, mind_band, state, click_band):
+        # 以档位下界作为代表值判断条件 (同一档位内结果相同)
+        mind = self._mind_thresholds[mind_band - 1] if mind_band else float("-inf")
+        clicks = self._click_thresholds[click_band - 1] if click_band else float("-inf")
+        candidates = []
         for d in self.dialogues:
             cond = d["conditions"]
-            
-            # Layer Check
             if "min_layer" in cond and layer < cond["min_layer"]: continue
             if "max_layer" in cond and layer > cond["max_layer"]: continue
-            
-            # Mind Check
             if "min_mind" in cond and mind < cond["min_mind"]: continue
-            
-            # State Check (IDLE, WORK, COMBAT) -- Cultivator doesn't store current state as a field?
-            # `Cultivator.update` returns state. But `get_random_dialogue` is called on click.
-            # We don't strictly know state on click event unless tracked.
-            # `InputMonitor` knows APM but not 'state code'.
-            # However `Cultivator` holds `last_state_code` (maybe).
-            # Plan 1 completed: State Machine. Let's check `Cultivator` if it has state.
-            # Looking at `cultivator.py`... it returns state in `update`.
-            # Let's add `self.current_state_name` to `Cultivator`.
-            if "required_state" in cond:
-                curr_state = getattr(cultivator, 'current_state_name', 'IDLE')
-                if curr_state != cond["required_state"]: continue
-                
-            # Clicks Check
-            if "min_daily_clicks" in cond:
-                # Need external info. If not provided, skip this dialogue to be safe?
-                # Or try to fetch from DB?
-                # Let's skip for now unless I update Cultivator to cache it.
-                continue 
-
-            w = d["weight"]
-            candidates.append((w, d))
-            total_weight += w
-            
-        if not candidates:
-            return "..."
-            
-        r = random.uniform(0, total_weight)
-        upto = 0
-        for w, d in candidates:
-            if r <= upto + w:
-                return d["text"]
-            upto += w
-            
-        return candidates[0][1]["text"]
+            if "required_state" in cond and state != cond["required_state"]: continue
+            if "min_daily_clicks" in cond and clicks < cond["min_daily_clicks"]: continue
+            candidates.append(d)
+        return DialoguePool(candidates)
 
 dialogue_manager = DialogueManager()
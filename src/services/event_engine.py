@@ -1,9 +1,162 @@
 import sqlite3
 import json
+import math
 import random
 import time
+from bisect import bisect_left
+from itertools import accumulate
 from src.logger import logger
 
+
+class EventRecord:
+    """
+    加载时归一化的事件: 条件取值已解析 (顶层字段优先，其次 conditions，再次默认值)。
+    event 为原始事件 dict (check_triggers 返回、trigger_event 使用)。
+    """
+    __slots__ = ("event", "id", "weight", "unique", "min_layer", "max_layer",
+                 "min_money", "min_mind", "required_state", "program")
+
+    def __init__(self, evt, program=None):
+        cond = evt.get("conditions") or {}
+        numbers = program.conditions if program is not None else _event_conditions(evt, f"事件 {evt.get('id')}")
+        self.event = evt
+        self.program = program
+        self.id = evt.get("id")
+        self.weight = numbers["weight"]
+        self.unique = bool(evt.get("unique", False))
+        self.min_layer = numbers["min_layer"]
+        self.max_layer = numbers["max_layer"]
+        self.min_money = numbers["min_money"]
+        self.min_mind = numbers["min_mind"]
+        self.required_state = evt.get("required_state", cond.get("required_state", None))
+
+    @property
+    def is_dynamic(self):
+        """是否有需要在触发时判断的条件 (灵石、心魔、唯一性)"""
+        return self.unique or self.min_money > 0 or self.min_mind > 0
+
+
+class EventBucket:
+    """
+    某个 (境界, 状态) 下境界/状态条件满足的事件。
+    无动态条件的事件预先计算累积权重，抽取时二分查找；
+    有动态条件的事件 (通常很少) 每次过滤。
+    """
+    __slots__ = ("static", "cumulative", "static_total", "dynamic")
+
+    def __init__(self, records):
+        self.static = [r for r in records if not r.is_dynamic]
+        self.cumulative = list(accumulate(r.weight for r in self.static))
+        self.static_total = self.cumulative[-1] if self.cumulative else 0
+        self.dynamic = [r for r in records if r.is_dynamic]
+
+
+# 数值效果 -> 日志中的名称
+STAT_EFFECTS = {"exp": "修为", "money": "灵石", "mind": "心魔", "body": "体魄", "affection": "气运"}
+
+
+class EffectProgram:
+    """编译后的效果: 按数据中键的顺序执行的步骤，每步为 step(cultivator, logs)"""
+    __slots__ = ("steps", "text")
+
+    def __init__(self, steps=(), text=None):
+        self.steps = tuple(steps)
+        self.text = text
+
+    def run(self, cultivator, logs):
+        for step in self.steps:
+            step(cultivator, logs)
+
+
+class ChoiceProgram:
+    __slots__ = ("text", "success_chance", "success", "fail")
+
+    def __init__(self, text, success_chance, success, fail):
+        self.text = text
+        self.success_chance = success_chance
+        self.success = success
+        self.fail = fail
+
+
+class EventProgram:
+    """
+    一个事件编译后的执行程序 (加载时生成一次)。
+    取值形状、物品名称等在编译时确定，触发时只剩随机数与对 cultivator 的调用。
+    """
+    __slots__ = ("effects", "choices", "record_history", "conditions")
+
+    def __init__(self, effects, choices, record_history, conditions=None):
+        self.effects = effects
+        self.choices = choices
+        self.record_history = record_history
+        self.conditions = conditions  # 归一化后的权重与数值条件 (见 _event_conditions)
+
+    def run(self, cultivator):
+        logs = []
+        if self.effects is not None:
+            self.effects.run(cultivator, logs)
+
+        # Choices: Auto-resolve for now (Pick Random Choice)
+        # TODO: Implement UI for choices
+        if self.choices:
+            choice = random.choice(self.choices)
+            logs.append(f"[自动选择] {choice.text}")
+            branch = choice.success if random.random() < choice.success_chance else choice.fail
+            logs.append(branch.text)
+            branch.run(cultivator, logs)
+        return logs
+
+
+def _compile_value(key, v):
+    """单个数值编译为常量 int，[min, max] 编译为 (min, max) 元组 (触发时 randint)"""
+    if isinstance(v, list) and len(v) == 2 and all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in v):
+        lo, hi = int(v[0]), int(v[1])
+        if lo > hi:
+            raise ValueError(f"{key}: 范围 {v} 下限大于上限")
+        return (lo, hi)
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return int(v)
+    raise ValueError(f"{key}: 无效的取值 {v!r} (应为数值或 [min, max])")
+
+
+# 事件的数值条件及默认值 (顶层字段优先，其次 conditions；weight 只取顶层)
+EVENT_CONDITION_DEFAULTS = {"weight": 10, "min_layer": 0, "max_layer": 99, "min_money": 0, "min_mind": 0}
+
+
+def _event_conditions(evt, where):
+    """权重与数值条件转换为数值 (兼容 "10" 这类字符串)，无效时抛出 ValueError"""
+    cond = evt.get("conditions") or {}
+    if not isinstance(cond, dict):
+        raise ValueError(f"{where}: conditions 应为对象，实际为 {type(cond).__name__}")
+    numbers = {}
+    for name, default in EVENT_CONDITION_DEFAULTS.items():
+        v = evt.get(name, default if name == "weight" else cond.get(name, default))
+        if isinstance(v, bool):
+            raise ValueError(f"{where}: {name} 无效: {v!r}")
+        try:
+            num = float(v)
+        except (TypeError, ValueError):
+            raise ValueError(f"{where}: {name} 无效: {v!r}") from None
+        if not math.isfinite(num):
+            raise ValueError(f"{where}: {name} 无效: {v!r}")
+        numbers[name] = int(num) if num.is_integer() else num
+    if numbers["weight"] < 0:
+        raise ValueError(f"{where}: weight 不能为负数: {numbers['weight']}")
+    return numbers
+
+
+def _signed(val):
+    return f"{'+' if val > 0 else ''}{val}"
+
+
+def _gain_exp(c, val):
+    c.gain_exp(val)
+
+
+def _add_money(c, val):
+    c.money = max(0, c.money + val)
+
+
 class EventEngine:
     def __init__(self, db_path, item_manager):
         self.db_path = db_path
@@ -13,25 +166,54 @@ class EventEngine:
         
         self.reload()
 
+    @property
+    def events(self):
+        return self._events
+
+    @events.setter
+    def events(self, events):
+        """替换事件列表时重新归一化并编译效果，清空分桶缓存。数据无效的事件不参与触发"""
+        self._events = events
+        self._records = []
+        for evt in events:
+            try:
+                self._records.append(EventRecord(evt, self._compile_event(evt)))
+            except ValueError as e:
+                logger.warning(f"事件数据无效，已跳过: {e}")
+        self._records_by_id = {r.id: r for r in self._records}
+        self._buckets = {}
+
+    def _bucket(self, layer, state):
+        key = (layer, state)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = EventBucket([
+                r for r in self._records
+                if r.min_layer <= layer <= r.max_layer
+                and (not r.required_state or r.required_state == state)
+            ])
+        return bucket
+
     def reload(self):
         """Load events form event_definitions table"""
         from src.database import db_manager
-        from src.models import EventDefinition, EventHistory
-        from sqlmodel import select
+        from src.services.data_loader import DataLoader
+        from src.services.static_cache import static_cache
         
         try:
-            with db_manager.get_session() as session:
-                evts = session.exec(select(EventDefinition)).all()
-                self.events = []
-                for e in evts:
-                    if e.data_json:
-                        self.events.append(json.loads(e.data_json))
-                
-                # Load History
-                hist = session.exec(select(EventHistory)).all()
-                self.history = {h.event_id for h in hist}
+            events = static_cache.get("events")
+            if events is None:
+                with DataLoader.static_conn() as conn:
+                    rows = conn.execute("SELECT data_json FROM event_definitions").fetchall()
+                events = [json.loads(data_json) for (data_json,) in rows if data_json]
+                static_cache.put("events", events)
+            self.events = events
+
+            # Load History (原生 SQL: 启动时避免 ORM 语句编译开销)
+            with db_manager._get_conn() as conn:
+                self.history = {event_id for (event_id,) in conn.execute("SELECT event_id FROM event_history")}
             
-            logger.info(f"EventEngine loaded {len(self.events)} events from DB (SQLModel).")
+            logger.info(f"EventEngine loaded {len(self.events)} events.")
         except Exception as e:
             logger.error(f"EventEngine load error: {e}")
 
@@ -40,90 +222,51 @@ class EventEngine:
         Return an event if conditions met.
         Uses weight-based random selection among valid events.
         """
-        possible_events = []
-        total_weight = 0
-        
         # Safe attribute access
         layer = getattr(cultivator, 'layer_index', 0)
         mind = getattr(cultivator, 'mind', 0)
         money = getattr(cultivator, 'money', 0)
         
-        for evt in self.events:
-            # 1. Unique Check
-            if evt.get("unique", False) and evt["id"] in self.history:
-                continue
-                
-            cond = evt.get("conditions", {})
-            
-            # 2. Condition Checks
-            min_layer = evt.get("min_layer", cond.get("min_layer", 0))
-            max_layer = evt.get("max_layer", cond.get("max_layer", 99))
-            min_money = evt.get("min_money", cond.get("min_money", 0))
-            min_mind = evt.get("min_mind", cond.get("min_mind", 0))
-            
-            # State condition (optional)
-            req_state = evt.get("required_state", cond.get("required_state", None))
-            if req_state and req_state != current_state_name:
-                continue
-
-            if layer < min_layer: continue
-            if layer > max_layer: continue
-            if money < min_money: continue
-            if mind < min_mind: continue
-            
-            # 3. Add to pool
-            w = evt.get("weight", 10)
-            possible_events.append((w, evt))
-            total_weight += w
-            
-        if not possible_events:
+        bucket = self._bucket(layer, current_state_name)
+        
+        # 动态条件: 唯一性 / 灵石 / 心魔
+        dynamic = [
+            r for r in bucket.dynamic
+            if not (r.unique and r.id in self.history)
+            and money >= r.min_money and mind >= r.min_mind
+        ]
+        if not bucket.static and not dynamic:
             return None
             
-        # Weighted Random Pick
+        # Weighted Random Pick: 先落在静态部分 (二分)，否则在动态部分线性查找
+        total_weight = bucket.static_total + sum(r.weight for r in dynamic)
         r = random.uniform(0, total_weight)
-        upto = 0
-        for w, evt in possible_events:
-            if r <= upto + w:
-                return evt
-            upto += w
+        if bucket.static and (r <= bucket.static_total or not dynamic):
+            i = bisect_left(bucket.cumulative, r)
+            return bucket.static[min(i, len(bucket.static) - 1)].event
+        
+        upto = bucket.static_total
+        for rec in dynamic:
+            if r <= upto + rec.weight:
+                return rec.event
+            upto += rec.weight
             
-        return possible_events[0][1]
+        return dynamic[-1].event
 
     def trigger_event(self, event, cultivator):
         """
         Execute event effects.
         Support 'effects' dict and simpler 'choices' (auto-pick for now).
+        效果在加载时已编译；不在当前事件列表中的事件 (如工具脚本构造的) 临时编译。
         """
         logger.info(f"Triggering event: {event.get('text', 'Unknown')} ({event['id']})")
-        
-        results_text = []
-        
-        # 1. Handle Direct Effects
-        if "effects" in event:
-            results_text.extend(self._apply_effects(event["effects"], cultivator))
-            
-        # 2. Handle Choices (Auto-resolve for now: Pick Random Choice)
-        # TODO: Implement UI for choices
-        if "choices" in event and event["choices"]:
-            choice = random.choice(event["choices"])
-            results_text.append(f"[自动选择] {choice['text']}")
-            
-            # Resolve choice result
-            res = choice.get("result", {})
-            # Chance check
-            success_rate = res.get("success_chance", 1.0)
-            
-            if random.random() < success_rate:
-                eff = res.get("success_effect", {})
-                results_text.append(eff.get("text", "成功!"))
-                results_text.extend(self._apply_effects(eff, cultivator))
-            else:
-                eff = res.get("fail_effect", {})
-                results_text.append(eff.get("text", "失败!"))
-                results_text.extend(self._apply_effects(eff, cultivator))
-                
-        # 3. Record History if Unique
-        if event.get("unique", False) or event.get("is_unique", False):
+
+        rec = self._records_by_id.get(event["id"])
+        program = rec.program if rec is not None and rec.event is event else self._compile_event(event)
+        results_text = program.run(cultivator)
+
+        # Record History if Unique
+        if program.record_history:
             self._record_history(event["id"])
             self.history.add(event["id"])
 
@@ -131,70 +274,126 @@ class EventEngine:
 
     def _apply_effects(self, effects, cultivator):
         """
-        Apply a dict of effects { 'exp': [10, 20], 'item': {'id': x, 'count': 1} }
+        Apply a dict of effects { 'exp': [10, 20], 'items': {'id': count} }
         """
         logs = []
+        self._compile_effects(effects, "effects").run(cultivator, logs)
+        return logs
+
+    # --- 编译 (加载时) ---
+    def _compile_event(self, evt):
+        """编译事件的效果与选项，数据错误抛出 ValueError"""
+        where = f"事件 {evt.get('id')}"
+        effects = None
+        if "effects" in evt:
+            effects = self._compile_effects(evt["effects"], where)
+
+        choices = []
+        for i, choice in enumerate(evt.get("choices") or []):
+            if not isinstance(choice, dict) or "text" not in choice:
+                raise ValueError(f"{where}: 选项 {i} 缺少 text")
+            res = choice.get("result", {})
+            if not isinstance(res, dict):
+                raise ValueError(f"{where}: 选项 {i} 的 result 应为对象")
+            chance = res.get("success_chance", 1.0)
+            if isinstance(chance, bool) or not isinstance(chance, (int, float)):
+                raise ValueError(f"{where}: 选项 {i} 的 success_chance 无效: {chance!r}")
+            choices.append(ChoiceProgram(
+                choice["text"], float(chance),
+                self._compile_effects(res.get("success_effect", {}), f"{where} 选项 {i} 成功", "成功!"),
+                self._compile_effects(res.get("fail_effect", {}), f"{where} 选项 {i} 失败", "失败!"),
+            ))
+
+        record_history = bool(evt.get("unique", False) or evt.get("is_unique", False))
+        return EventProgram(effects, tuple(choices), record_history, _event_conditions(evt, where))
+
+    def _compile_effects(self, effects, where, default_text=None):
+        if not isinstance(effects, dict):
+            raise ValueError(f"{where}: 效果应为对象，实际为 {type(effects).__name__}")
+
+        steps = []
         for k, v in effects.items():
-            if k == "text": continue
-            
-            # Handle Value Range [min, max] or Single Value
-            val = 0
-            if isinstance(v, list) and len(v) == 2 and isinstance(v[0], (int, float)):
-                val = random.randint(int(v[0]), int(v[1]))
-            elif isinstance(v, (int, float)):
-                val = int(v)
-                
-            # Apply
-            if k == "exp":
-                cultivator.gain_exp(val)
-                logs.append(f"修为 {'+' if val>0 else ''}{val}")
-            elif k == "money":
-                cultivator.money = max(0, cultivator.money + val)
-                logs.append(f"灵石 {'+' if val>0 else ''}{val}")
-            elif k == "mind":
-                cultivator.modify_stat("mind", val)
-                logs.append(f"心魔 {'+' if val>0 else ''}{val}")
-            elif k == "body":
-                cultivator.modify_stat("body", val)
-                logs.append(f"体魄 {'+' if val>0 else ''}{val}")
-            # Plan 45: 支持气运效果
-            elif k == "affection":
-                cultivator.modify_stat("affection", val)
-                logs.append(f"气运 {'+' if val>0 else ''}{val}")
+            if k == "text":
+                continue
+            if k in STAT_EFFECTS:
+                steps.append(self._stat_step(k, _compile_value(f"{where}.{k}", v)))
             elif k == "items":
-                # items: { "id": count }
-                if isinstance(v, dict):
-                    for iid, count in v.items():
-                        cultivator.gain_item(iid, count)
-                        item_name = self.item_manager.get_item_name(iid)
-                        logs.append(f"获得: {item_name} x{count}")
-            
+                steps.append(self._items_step(v, f"{where}.items"))
             elif k == "random_material":
-                 # Dynamic material drop based on player tier
-                 count = val
-                 if count > 0:
-                     layer = getattr(cultivator, 'layer_index', 0)
-                     tier = min(layer, 8) 
-                     for _ in range(count):
-                         mat_id = self.item_manager.get_random_material(tier)
-                         if mat_id:
-                             cultivator.gain_item(mat_id, 1)
-                             item_name = self.item_manager.get_item_name(mat_id)
-                             logs.append(f"意外收获: {item_name}")
+                steps.append(self._random_material_step(_compile_value(f"{where}.{k}", v)))
+            else:
+                # 旧版解释器会静默忽略未知的键，这里保持忽略但在加载时提示
+                logger.warning(f"{where}: 未知的效果 {k!r}，已忽略")
+        return EffectProgram(steps, effects.get("text", default_text))
 
-        return logs
+    def _stat_step(self, key, value):
+        label = STAT_EFFECTS[key]
+        if key == "exp":
+            apply = _gain_exp
+        elif key == "money":
+            apply = _add_money
+        else:
+            def apply(c, val):
+                c.modify_stat(key, val)
+
+        if isinstance(value, int):
+            # 常量: 日志文本也在编译时生成
+            text = f"{label} {_signed(value)}"
+
+            def step(c, logs):
+                apply(c, value)
+                logs.append(text)
+        else:
+            lo, hi = value
+
+            def step(c, logs):
+                val = random.randint(lo, hi)
+                apply(c, val)
+                logs.append(f"{label} {_signed(val)}")
+        return step
+
+    def _items_step(self, items, where):
+        # items: { "id": count }，名称在编译时解析
+        if not isinstance(items, dict):
+            raise ValueError(f"{where}: 应为 {{物品ID: 数量}}，实际为 {items!r}")
+        grants = []
+        for iid, count in items.items():
+            if isinstance(count, bool) or not isinstance(count, int):
+                raise ValueError(f"{where}.{iid}: 数量无效: {count!r}")
+            if self.item_manager is not None and self.item_manager.get_item(iid) is None:
+                logger.warning(f"{where}: 未知物品 {iid}")
+            name = self.item_manager.get_item_name(iid) if self.item_manager is not None else iid
+            grants.append((iid, count, f"获得: {name} x{count}"))
+        grants = tuple(grants)
+
+        def step(c, logs):
+            for iid, count, text in grants:
+                c.gain_item(iid, count)
+                logs.append(text)
+        return step
+
+    def _random_material_step(self, value):
+        # Dynamic material drop based on player tier
+        item_manager = self.item_manager
+
+        def step(c, logs):
+            count = value if isinstance(value, int) else random.randint(*value)
+            if count > 0:
+                tier = min(getattr(c, 'layer_index', 0), 8)
+                for _ in range(count):
+                    mat_id = item_manager.get_random_material(tier)
+                    if mat_id:
+                        c.gain_item(mat_id, 1)
+                        logs.append(f"意外收获: {item_manager.get_item_name(mat_id)}")
+        return step
 
     def _record_history(self, event_id):
-        from src.database import db_manager
-        from src.models import EventHistory
-        import time
+        from src.services.persistence_worker import persistence_worker
         
-        try:
-            with db_manager.get_session() as session:
-                existing = session.get(EventHistory, event_id)
-                if not existing:
-                    hist = EventHistory(event_id=event_id, triggered_at=int(time.time()))
-                    session.add(hist)
-                    session.commit()
-        except Exception as e:
-            logger.error(f"History save error: {e}")
+        triggered_at = int(time.time())
+        def job(conn):
+            conn.execute(
+                "INSERT OR IGNORE INTO event_history (event_id, triggered_at) VALUES (?, ?)",
+                (event_id, triggered_at)
+            )
+        persistence_worker.submit(job, description=f"event_history:{event_id}")
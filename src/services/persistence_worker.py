@@ -0,0 +1,158 @@
+"""
+后台持久化线程
+
+所有 SQLite 写操作 (活动记录、事件日志、事件历史、成就解锁、存档) 都提交到这里，
+由单一后台线程批量执行，GUI 线程 (game_loop / Qt 槽函数) 不再等待磁盘 I/O。
+
+- 有界队列: 积压达到上限时短暂等待写线程取走任务，仍无空位则丢弃该任务并记录日志
+  (从不在调用线程 (通常是 GUI 线程) 上同步写库，也不会让新任务插队到排队任务之前)
+- 合并: 带 key 的任务若尚未执行，新提交会替换旧任务 (如整份存档只需写最新的一次)
+- 批处理: 一次取出所有待执行任务，在同一个事务中执行，仅提交一次
+- flush(): 屏障，等待此前提交的任务全部落盘 (退出程序、导出进度前调用)
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from src.logger import logger
+
+
+class PersistenceWorker:
+    def __init__(self, max_pending=1024, overflow_wait=0.5):
+        self.max_pending = max_pending
+        self.overflow_wait = overflow_wait  # 队列满时最多等待的秒数
+        self._cond = threading.Condition()
+        self._jobs = OrderedDict()  # key -> (job, description, after_commit, on_error)
+        self._seq = itertools.count()
+        self._busy = False
+        self._thread = None
+
+    # --- 提交 ---
+    def submit(self, job, key=None, description="", after_commit=None, on_error=None):
+        """
+        提交一个写任务。
+        :param job: callable(conn)，conn 为 sqlite3 连接，任务内不要 commit
+        :param key: 合并键，相同 key 的未执行任务会被替换 (保留原有排队位置)
+        :param description: 用于日志
+        :param after_commit: 可选，事务提交成功后在写线程调用的 callable()
+        :param on_error: 可选，任务执行或提交失败 (已回滚) 后在写线程调用的 callable()；
+                         队列满而被丢弃时在提交线程调用
+        """
+        entry = (job, description, after_commit, on_error)
+        with self._cond:
+            if key is not None and key in self._jobs:
+                self._jobs[key] = entry
+                return
+
+            # 写线程自身 (如 after_commit 中) 提交时不能等待自己腾出空位
+            if len(self._jobs) >= self.max_pending and threading.current_thread() is not self._thread:
+                self._ensure_thread()
+                deadline = time.monotonic() + self.overflow_wait
+                while len(self._jobs) >= self.max_pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            if len(self._jobs) < self.max_pending or key in self._jobs or \
+                    threading.current_thread() is self._thread:
+                # 等待期间可能已有同 key 任务入队，直接替换
+                if key is None:
+                    key = ("_anon", next(self._seq))
+                self._jobs[key] = entry
+                self._ensure_thread()
+                self._cond.notify_all()
+                return
+
+        logger.error(f"持久化队列已满 ({self.max_pending})，丢弃任务: {description}")
+        self._notify(description, on_error)
+
+    def flush(self, timeout=10.0):
+        """
+        等待所有已提交的任务执行完毕。
+        :return: 是否在超时前完成
+        """
+        if threading.current_thread() is self._thread:
+            return True # 在写线程内部调用时不能等待自己
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._jobs or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"持久化 flush 超时，剩余任务 {len(self._jobs)} 个")
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    @property
+    def pending_count(self):
+        with self._cond:
+            return len(self._jobs)
+
+    # --- 写线程 ---
+    def _ensure_thread(self):
+        # 调用方需持有 self._cond
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="PersistenceWorker", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs:
+                    self._cond.wait()
+                batch = list(self._jobs.values())
+                self._jobs.clear()
+                self._busy = True
+                self._cond.notify_all() # 唤醒等待队列空位的提交者
+
+            try:
+                self._run_batch(batch)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _run_batch(self, batch):
+        from src.database import db_manager
+
+        start = time.perf_counter()
+        try:
+            with db_manager._get_conn() as conn:
+                for job, *_ in batch:
+                    job(conn)
+            logger.debug(f"持久化批次完成: {len(batch)} 个任务, {(time.perf_counter() - start) * 1000:.1f} ms")
+            for _, description, after_commit, _ in batch:
+                self._notify(description, after_commit)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                _, description, _, on_error = batch[0]
+                logger.error(f"持久化任务失败 ({description}): {e}")
+                self._notify(description, on_error)
+                return
+            logger.warning(f"持久化批次失败，逐个重试: {e}")
+
+        # 批次已整体回滚，逐个重试以隔离出错的任务
+        for job, description, after_commit, on_error in batch:
+            try:
+                with db_manager._get_conn() as conn:
+                    job(conn)
+            except Exception as e:
+                logger.error(f"持久化任务失败 ({description}): {e}")
+                self._notify(description, on_error)
+                continue
+            self._notify(description, after_commit)
+
+    @staticmethod
+    def _notify(description, callback):
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"持久化回调失败 ({description}): {e}")
+
+
+# Global instance
+persistence_worker = PersistenceWorker()
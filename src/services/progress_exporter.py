@@ -26,8 +26,12 @@ class ProgressExporter:
         try:
             from src.database import db_manager
             from src.models import Achievement
+            from src.services.persistence_worker import persistence_worker
             from sqlmodel import select
             
+            # 等待尚未落库的成就解锁等写入完成，保证导出的是最新状态
+            persistence_worker.flush()
+            
             current_time = int(time.time())
             readable_time = datetime.fromtimestamp(current_time).strftime("%Y-%m-%d %H:%M:%S")
             
@@ -184,6 +188,9 @@ class ProgressExporter:
                 cultivator.refresh_market()
             
             # 更新数据库 - 成就
+            # 先等待排队中的成就解锁写完，避免其覆盖导入的状态
+            from src.services.persistence_worker import persistence_worker
+            persistence_worker.flush()
             achievements_data = data.get("achievements", [])
             if achievements_data:
                 try:
@@ -204,6 +211,8 @@ class ProgressExporter:
                         session.commit()
                 except Exception as e:
                     logger.warning(f"导入成就失败: {e}")
+                from src.services.achievement_manager import achievement_manager
+                achievement_manager.reload()
             
             # 保存所有数据到数据库
             cultivator.save_data()
@@ -0,0 +1,167 @@
+from PyQt6.QtCore import QObject, QTimer
+import gzip
+import json
+import os
+import time
+from src.logger import logger
+from src.database import db_manager
+from src.services.persistence_worker import persistence_worker
+from src.utils.path_helper import get_user_data_dir
+from src.config import (
+    ACTIVITY_RETENTION_DAYS, APM_WINDOWS, EVENT_RETENTION_DAYS,
+    MAINTENANCE_IDLE_SECONDS, MAINTENANCE_INTERVAL_SECONDS
+)
+
+# 归档的事件日志 (gzip 压缩的 JSON Lines，每次归档追加一个 gzip 成员)
+# 至少一次语义: 若归档后、删除前崩溃，下次会重复归档，读取时可按 id 去重
+EVENT_ARCHIVE_FILE = os.path.join(get_user_data_dir(), "player_events_archive.jsonl.gz")
+
+# 空闲页超过该数量时执行 incremental_vacuum
+VACUUM_FREELIST_THRESHOLD = 256
+
+
+def _idle_window():
+    """
+    空闲判定使用的 APM 窗口: get_apm() 只支持 APM_WINDOWS 中的窗口，
+    配置的时长不在其中时取不短于它的最小窗口 (宁可多等也不在有输入时维护)
+    """
+    if MAINTENANCE_IDLE_SECONDS in APM_WINDOWS:
+        return MAINTENANCE_IDLE_SECONDS
+    window = min((w for w in APM_WINDOWS if w >= MAINTENANCE_IDLE_SECONDS), default=max(APM_WINDOWS))
+    logger.warning(f"MAINTENANCE_IDLE_SECONDS={MAINTENANCE_IDLE_SECONDS} 不在 APM_WINDOWS 中，改用 {window} 秒")
+    return window
+
+
+IDLE_WINDOW_SECONDS = _idle_window()
+
+
+class RetentionManager(QObject):
+    """
+    数据保留与压缩
+
+    空闲时 (一段时间无键鼠输入) 每天最多执行一次:
+    1. 删除超过保留期的分钟活动记录 (写入时已累加进小时/日汇总表，统计不受影响)
+    2. 将超过保留期的事件日志追加到压缩归档文件后删除
+    3. 回收空闲页 (incremental_vacuum，仅限增量模式的数据库)，并截断 WAL 文件
+    清理在持久化线程上以单个事务执行，回收在事务提交之后进行。
+    """
+
+    def __init__(self, monitor, archive_path=None, parent=None):
+        super().__init__(parent)
+        self.monitor = monitor
+        self.archive_path = archive_path or EVENT_ARCHIVE_FILE
+        self._last_run = None
+        self._scheduled = False
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._on_timer)
+        self.check_interval_ms = 5 * 60 * 1000
+
+    def start(self):
+        self._last_run = self._load_last_run()
+        self.timer.start(self.check_interval_ms)
+
+    def stop(self):
+        self.timer.stop()
+
+    def _load_last_run(self):
+        try:
+            with db_manager._get_conn() as conn:
+                row = conn.execute("SELECT value FROM system_metadata WHERE key = 'last_maintenance'").fetchone()
+            return int(row[0]) if row else 0
+        except Exception as e:
+            logger.warning(f"读取维护时间失败: {e}")
+            return 0
+
+    def _is_idle(self):
+        kb, ms = self.monitor.get_apm(IDLE_WINDOW_SECONDS)
+        return kb == 0 and ms == 0
+
+    def _on_timer(self):
+        if self._scheduled or time.time() - self._last_run < MAINTENANCE_INTERVAL_SECONDS:
+            return
+        if not self._is_idle():
+            return
+        self.run()
+
+    def run(self):
+        """立即提交一次维护任务 (不检查空闲/间隔)"""
+        now = int(time.time())
+        self._scheduled = True
+
+        def job(conn):
+            self._prune(conn, now)
+
+        def done():
+            self._last_run = now
+            self._scheduled = False
+            self._vacuum()
+
+        def failed():
+            # 已回滚: 不更新 _last_run，下次空闲时重试
+            self._scheduled = False
+
+        persistence_worker.submit(
+            job, key="maintenance", description="maintenance", after_commit=done, on_error=failed
+        )
+
+    # --- 持久化线程 ---
+    def _prune(self, conn, now):
+        start = time.perf_counter()
+
+        activity_cutoff = now - ACTIVITY_RETENTION_DAYS * 86400
+        removed_minutes = conn.execute(
+            "DELETE FROM activity_logs_minute WHERE timestamp < ?", (activity_cutoff,)
+        ).rowcount
+
+        event_cutoff = now - EVENT_RETENTION_DAYS * 86400
+        rows = conn.execute(
+            "SELECT id, timestamp, event_type, message FROM player_events WHERE timestamp < ? ORDER BY id",
+            (event_cutoff,)
+        ).fetchall()
+        if rows:
+            self._archive_events(rows)
+            conn.execute(
+                "DELETE FROM player_events WHERE timestamp < ? AND id <= ?", (event_cutoff, rows[-1][0])
+            )
+
+        conn.execute(
+            "INSERT OR REPLACE INTO system_metadata (key, value) VALUES ('last_maintenance', ?)", (str(now),)
+        )
+        logger.info(
+            f"数据维护: 清理分钟记录 {removed_minutes} 条, 归档事件 {len(rows)} 条, "
+            f"{(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+
+    def _archive_events(self, rows):
+        # 先落盘归档 (fsync)，再在同一事务中删除；写入失败则抛出异常使事务回滚
+        with open(self.archive_path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                for event_id, ts, event_type, message in rows:
+                    line = json.dumps(
+                        {"id": event_id, "timestamp": ts, "event_type": event_type, "message": message},
+                        ensure_ascii=False
+                    )
+                    f.write(line.encode("utf-8") + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+
+    def _vacuum(self):
+        # 在事务之外执行。只处理 auto_vacuum=INCREMENTAL 的数据库 (sqlite_factory 新建的库):
+        # 旧数据库切换模式需要一次完整 VACUUM (重写整个文件)，在写线程上会阻塞所有排队写入，
+        # 退出时还可能超过 flush() 的等待时间，因此不做转换，其空闲页由 SQLite 自行复用。
+        start = time.perf_counter()
+        try:
+            with db_manager._get_conn() as conn:
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    return
+                freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if freelist < VACUUM_FREELIST_THRESHOLD:
+                    return
+                # execute() 只单步执行一次 (仅释放一页)，executescript 才会执行到底
+                conn.executescript("PRAGMA incremental_vacuum;")
+                action = f"incremental_vacuum ({freelist} 页)"
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            logger.info(f"数据维护: {action}, {(time.perf_counter() - start) * 1000:.1f} ms")
+        except Exception as e:
+            logger.warning(f"数据库空间回收失败: {e}")
@@ -0,0 +1,122 @@
+"""
+增量存档
+
+SaveDelta 是一次存档需要写入的变更 (均为绝对值，重复写入是幂等的)：
+- status: player_status 中变化的列 {列名: 值}
+- inventory_full / used_once_full: 整体被替换时的完整快照 (否则为 None)
+- inventory_changes: {item_id: count}，count <= 0 表示删除该行
+- used_once_changes: {item_id: True/False}，False 表示删除
+- market: 坊市整体快照 [(item_id, price, discount)] (否则为 None)
+
+多次存档若尚未落盘，会通过 merged() 合并为一个 delta，由持久化线程一次写入。
+"""
+
+
+class SaveDelta:
+    __slots__ = ("status", "inventory_full", "inventory_changes",
+                 "used_once_full", "used_once_changes", "market")
+
+    def __init__(self, status=None, inventory_full=None, inventory_changes=None,
+                 used_once_full=None, used_once_changes=None, market=None):
+        self.status = status or {}
+        self.inventory_full = inventory_full
+        self.inventory_changes = inventory_changes or {}
+        self.used_once_full = used_once_full
+        self.used_once_changes = used_once_changes or {}
+        self.market = market
+
+    def is_empty(self):
+        return not (self.status or self.inventory_changes or self.used_once_changes
+                    or self.inventory_full is not None or self.used_once_full is not None
+                    or self.market is not None)
+
+    def change_count(self):
+        """变更的列/行数 (用于日志)"""
+        count = len(self.status) + len(self.inventory_changes) + len(self.used_once_changes)
+        for full in (self.inventory_full, self.used_once_full, self.market):
+            if full is not None:
+                count += len(full)
+        return count
+
+    def merged(self, newer):
+        """返回合并后的新 delta (newer 覆盖 self)，不修改任何一方"""
+        if newer.inventory_full is not None:
+            inventory_full, inventory_changes = newer.inventory_full, dict(newer.inventory_changes)
+        else:
+            inventory_full = self.inventory_full
+            inventory_changes = {**self.inventory_changes, **newer.inventory_changes}
+
+        if newer.used_once_full is not None:
+            used_once_full, used_once_changes = newer.used_once_full, dict(newer.used_once_changes)
+        else:
+            used_once_full = self.used_once_full
+            used_once_changes = {**self.used_once_changes, **newer.used_once_changes}
+
+        return SaveDelta(
+            status={**self.status, **newer.status},
+            inventory_full=inventory_full,
+            inventory_changes=inventory_changes,
+            used_once_full=used_once_full,
+            used_once_changes=used_once_changes,
+            market=newer.market if newer.market is not None else self.market,
+        )
+
+    def write(self, conn):
+        """在持久化线程上写入 (不提交)"""
+        # 1. PlayerStatus: 只更新变化的列
+        if self.status:
+            columns = list(self.status.keys())
+            values = [self.status[c] for c in columns]
+            cur = conn.execute(
+                f"UPDATE player_status SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = 1",
+                values
+            )
+            if cur.rowcount == 0:
+                conn.execute(
+                    f"INSERT INTO player_status (id, last_login_time, {', '.join(columns)}) "
+                    f"VALUES (1, 0, {', '.join('?' * len(columns))})",
+                    values
+                )
+
+        # 2. Inventory
+        if self.inventory_full is not None:
+            conn.execute("DELETE FROM player_inventory")
+            conn.executemany(
+                "INSERT INTO player_inventory (item_id, count) VALUES (?, ?)",
+                [(iid, count) for iid, count in self.inventory_full.items() if count > 0]
+            )
+        if self.inventory_changes:
+            conn.executemany(
+                "INSERT INTO player_inventory (item_id, count) VALUES (?, ?) "
+                "ON CONFLICT(item_id) DO UPDATE SET count = excluded.count",
+                [(iid, count) for iid, count in self.inventory_changes.items() if count > 0]
+            )
+            conn.executemany(
+                "DELETE FROM player_inventory WHERE item_id = ?",
+                [(iid,) for iid, count in self.inventory_changes.items() if count <= 0]
+            )
+
+        # 3. Market Stock (最多几件商品，整体重写)
+        if self.market is not None:
+            conn.execute("DELETE FROM market_stock")
+            conn.executemany(
+                "INSERT INTO market_stock (item_id, count, price, discount) VALUES (?, 1, ?, ?)",
+                self.market
+            )
+
+        # 4. Plan 45: "一面之缘"使用记录
+        if self.used_once_full is not None:
+            conn.execute("DELETE FROM used_once_items")
+            conn.executemany(
+                "INSERT INTO used_once_items (item_id) VALUES (?)",
+                [(iid,) for iid in self.used_once_full]
+            )
+        if self.used_once_changes:
+            conn.executemany(
+                "INSERT OR IGNORE INTO used_once_items (item_id) VALUES (?)",
+                [(iid,) for iid, used in self.used_once_changes.items() if used]
+            )
+            conn.executemany(
+                "DELETE FROM used_once_items WHERE item_id = ?",
+                [(iid,) for iid, used in self.used_once_changes.items() if not used]
+            )
@@ -0,0 +1,101 @@
+"""
+静态数据启动缓存
+
+ItemManager / EventEngine / DialogueManager 启动时需要解析全部静态数据
+(逐行 json.loads effect / recipe / data_json / conditions_json)。
+解析结果按数据源哈希 (system_metadata 中的 data_hash:*) 序列化到用户目录的一个 pickle 文件，
+下次启动一次读取后直接还原，静态数据变化 (哈希不同) 时自动失效。
+
+每个分区单独序列化，get() 每次返回新的副本，管理器修改自己的数据不会影响缓存。
+"""
+import os
+import pickle
+import time
+from src.logger import logger
+from src.utils.path_helper import get_user_data_dir
+
+CACHE_FILE = os.path.join(get_user_data_dir(), "static_cache.pickle")
+CACHE_FORMAT = 2  # 2: 物品为 ItemRecord
+
+
+def static_data_key():
+    """当前静态数据源 (数据包或用户数据库) 的内容哈希，作为缓存键"""
+    from src.services.data_loader import DataLoader, HASH_KEY_PREFIX
+    with DataLoader.static_conn() as conn:
+        rows = conn.execute(
+            "SELECT key, value FROM system_metadata WHERE key LIKE ? ORDER BY key", (HASH_KEY_PREFIX + "%",)
+        ).fetchall()
+    if not rows:
+        return None  # 数据来源未知 (如手工导入)，不使用缓存
+    return f"{CACHE_FORMAT}|" + "|".join(f"{k}={v}" for k, v in rows)
+
+
+class StaticCache:
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.enabled = True
+        self._key = None
+        self._sections = None  # None: 尚未读取
+
+    def _load(self):
+        if self._sections is not None:
+            return
+        self._sections = {}
+        try:
+            self._key = static_data_key()
+        except Exception as e:
+            logger.warning(f"静态数据缓存键读取失败: {e}")
+            self._key = None
+        if self._key is None or not os.path.exists(self.path):
+            return
+
+        start = time.perf_counter()
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get("key") == self._key:
+                self._sections = data["sections"]
+                logger.debug(f"静态数据缓存命中: {len(self._sections)} 个分区, "
+                             f"{(time.perf_counter() - start) * 1000:.1f} ms")
+            else:
+                logger.info("静态数据已变化，启动缓存失效")
+        except Exception as e:
+            logger.warning(f"静态数据缓存读取失败: {e}")
+
+    def get(self, section):
+        """返回分区数据的新副本，未命中返回 None"""
+        if not self.enabled:
+            return None
+        self._load()
+        blob = self._sections.get(section)
+        if blob is None:
+            return None
+        try:
+            return pickle.loads(blob)
+        except Exception as e:
+            logger.warning(f"静态数据缓存分区 {section} 损坏: {e}")
+            return None
+
+    def put(self, section, value):
+        """写入分区并落盘 (只在缓存未命中时发生)"""
+        if not self.enabled:
+            return
+        self._load()
+        if self._key is None:
+            return
+        self._sections[section] = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump({"key": self._key, "sections": self._sections}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"静态数据缓存写入失败: {e}")
+
+    def invalidate(self):
+        """静态数据重新导入后调用: 下次 get() 重新计算缓存键"""
+        self._sections = None
+        self._key = None
+
+
+static_cache = StaticCache()
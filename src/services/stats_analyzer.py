@@ -124,24 +124,13 @@ class StatsAnalyzer:
                 curr += timedelta(days=1)
                 
         elif period_type == 'year':
-            # This year (month resolution?) or just day resolution?
-            # Year view usually needs Month resolution. 
-            # Our DB supports 'day'. We can aggregate 'day' results into months here in python 
-            # OR add 'month' support in DB.
-            # Let's aggregate here for simplicity if data isn't huge.
-            # Actually, let's query raw by day and sum up.
+            # This year, month resolution (读取日汇总表按月聚合)
             start_dt = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
             start_ts = int(start_dt.timestamp())
             
-            rows = self.db.get_aggregated_stats(start_ts, end_ts, group_by='day')
-            # Aggregate to months: keys 'YYYY-MM-DD' -> 'MM'
-            month_map = {} # '01' -> val
-            
-            for r in rows:
-                d_str = r[0] # YYYY-MM-DD
-                month = d_str.split('-')[1]
-                val = r[1] + r[2]
-                month_map[month] = month_map.get(month, 0) + val
+            rows = self.db.get_aggregated_stats(start_ts, end_ts, group_by='month')
+            # 'YYYY-MM' -> 'MM'
+            month_map = {r[0].split('-')[1]: r[1] + r[2] for r in rows}
                 
             # 1..12
             for m in range(1, 13):
@@ -0,0 +1,127 @@
+"""
+背包 / 丹方列表的 model
+
+订阅 Cultivator 的背包变更通知与 CraftTracker 的可炼制变化，
+只插入 / 删除 / 刷新受影响的行，不再在每次变化后清空并重建整个列表 (大背包时避免闪烁)。
+视图使用 QListView，行数据通过 index.data(Qt.ItemDataRole.UserRole) 取得物品 ID，
+与原先 QListWidgetItem.data() 的用法一致。
+"""
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QBrush, QColor
+
+
+class InventoryListModel(QAbstractListModel):
+    """
+    背包中数量 > 0 的物品，按背包顺序排列。
+    text_fn(item_id, count) 生成显示文本。
+    """
+
+    def __init__(self, cultivator, text_fn, parent=None):
+        super().__init__(parent)
+        self.cultivator = cultivator
+        self.text_fn = text_fn
+        self._ids = []
+        self._rows = {}  # item_id -> 行号
+        self.reload()
+        cultivator.add_inventory_listener(self._on_inventory_change)
+
+    def reload(self):
+        """按当前背包整体重建 (只在初始化时需要)"""
+        self.beginResetModel()
+        self._ids = [item_id for item_id, count in self.cultivator.inventory.items() if count > 0]
+        self._rows = {}
+        self._reindex(0)
+        self.endResetModel()
+
+    def _reindex(self, start):
+        for row in range(start, len(self._ids)):
+            self._rows[self._ids[row]] = row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item_id = self._ids[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.text_fn(item_id, self.cultivator.inventory.get(item_id, 0))
+        if role == Qt.ItemDataRole.UserRole:
+            return item_id
+        return None
+
+    def row_of(self, item_id):
+        return self._rows.get(item_id)
+
+    def _on_inventory_change(self, item_id, old, new):
+        row = self._rows.get(item_id)
+        if new > 0:
+            if row is None:
+                row = len(self._ids)
+                self.beginInsertRows(QModelIndex(), row, row)
+                self._ids.append(item_id)
+                self._rows[item_id] = row
+                self.endInsertRows()
+            else:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+        elif row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._ids[row]
+            del self._rows[item_id]
+            self._reindex(row)
+            self.endRemoveRows()
+
+
+class RecipeListModel(QAbstractListModel):
+    """某一阶的丹方 (有配方的丹药)，可炼制状态来自 cultivator.craft_tracker"""
+
+    def __init__(self, cultivator, parent=None):
+        super().__init__(parent)
+        self.cultivator = cultivator
+        self.item_manager = cultivator.item_manager
+        self.tier = None
+        self._ids = []
+        self._rows = {}
+        cultivator.craft_tracker.add_listener(self._on_craftable_change)
+
+    def set_tier(self, tier):
+        if tier == self.tier:
+            return
+        self.beginResetModel()
+        self.tier = tier
+        # Show recipes for current tier only to keep list clean (skip items without a recipe)
+        self._ids = [pill_id for pill_id in self.item_manager.tier_lists.get(tier, {}).get("pills", [])
+                     if self.item_manager.get_item(pill_id).get("recipe")]
+        self._rows = {pill_id: row for row, pill_id in enumerate(self._ids)}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        pill_id = self._ids[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            can_craft = self.cultivator.craft_tracker.is_craftable(pill_id)
+            name = self.item_manager.get_item(pill_id).get("name", pill_id)
+            return f"{name}{' [可炼制]' if can_craft else ' [材料不足]'}"
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if self.cultivator.craft_tracker.is_craftable(pill_id):
+                return QBrush(QColor(255, 215, 0))
+            return QBrush(QColor(150, 150, 150))
+        if role == Qt.ItemDataRole.UserRole:
+            return pill_id
+        return None
+
+    def _on_craftable_change(self, recipe_id):
+        roles = [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ForegroundRole]
+        if recipe_id is None:
+            if self._ids:
+                self.dataChanged.emit(self.index(0), self.index(len(self._ids) - 1), roles)
+            return
+        row = self._rows.get(recipe_id)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, roles)
@@ -1,6 +1,6 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QPushButton, QFrame, QScrollArea, QGridLayout, 
-                             QTabWidget, QMessageBox)
+                             QTabWidget, QMessageBox, QProgressBar)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QColor, QFont
 from src.services.achievement_manager import achievement_manager
@@ -64,6 +64,9 @@ class MeritTab(QWidget):
         layout.addWidget(self.scroll)
         
         self.current_filter = "all"
+        # 已创建的卡片 [(category, card)]，进度或佩戴称号变化时才重建，切换筛选只改可见性
+        self._cards = []
+        self._built_version = None
         self.refresh_list()
         
     def create_filter_btn(self, text, active=False):
@@ -116,26 +119,36 @@ class MeritTab(QWidget):
             self.btn_unequip.setVisible(False)
 
     def refresh_list(self):
+        self.refresh_header()
+        
+        if self._build_key() != self._built_version:
+            self._rebuild_cards()
+            # 重建时可能首次加载成就 (版本号递增)，因此在重建之后记录
+            self._built_version = self._build_key()
+        self.apply_filter()
+
+    def _build_key(self):
+        return achievement_manager.progress_version, self.cultivator.equipped_title
+
+    def _rebuild_cards(self):
         # Clear existing
         while self.card_layout.count():
             item = self.card_layout.takeAt(0)
             if item.widget():
                 item.widget().deleteLater()
-                
-        self.refresh_header()
-        
-        achievements = achievement_manager.get_all_achievements()
+        self._cards = []
         
-        for ach in achievements:
-            # Filter
-            if self.current_filter != 'all' and ach['category'] != self.current_filter:
-                continue
-                
+        for ach in achievement_manager.get_progress(self.cultivator):
             # Render Card
             card = AchievementCard(ach, self.cultivator)
             card.claim_clicked.connect(self.on_claim)
             card.equip_clicked.connect(self.on_equip)
             self.card_layout.addWidget(card)
+            self._cards.append((ach['category'], card))
+
+    def apply_filter(self):
+        for category, card in self._cards:
+            card.setVisible(self.current_filter == 'all' or category == self.current_filter)
 
     def on_claim(self, ach_id):
         success, msg = achievement_manager.claim_reward(self.cultivator, ach_id)
@@ -216,13 +229,24 @@ class AchievementCard(QFrame):
         # Progress / Action
         action_layout = QVBoxLayout()
         
-        # Progress text (Mock for now, actual progress needs fetch from achievements table or stats)
-        # We did not pass current stats to this widget, so we can't show "53/100".
-        # We can only show threshold.
+        # Progress (来自 achievement_manager.get_progress；无法度量的条件只显示目标)
         if status == 0 and not data['is_hidden']:
-            lbl_prog = QLabel(f"目标: {data['threshold']}")
-            lbl_prog.setStyleSheet("color: #666; font-size: 10px; border: none; background: transparent;")
-            action_layout.addWidget(lbl_prog)
+            if data.get('progress') is not None:
+                bar = QProgressBar()
+                bar.setFixedSize(90, 14)
+                bar.setRange(0, 1000)
+                bar.setValue(int(data['progress'] * 1000))
+                bar.setFormat(f"{self._fmt(data['current'])} / {data['threshold']}")
+                bar.setStyleSheet("""
+                    QProgressBar { border: 1px solid #444; border-radius: 3px; background: #222;
+                                   color: #AAA; font-size: 10px; text-align: center; }
+                    QProgressBar::chunk { background-color: #8B7500; border-radius: 2px; }
+                """)
+                action_layout.addWidget(bar)
+            else:
+                lbl_prog = QLabel(f"目标: {data['threshold']}")
+                lbl_prog.setStyleSheet("color: #666; font-size: 10px; border: none; background: transparent;")
+                action_layout.addWidget(lbl_prog)
             
         if status == 1:
             btn_claim = QPushButton("领取")
@@ -253,3 +277,9 @@ class AchievementCard(QFrame):
             action_layout.addWidget(lbl_done)
             
         layout.addLayout(action_layout)
+
+    @staticmethod
+    def _fmt(value):
+        if isinstance(value, float) and not value.is_integer():
+            return f"{value:.1f}"
+        return f"{int(value)}"
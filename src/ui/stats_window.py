@@ -135,6 +135,15 @@ class StatsWindow(DraggableWindow):
         self.lbl_analysis.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.lbl_analysis)
         
+        # Live Intensity (from InputMonitor ring buffer, no DB query)
+        self.lbl_intensity = QLabel("⚡ 实时强度: -")
+        self.lbl_intensity.setStyleSheet("color: #00FF7F; font-size: 12px; border: none;")
+        self.lbl_intensity.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.lbl_intensity)
+        
+        self.intensity_timer = QTimer(self)
+        self.intensity_timer.timeout.connect(self.refresh_intensity)
+        
         # Reward Button
         self.btn_claim = QPushButton("领取今日勤勉赏 (需 >2000 操作)")
         self.btn_claim.setCursor(Qt.CursorShape.PointingHandCursor)
@@ -370,6 +379,20 @@ class StatsWindow(DraggableWindow):
         super().showEvent(event)
         self.refresh_data()
         self.refresh_logs() # Refresh logs too
+        self.intensity_timer.start(1000)
+        
+    def hideEvent(self, event):
+        self.intensity_timer.stop()
+        super().hideEvent(event)
+        
+    def refresh_intensity(self):
+        if not self.cultivator:
+            return
+        c = self.cultivator
+        self.lbl_intensity.setText(
+            f"⚡ 实时强度 (APM)  5秒 {c.get_intensity(5)} · 1分 {c.get_intensity(60)} · "
+            f"5分 {c.get_intensity(300)} · 1时 {c.get_intensity(3600)}"
+        )
         
     def refresh_data(self):
         # Fetch data
@@ -388,6 +411,7 @@ class StatsWindow(DraggableWindow):
             
         # Draw Chart
         self.plot_today_chart(data['hourly_trend'])
+        self.refresh_intensity()
         
         # Check Daily Reward Status
         if self.cultivator:
@@ -0,0 +1,77 @@
+"""
+按秒采样的 APM 环形缓冲区
+
+预分配固定大小 (最大窗口秒数) 的 array 存储每秒的键盘/鼠标操作数，
+并为每个窗口维护滑动累计和，push 与查询都是 O(窗口数) 的常数时间，
+不随窗口长度增长，也不需要查询 SQLite。
+"""
+from array import array
+
+
+class ApmRing:
+    def __init__(self, windows):
+        """
+        :param windows: 需要维护的窗口长度 (秒)，例如 (5, 60, 300, 3600)
+        """
+        self.windows = tuple(sorted(set(windows)))
+        self.size = self.windows[-1]
+        self._index = {w: i for i, w in enumerate(self.windows)}
+
+        self._kb = array('q', bytes(8 * self.size))
+        self._ms = array('q', bytes(8 * self.size))
+        self._kb_sums = [0] * len(self.windows)
+        self._ms_sums = [0] * len(self.windows)
+        self._head = 0    # 下一次写入的槽位
+        self._filled = 0  # 已写入的秒数 (上限 size)
+
+    def clear(self):
+        for i in range(self.size):
+            self._kb[i] = 0
+            self._ms[i] = 0
+        self._kb_sums = [0] * len(self.windows)
+        self._ms_sums = [0] * len(self.windows)
+        self._head = 0
+        self._filled = 0
+
+    def push(self, kb, ms):
+        """写入一秒的操作数，并更新各窗口的累计和"""
+        head = self._head
+        size = self.size
+        filled = self._filled
+        kb_buf = self._kb
+        ms_buf = self._ms
+        kb_sums = self._kb_sums
+        ms_sums = self._ms_sums
+
+        for i, w in enumerate(self.windows):
+            if filled >= w:
+                # 移出窗口的那一秒 (对最大窗口来说就是即将被覆盖的槽位)
+                old = head - w
+                if old < 0:
+                    old += size
+                kb_sums[i] -= kb_buf[old]
+                ms_sums[i] -= ms_buf[old]
+            kb_sums[i] += kb
+            ms_sums[i] += ms
+
+        kb_buf[head] = kb
+        ms_buf[head] = ms
+        head += 1
+        self._head = 0 if head == size else head
+        if filled < size:
+            self._filled = filled + 1
+
+    def apm(self, window):
+        """
+        返回指定窗口内的平均 (键盘APM, 鼠标APM)。
+        数据不足窗口长度时按已有秒数折算。
+        """
+        i = self._index[window]
+        seconds = min(self._filled, window)
+        if seconds == 0:
+            return 0, 0
+        return int(self._kb_sums[i] * 60 / seconds), int(self._ms_sums[i] * 60 / seconds)
+
+    def snapshot(self):
+        """所有窗口的 APM: {window: (kb_apm, mouse_apm)}"""
+        return {w: self.apm(w) for w in self.windows}
@@ -7,6 +7,7 @@ SQLModel/SQLAlchemy 的 create_all() 只会创建新表，不会给已存在的
 """
 import sqlite3
 from src.logger import logger
+from src.utils.sqlite_factory import connect
 
 
 # 定义 player_status 表的所有列及其默认值
@@ -31,6 +32,26 @@ PLAYER_STATUS_COLUMNS = [
 ]
 
 
+# activity_logs_minute 表新增的按键分类列 (见 config.KEY_CATEGORIES)
+ACTIVITY_LOG_COLUMNS = [
+    ("key_char", "INTEGER", "0"),
+    ("key_space", "INTEGER", "0"),
+    ("key_enter", "INTEGER", "0"),
+    ("key_backspace", "INTEGER", "0"),
+    ("key_modifier", "INTEGER", "0"),
+    ("key_navigation", "INTEGER", "0"),
+    ("key_other", "INTEGER", "0"),
+]
+
+
+# 需要存在的索引 (与模型中的 __table_args__ 保持一致)，旧数据库启动时补建
+# 格式: (索引名, 表名, (列...))
+SCHEMA_INDEXES = [
+    ("ix_activity_logs_minute_ts_cover", "activity_logs_minute", ("timestamp", "keys_count", "mouse_count")),
+    ("ix_player_events_timestamp", "player_events", ("timestamp",)),
+]
+
+
 def get_existing_columns(conn, table_name: str) -> set:
     """获取表中已存在的列名"""
     cursor = conn.execute(f"PRAGMA table_info({table_name})")
@@ -38,12 +59,13 @@ def get_existing_columns(conn, table_name: str) -> set:
     return columns
 
 
-def migrate_player_status(conn):
+def add_missing_columns(conn, table_name: str, columns) -> int:
     """
-    检查并迁移 player_status 表
-    为缺失的列添加定义
+    为已存在的表补齐缺失的列
+    :param columns: [(列名, SQLite类型, 默认值), ...]
+    :return: 添加的列数
     """
-    existing_columns = get_existing_columns(conn, "player_status")
+    existing_columns = get_existing_columns(conn, table_name)
     
     if not existing_columns:
         # 表不存在，将由 SQLModel create_all() 创建
@@ -51,29 +73,210 @@ def migrate_player_status(conn):
     
     added_count = 0
     
-    for col_name, col_type, default_value in PLAYER_STATUS_COLUMNS:
+    for col_name, col_type, default_value in columns:
         if col_name not in existing_columns:
             # 构建 ALTER TABLE 语句
             if default_value is not None:
-                sql = f"ALTER TABLE player_status ADD COLUMN {col_name} {col_type.split()[0]} DEFAULT {default_value}"
+                sql = f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type.split()[0]} DEFAULT {default_value}"
             else:
-                sql = f"ALTER TABLE player_status ADD COLUMN {col_name} {col_type.split()[0]}"
+                sql = f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type.split()[0]}"
             
-            try:
-                conn.execute(sql)
-                logger.info(f"数据库迁移: 添加列 player_status.{col_name}")
-                added_count += 1
-            except Exception as e:
-                logger.warning(f"添加列 {col_name} 失败: {e}")
+            conn.execute(sql)
+            logger.info(f"数据库迁移: 添加列 {table_name}.{col_name}")
+            added_count += 1
     
     return added_count
 
 
+def migrate_player_status(conn):
+    """
+    检查并迁移 player_status 表
+    为缺失的列添加定义
+    """
+    return add_missing_columns(conn, "player_status", PLAYER_STATUS_COLUMNS)
+
+
+def migrate_activity_logs(conn):
+    """
+    检查并迁移 activity_logs_minute 表 (按键分类列)
+    """
+    return add_missing_columns(conn, "activity_logs_minute", ACTIVITY_LOG_COLUMNS)
+
+
+def ensure_indexes(conn, indexes) -> int:
+    """
+    为已存在的表补建缺失的索引
+    :param indexes: [(索引名, 表名, (列...)), ...]
+    :return: 新建的索引数
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    created = 0
+    
+    for index_name, table_name, columns in indexes:
+        if index_name in existing or not get_existing_columns(conn, table_name):
+            # 已存在，或表不存在 (将由 SQLModel create_all() 连同索引一起创建)
+            continue
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({', '.join(columns)})")
+        logger.info(f"数据库迁移: 创建索引 {index_name}")
+        created += 1
+    
+    return created
+
+
+def migrate_time_indexes(conn):
+    """
+    补建时间索引 (activity_logs_minute / player_events)
+    """
+    return ensure_indexes(conn, SCHEMA_INDEXES)
+
+
+def create_tables_from_models(conn, table_names) -> int:
+    """
+    按 SQLModel 模型定义创建表 (CREATE TABLE IF NOT EXISTS，含索引)，
+    供需要在 create_all() 之前就写入数据的迁移使用 (如回填汇总表)。
+    :return: 新建的表数
+    """
+    from sqlalchemy.dialects import sqlite
+    from sqlalchemy.schema import CreateTable, CreateIndex
+    from sqlmodel import SQLModel
+    import src.models  # noqa: F401 (注册所有模型)
+    
+    dialect = sqlite.dialect()
+    created = 0
+    for name in table_names:
+        if get_existing_columns(conn, name):
+            continue
+        table = SQLModel.metadata.tables[name]
+        conn.execute(str(CreateTable(table, if_not_exists=True).compile(dialect=dialect)))
+        for index in table.indexes:
+            conn.execute(str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect)))
+        logger.info(f"数据库迁移: 创建表 {name}")
+        created += 1
+    return created
+
+
+def rebuild_activity_rollups(conn) -> int:
+    """
+    由分钟记录全量重建小时/日汇总表 (幂等: 先清空再聚合)
+    注意: 只能在分钟记录完整时使用 (迁移 v4)，保留期清理之后重建会丢失历史。
+    :return: 汇总的分钟记录数
+    """
+    sums = ["keys_count", "mouse_count"] + [c[0] for c in ACTIVITY_LOG_COLUMNS]
+    select_sums = ", ".join(f"SUM({c})" for c in sums)
+    insert_cols = ", ".join(sums + ["active_minutes", "max_actions"])
+    
+    conn.execute("DELETE FROM activity_rollup_hour")
+    conn.execute("DELETE FROM activity_rollup_day")
+    conn.execute(f"""
+        INSERT INTO activity_rollup_hour (bucket, {insert_cols})
+        SELECT CAST(strftime('%Y%m%d%H', timestamp, 'unixepoch', 'localtime') AS INTEGER) AS b,
+               {select_sums}, COUNT(*), MAX(keys_count + mouse_count)
+        FROM activity_logs_minute GROUP BY b
+    """)
+    conn.execute(f"""
+        INSERT INTO activity_rollup_day (day, weekday, {insert_cols})
+        SELECT CAST(strftime('%Y%m%d', timestamp, 'unixepoch', 'localtime') AS INTEGER) AS d,
+               CAST(strftime('%w', timestamp, 'unixepoch', 'localtime') AS INTEGER),
+               {select_sums}, COUNT(*), MAX(keys_count + mouse_count)
+        FROM activity_logs_minute GROUP BY d
+    """)
+    return conn.execute("SELECT COUNT(*) FROM activity_logs_minute").fetchone()[0]
+
+
+def migrate_activity_rollups(conn):
+    """
+    创建小时/日汇总表，并由已有的分钟记录一次性回填
+    """
+    if not get_existing_columns(conn, "activity_logs_minute"):
+        return 0 # 全新数据库，汇总表由 create_all() 创建
+    created = create_tables_from_models(conn, ["activity_rollup_hour", "activity_rollup_day"])
+    rows = rebuild_activity_rollups(conn)
+    logger.info(f"数据库迁移: 回填活动汇总表 ({rows} 条分钟记录)")
+    return created + 1
+
+
+def rebuild_stat_totals(conn) -> int:
+    """
+    由日汇总表重建累计统计 (幂等: 先清空再汇总；日汇总表保存完整历史)
+    :return: 汇总的天数
+    """
+    sums = ["keys_count", "mouse_count"] + [c[0] for c in ACTIVITY_LOG_COLUMNS] + ["active_minutes"]
+    conn.execute("DELETE FROM player_stat_totals")
+    conn.execute(f"""
+        INSERT INTO player_stat_totals (id, {', '.join(sums)}, max_actions, weekend_minutes)
+        SELECT 1, {', '.join(f'COALESCE(SUM({c}), 0)' for c in sums)}, COALESCE(MAX(max_actions), 0),
+               COALESCE(SUM(CASE WHEN weekday IN (0, 6) THEN active_minutes ELSE 0 END), 0)
+        FROM activity_rollup_day
+    """)
+    return conn.execute("SELECT COUNT(*) FROM activity_rollup_day").fetchone()[0]
+
+
+def migrate_stat_totals(conn):
+    """
+    创建累计统计表，并由日汇总表一次性回填
+    """
+    if not get_existing_columns(conn, "activity_rollup_day"):
+        return 0 # 全新数据库，由 create_all() 创建
+    created = create_tables_from_models(conn, ["player_stat_totals"])
+    days = rebuild_stat_totals(conn)
+    logger.info(f"数据库迁移: 回填累计统计 ({days} 天)")
+    return created + 1
+
+
+# ===== 版本化迁移注册表 =====
+# 按版本号递增排列，只追加、不修改已发布的步骤。
+# 每个步骤: (版本号, 描述, callable(conn) -> 变更数)
+# 步骤内不要 commit，也不要吞掉异常: 所有待执行步骤在同一个事务中执行，任一失败整体回滚。
+# 步骤需兼容 "表尚不存在" 的情况 (跳过即可，之后由 SQLModel create_all() 按最新结构创建)。
+MIGRATIONS = [
+    (1, "player_status 补齐列", migrate_player_status),
+    (2, "activity_logs_minute 按键分类列", migrate_activity_logs),
+    (3, "时间索引", migrate_time_indexes),
+    (4, "小时/日活动汇总表", migrate_activity_rollups),
+    (5, "累计统计表", migrate_stat_totals),
+]
+
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1][0]
+SCHEMA_VERSION_KEY = "schema_version"
+
+
+def get_schema_version(conn) -> int:
+    """读取已应用的 schema 版本号 (无记录或无 system_metadata 表时为 0)"""
+    try:
+        row = conn.execute(
+            "SELECT value FROM system_metadata WHERE key = ?", (SCHEMA_VERSION_KEY,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row else 0
+
+
+def set_schema_version(conn, version: int):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS system_metadata (key VARCHAR NOT NULL PRIMARY KEY, value VARCHAR NOT NULL)"
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO system_metadata (key, value) VALUES (?, ?)",
+        (SCHEMA_VERSION_KEY, str(version))
+    )
+
+
+def stamp_schema_version(conn):
+    """
+    新建的数据库 (由 create_all() 按最新结构创建) 直接标记为最新版本，
+    已有版本号时不做修改。
+    """
+    if get_schema_version(conn) == 0:
+        set_schema_version(conn, LATEST_SCHEMA_VERSION)
+
+
 def run_schema_migrations(db_path: str) -> bool:
     """
-    运行所有 schema 迁移
+    运行尚未应用的 schema 迁移
+    已是最新版本时只做一次 system_metadata 查询即返回。
     :param db_path: 数据库文件路径
     :return: 是否有迁移执行
+    :raises Exception: 任一步骤失败时整体回滚并抛出，版本号保持不变，下次启动会重新执行
     """
     import os
     
@@ -81,26 +284,34 @@ def run_schema_migrations(db_path: str) -> bool:
         logger.info("数据库文件不存在，跳过迁移 (将由 SQLModel 创建)")
         return False
     
+    conn = connect(db_path)
     try:
-        conn = sqlite3.connect(db_path)
-        total_changes = 0
+        current = get_schema_version(conn)
+        if current >= LATEST_SCHEMA_VERSION:
+            logger.debug(f"数据库 Schema 已是最新 (v{current})，无需迁移")
+            return False
         
-        # 迁移 player_status 表
-        total_changes += migrate_player_status(conn)
+        pending = [m for m in MIGRATIONS if m[0] > current]
+        total_changes = 0
         
-        # 未来可以添加其他表的迁移...
-        # total_changes += migrate_other_table(conn)
+        # sqlite3 模块不会为 DDL 自动开启事务，这里显式 BEGIN，使所有步骤原子生效
+        conn.execute("BEGIN")
+        try:
+            for version, description, step in pending:
+                changes = step(conn)
+                total_changes += changes
+                logger.info(f"数据库迁移 v{version} ({description}): {changes} 项")
+            set_schema_version(conn, LATEST_SCHEMA_VERSION)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
         
-        conn.commit()
-        conn.close()
-        
-        if total_changes > 0:
-            logger.info(f"数据库 Schema 迁移完成，共更新 {total_changes} 项")
-            return True
-        else:
-            logger.debug("数据库 Schema 已是最新，无需迁移")
-            return False
+        logger.info(f"数据库 Schema 迁移完成 v{current} -> v{LATEST_SCHEMA_VERSION}，共更新 {total_changes} 项")
+        return total_changes > 0
             
     except Exception as e:
         logger.error(f"数据库迁移失败: {e}")
-        return False
+        raise
+    finally:
+        conn.close()
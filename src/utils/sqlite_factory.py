@@ -0,0 +1,54 @@
+"""
+SQLite 连接工厂
+
+所有 SQLite 连接 (SQLModel 引擎的连接池、db_manager._get_conn() 原生连接、
+Schema 迁移) 都由 connect() 创建，保证使用同一组 PRAGMA:
+
+- auto_vacuum=INCREMENTAL: 新建的数据库可按需回收空闲页 (旧数据库不转换，空闲页由 SQLite 复用)
+- journal_mode=WAL: 读写不互斥，写入只追加 WAL 文件
+- synchronous=NORMAL: WAL 模式下只在 checkpoint 时 fsync，断电最多丢失最后几次提交
+- cache_size: 每个连接的页缓存，统计查询可以复用热页
+- temp_store=MEMORY: GROUP BY / ORDER BY 的临时 B 树放在内存
+- mmap_size: 读取走内存映射，减少 read() 系统调用
+
+随程序发布的只读静态数据包由 connect_readonly() 打开 (immutable，不加锁、不建 WAL)。
+"""
+import sqlite3
+from pathlib import Path
+from src.config import SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE
+
+PRAGMAS = (
+    ("auto_vacuum", "INCREMENTAL"),  # 必须在建表之前设置，对已有数据库无影响
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -SQLITE_CACHE_SIZE_KB),  # 负数表示以 KB 为单位
+    ("temp_store", "MEMORY"),
+    ("mmap_size", SQLITE_MMAP_SIZE),
+)
+
+
+def apply_pragmas(conn):
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def connect(db_path):
+    """
+    创建一个已调优的 sqlite3 连接。
+    连接会在 GUI 线程与持久化线程之间通过连接池复用，因此关闭 check_same_thread
+    (同一时刻只会被一个线程持有)。
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    return apply_pragmas(conn)
+
+
+def connect_readonly(db_path):
+    """
+    以只读方式打开一个不会被修改的数据库文件 (如 src/data/static_data.db)。
+    immutable=1: 跳过文件锁与变更检测，可放在只读的安装目录中。
+    """
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    return conn
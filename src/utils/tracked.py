@@ -0,0 +1,141 @@
+"""
+带变更通知的容器
+
+dict / set / list 的子类，在每次修改后调用 on_change 回调，
+用于 Cultivator 的脏数据追踪 (存档时只写入变化的行)。
+读取操作与内置类型完全相同，copy() / json.dumps 得到的仍是普通容器。
+"""
+
+
+def _noop(*args):
+    pass
+
+
+class TrackedDict(dict):
+    """on_change(key, old): 某个键被设置或删除，old 为修改前的值 (原先不存在时为 None)"""
+    __slots__ = ("_on_change",)
+
+    def __init__(self, data=(), on_change=None):
+        super().__init__(data)
+        self._on_change = on_change or _noop
+
+    def __setitem__(self, key, value):
+        old = dict.get(self, key)
+        dict.__setitem__(self, key, value)
+        self._on_change(key, old)
+
+    def __delitem__(self, key):
+        old = dict.__getitem__(self, key)
+        dict.__delitem__(self, key)
+        self._on_change(key, old)
+
+    def pop(self, key, *default):
+        had = key in self
+        value = dict.pop(self, key, *default)
+        if had:
+            self._on_change(key, value)
+        return value
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self._on_change(key, value)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        items = list(self.items())
+        dict.clear(self)
+        for key, old in items:
+            self._on_change(key, old)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+
+class TrackedSet(set):
+    """on_change(item): 某个元素被加入或移除"""
+    __slots__ = ("_on_change",)
+
+    def __init__(self, data=(), on_change=None):
+        super().__init__(data)
+        self._on_change = on_change or _noop
+
+    def add(self, item):
+        if item not in self:
+            set.add(self, item)
+            self._on_change(item)
+
+    def discard(self, item):
+        if item in self:
+            set.discard(self, item)
+            self._on_change(item)
+
+    def remove(self, item):
+        set.remove(self, item)
+        self._on_change(item)
+
+    def pop(self):
+        item = set.pop(self)
+        self._on_change(item)
+        return item
+
+    def clear(self):
+        items = list(self)
+        set.clear(self)
+        for item in items:
+            self._on_change(item)
+
+    def update(self, *others):
+        for other in others:
+            for item in other:
+                self.add(item)
+
+    def difference_update(self, *others):
+        for other in others:
+            for item in other:
+                self.discard(item)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+
+class TrackedList(list):
+    """on_change(None): 列表内容有任何变化 (列表通常很短，整体重写)"""
+    __slots__ = ("_on_change",)
+
+    def __init__(self, data=(), on_change=None):
+        super().__init__(data)
+        self._on_change = on_change or _noop
+
+    def _changed(self):
+        self._on_change(None)
+
+
+def _mutator(name):
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ("append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(TrackedList, _name, _mutator(_name))
@@ -0,0 +1,66 @@
+"""
+冷启动静态数据加载基准
+
+每轮启动一个新的 Python 进程，模拟 main.py 的启动顺序:
+DataLoader.check_data_update() 之后构造 ItemManager / DialogueManager / EventEngine，
+对比:
+- no cache: 每次从数据库读取并逐行 json.loads
+- cache:    从 static_cache 的 pickle 文件一次读取还原
+分别报告三个管理器的加载耗时 (不含模块导入) 与进程总耗时 (含导入)。
+
+在临时 HOME 下运行，不会读写用户存档。
+
+用法:
+    python tools/benchmark_cold_start.py [轮数]
+"""
+import sys
+import os
+import json
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from src.services.data_loader import DataLoader
+from src.services.static_cache import static_cache
+DataLoader.check_data_update()
+static_cache.enabled = {cache}
+from src.item_manager import ItemManager
+from src.services.event_engine import EventEngine
+t1 = time.perf_counter()
+from src.services.dialogue_manager import dialogue_manager  # 导入时构造单例
+EventEngine(None, ItemManager())
+t2 = time.perf_counter()
+print(json.dumps({{"load": t2 - t1, "total": t2 - t0}}))
+"""
+
+
+def run(mode, home):
+    env = dict(os.environ, HOME=home, PYNPUT_BACKEND="dummy", QT_QPA_PLATFORM="offscreen")
+    code = CHILD.format(root=ROOT, cache=(mode == "cache"))
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as home:
+        # 预热: 导入静态数据并生成缓存
+        run("cache", home)
+        results = {}
+        for mode in ("no cache", "cache"):
+            samples = [run(mode, home) for _ in range(ROUNDS)]
+            load = statistics.median(s["load"] for s in samples) * 1000
+            total = statistics.median(s["total"] for s in samples) * 1000
+            results[mode] = load
+            print(f"  {mode:<10} managers p50 {load:7.2f} ms   process p50 {total:7.1f} ms")
+    print(f"\n  managers speedup x{results['no cache'] / results['cache']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
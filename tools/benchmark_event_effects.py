@@ -0,0 +1,189 @@
+"""
+事件效果执行基准
+
+对比批量模拟 (无界面快进) 时执行事件效果的开销:
+- legacy: 旧版 _apply_effects，每次触发逐键 isinstance 判断取值形状、if/elif 分派、查询物品名称
+- current: 加载时编译为步骤程序，触发时只执行随机取值与对 cultivator 的调用
+并用相同的随机种子检查两者产生的日志与角色状态完全一致。
+
+用法:
+    python tools/benchmark_event_effects.py [事件数]
+无图形环境时可设置 PYNPUT_BACKEND=dummy。
+"""
+import sys
+import os
+import random
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.event_engine import EventEngine
+
+EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+TRIGGERS = 50000
+REPEATS = 5
+
+
+class MockItemManager:
+    def __init__(self):
+        self.flat_items = {f"mat_{i}": {"name": f"灵草{i}"} for i in range(40)}
+        self.tier_lists = {t: {"materials": [f"mat_{i}" for i in range(t * 4, t * 4 + 4)]} for t in range(9)}
+
+    def get_item(self, item_id):
+        return self.flat_items.get(item_id)
+
+    def get_item_name(self, item_id):
+        info = self.flat_items.get(item_id)
+        return info["name"] if info else item_id
+
+    def get_random_material(self, tier):
+        candidates = self.tier_lists.get(tier, {}).get("materials", [])
+        return random.choice(candidates) if candidates else None
+
+
+class MockCultivator:
+    def __init__(self):
+        self.layer_index = 3
+        self.exp = self.money = self.mind = self.body = self.affection = 0
+        self.inventory = {}
+
+    def gain_exp(self, amount):
+        self.exp = max(0, self.exp + amount)
+
+    def modify_stat(self, stat, value):
+        setattr(self, stat, getattr(self, stat) + value)
+
+    def gain_item(self, item_id, count=1):
+        self.inventory[item_id] = self.inventory.get(item_id, 0) + count
+
+    def state(self):
+        return (self.exp, self.money, self.mind, self.body, self.affection, sorted(self.inventory.items()))
+
+
+def make_events(n):
+    """与 events.json 相同形状的效果: 常量 / 范围 / 物品 / 随机材料 / 选项"""
+    rng = random.Random(7)
+    events = []
+    for i in range(n):
+        effects = {}
+        for key in rng.sample(["exp", "money", "mind", "body", "affection"], rng.randint(1, 3)):
+            effects[key] = [rng.randint(1, 20), rng.randint(20, 200)] if rng.random() < 0.5 else rng.randint(-10, 50)
+        if rng.random() < 0.3:
+            effects["items"] = {f"mat_{rng.randrange(40)}": rng.randint(1, 3)}
+        if rng.random() < 0.3:
+            effects["random_material"] = rng.randint(1, 2)
+        evt = {"id": f"bench_evt_{i}", "effects": effects}
+        if rng.random() < 0.1:
+            evt["choices"] = [{"text": "探查", "result": {
+                "success_chance": 0.6,
+                "success_effect": {"text": "收获颇丰", "exp": [10, 50]},
+                "fail_effect": {"text": "铩羽而归", "body": -1},
+            }}]
+        events.append(evt)
+    return events
+
+
+def legacy_apply_effects(item_manager, effects, cultivator):
+    """旧版实现: 每次触发解释效果字典"""
+    logs = []
+    for k, v in effects.items():
+        if k == "text": continue
+        val = 0
+        if isinstance(v, list) and len(v) == 2 and isinstance(v[0], (int, float)):
+            val = random.randint(int(v[0]), int(v[1]))
+        elif isinstance(v, (int, float)):
+            val = int(v)
+        if k == "exp":
+            cultivator.gain_exp(val)
+            logs.append(f"修为 {'+' if val>0 else ''}{val}")
+        elif k == "money":
+            cultivator.money = max(0, cultivator.money + val)
+            logs.append(f"灵石 {'+' if val>0 else ''}{val}")
+        elif k == "mind":
+            cultivator.modify_stat("mind", val)
+            logs.append(f"心魔 {'+' if val>0 else ''}{val}")
+        elif k == "body":
+            cultivator.modify_stat("body", val)
+            logs.append(f"体魄 {'+' if val>0 else ''}{val}")
+        elif k == "affection":
+            cultivator.modify_stat("affection", val)
+            logs.append(f"气运 {'+' if val>0 else ''}{val}")
+        elif k == "items":
+            if isinstance(v, dict):
+                for iid, count in v.items():
+                    cultivator.gain_item(iid, count)
+                    logs.append(f"获得: {item_manager.get_item_name(iid)} x{count}")
+        elif k == "random_material":
+            count = val
+            if count > 0:
+                tier = min(getattr(cultivator, 'layer_index', 0), 8)
+                for _ in range(count):
+                    mat_id = item_manager.get_random_material(tier)
+                    if mat_id:
+                        cultivator.gain_item(mat_id, 1)
+                        logs.append(f"意外收获: {item_manager.get_item_name(mat_id)}")
+    return logs
+
+
+def legacy_trigger(item_manager, event, cultivator):
+    results_text = []
+    if "effects" in event:
+        results_text.extend(legacy_apply_effects(item_manager, event["effects"], cultivator))
+    if "choices" in event and event["choices"]:
+        choice = random.choice(event["choices"])
+        results_text.append(f"[自动选择] {choice['text']}")
+        res = choice.get("result", {})
+        if random.random() < res.get("success_chance", 1.0):
+            eff = res.get("success_effect", {})
+            results_text.append(eff.get("text", "成功!"))
+        else:
+            eff = res.get("fail_effect", {})
+            results_text.append(eff.get("text", "失败!"))
+        results_text.extend(legacy_apply_effects(item_manager, eff, cultivator))
+    return "\n".join(results_text)
+
+
+def simulate(trigger, events, seed):
+    """按固定顺序触发 TRIGGERS 次，返回 (耗时, 日志, 角色状态)"""
+    random.seed(seed)
+    c = MockCultivator()
+    out = []
+    t0 = time.perf_counter()
+    for i in range(TRIGGERS):
+        out.append(trigger(events[i % len(events)], c))
+    return time.perf_counter() - t0, out, c.state()
+
+
+def main():
+    item_manager = MockItemManager()
+    events = make_events(EVENTS)
+    engine = EventEngine(None, item_manager)
+    engine.history = set()
+    t0 = time.perf_counter()
+    engine.events = events
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    # 基准只计效果执行，日志输出 (logger.info) 与历史记录不计入
+    def current(event, c):
+        return "\n".join(engine._records_by_id[event["id"]].program.run(c))
+
+    def legacy(event, c):
+        return legacy_trigger(item_manager, event, c)
+
+    print(f"{EVENTS} events (compile {compile_ms:.1f} ms), {TRIGGERS} triggers, best of {REPEATS}\n")
+    # 交替运行取最优，减少抖动
+    legacy_t = current_t = float("inf")
+    for _ in range(REPEATS):
+        t, legacy_out, legacy_state = simulate(legacy, events, 1)
+        legacy_t = min(legacy_t, t)
+        t, current_out, current_state = simulate(current, events, 1)
+        current_t = min(current_t, t)
+    print(f"  legacy: interpret dict   {TRIGGERS / legacy_t:10.0f} events/s")
+    print(f"  current: compiled steps  {TRIGGERS / current_t:10.0f} events/s")
+    print(f"  speedup x{legacy_t / current_t:.2f}")
+    print(f"\n  identical logs and final state: {legacy_out == current_out and legacy_state == current_state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+事件触发选择基准
+
+生成大量 (默认 10,000 个，模组规模) 随机事件，对比:
+- legacy: 旧版 check_triggers，每次线性扫描全部事件并逐个 get() 条件，再线性加权抽取
+- current: 加载时归一化 + 按 (境界, 状态) 分桶，预计算累积权重后二分抽取
+并检查两者在相同条件下可触发的事件集合相同、抽取的权重分布接近。
+
+用法:
+    python tools/benchmark_event_engine.py [事件数]
+无图形环境时可设置 PYNPUT_BACKEND=dummy。
+"""
+import sys
+import os
+import random
+import statistics
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.event_engine import EventEngine
+
+EVENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+CALLS = 2000
+STATES = ["IDLE", "WORK", "COMBAT"]
+
+
+class MockCultivator:
+    def __init__(self, layer, money, mind):
+        self.layer_index = layer
+        self.money = money
+        self.mind = mind
+
+
+def make_events(n):
+    rng = random.Random(42)
+    events = []
+    for i in range(n):
+        lo = rng.randint(0, 8)
+        evt = {"id": f"bench_evt_{i}", "weight": rng.randint(1, 50), "effects": {"exp": 10}}
+        cond = {"min_layer": lo, "max_layer": rng.randint(lo, 9)}
+        if rng.random() < 0.2:
+            cond["required_state"] = rng.choice(STATES)
+        if rng.random() < 0.05:
+            cond["min_money"] = rng.randint(100, 10000)
+        if rng.random() < 0.03:
+            evt["unique"] = True
+        evt["conditions"] = cond
+        events.append(evt)
+    return events
+
+
+def legacy_eligible(events, history, cultivator, current_state_name):
+    possible_events = []
+    layer, mind, money = cultivator.layer_index, cultivator.mind, cultivator.money
+    for evt in events:
+        if evt.get("unique", False) and evt["id"] in history:
+            continue
+        cond = evt.get("conditions", {})
+        min_layer = evt.get("min_layer", cond.get("min_layer", 0))
+        max_layer = evt.get("max_layer", cond.get("max_layer", 99))
+        min_money = evt.get("min_money", cond.get("min_money", 0))
+        min_mind = evt.get("min_mind", cond.get("min_mind", 0))
+        req_state = evt.get("required_state", cond.get("required_state", None))
+        if req_state and req_state != current_state_name:
+            continue
+        if layer < min_layer or layer > max_layer or money < min_money or mind < min_mind:
+            continue
+        possible_events.append((evt.get("weight", 10), evt))
+    return possible_events
+
+
+def legacy_check_triggers(events, history, cultivator, current_state_name):
+    """旧版实现: 线性扫描 + 线性加权抽取"""
+    possible_events = legacy_eligible(events, history, cultivator, current_state_name)
+    if not possible_events:
+        return None
+    total_weight = sum(w for w, _ in possible_events)
+    r = random.uniform(0, total_weight)
+    upto = 0
+    for w, evt in possible_events:
+        if r <= upto + w:
+            return evt
+        upto += w
+    return possible_events[0][1]
+
+
+def measure(fn):
+    cultivators = [MockCultivator(layer, 5000, 0) for layer in range(9)]
+    samples = []
+    for i in range(CALLS):
+        c = cultivators[i % len(cultivators)]
+        state = STATES[i % len(STATES)]
+        t0 = time.perf_counter()
+        fn(c, state)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    events = make_events(EVENTS)
+    engine = EventEngine(None, None)
+    t0 = time.perf_counter()
+    engine.events = events
+    load_ms = (time.perf_counter() - t0) * 1000
+    engine.history = {e["id"] for e in events[::7] if e.get("unique")}
+    print(f"{EVENTS} events (normalize {load_ms:.1f} ms), {CALLS} trigger checks\n")
+
+    legacy = measure(lambda c, s: legacy_check_triggers(events, engine.history, c, s))
+    # 首轮填充分桶缓存后再计时
+    measure(engine.check_triggers)
+    current = measure(engine.check_triggers)
+    print(f"  legacy: linear scan      p50 {legacy:9.1f} us")
+    print(f"  current: bucket + bisect p50 {current:9.1f} us")
+    print(f"  speedup x{legacy / current:.1f}")
+
+    # 一致性: 可触发的事件集合相同，且按权重抽取的统计量接近 (高权重事件占比)
+    c = MockCultivator(4, 5000, 0)
+    expected = {e["id"] for _, e in legacy_eligible(events, engine.history, c, "WORK")}
+    bucket = engine._bucket(4, "WORK")
+    actual = {r.id for r in bucket.static} | {
+        r.id for r in bucket.dynamic
+        if not (r.unique and r.id in engine.history) and c.money >= r.min_money and c.mind >= r.min_mind
+    }
+    draws = 3000
+    old = sum(legacy_check_triggers(events, engine.history, c, "WORK")["weight"] > 25 for _ in range(draws))
+    new = sum(engine.check_triggers(c, "WORK")["weight"] > 25 for _ in range(draws))
+    print(f"\n  eligible set identical: {expected == actual} ({len(expected)} events)")
+    print(f"  share of draws with weight > 25: legacy {old / draws:.3f}, current {new / draws:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+InputMonitor 回调微基准
+
+对比旧实现 (threading.Lock + str(key) + 四个计数器) 与当前的单写者累加器实现，
+测量单次 on_press / on_click / on_scroll 在钩子线程上的开销。
+
+用法:
+    python tools/benchmark_input_monitor.py
+无图形环境时可设置 PYNPUT_BACKEND=dummy 以便创建监听器对象 (不会真正开始监听)。
+"""
+import sys
+import os
+import timeit
+from threading import Lock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pynput.keyboard import Key, KeyCode
+from src.input_monitor import InputMonitor
+
+ITERATIONS = 200000
+
+
+class LegacyCallbacks:
+    """旧版 InputMonitor 回调逻辑的原样复刻 (用作基准)"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._kb_count = 0
+        self._mouse_count = 0
+        self._acc_kb_count = 0
+        self._acc_mouse_count = 0
+        self.pressed_keys = set()
+
+    def on_press(self, key):
+        try:
+            k_id = key.char
+        except AttributeError:
+            k_id = str(key)
+
+        with self._lock:
+            if k_id in self.pressed_keys:
+                return
+            self.pressed_keys.add(k_id)
+            self._kb_count += 1
+            self._acc_kb_count += 1
+
+    def on_release(self, key):
+        try:
+            k_id = key.char
+        except AttributeError:
+            k_id = str(key)
+
+        with self._lock:
+            if k_id in self.pressed_keys:
+                self.pressed_keys.remove(k_id)
+
+    def on_click(self, x, y, button, pressed):
+        if pressed:
+            with self._lock:
+                self._mouse_count += 1
+                self._acc_mouse_count += 1
+
+    def on_scroll(self, x, y, dx, dy):
+        with self._lock:
+            self._mouse_count += 1
+            self._acc_mouse_count += 1
+
+
+def bench(label, fn):
+    total = min(timeit.repeat(fn, number=ITERATIONS, repeat=5))
+    ns = total / ITERATIONS * 1e9
+    print(f"  {label:<28} {ns:8.1f} ns/call")
+    return ns
+
+
+def run_suite(name, target):
+    char_key = KeyCode.from_char('a')
+    special_key = Key.backspace
+
+    print(f"[{name}]")
+
+    def press_release_char():
+        target.on_press(char_key)
+        target.on_release(char_key)
+
+    def press_release_special():
+        target.on_press(special_key)
+        target.on_release(special_key)
+
+    def click():
+        target.on_click(0, 0, None, True)
+
+    def scroll():
+        target.on_scroll(0, 0, 0, 1)
+
+    results = {
+        'char': bench("press+release (char)", press_release_char),
+        'special': bench("press+release (Key.*)", press_release_special),
+        'click': bench("on_click", click),
+        'scroll': bench("on_scroll", scroll),
+    }
+    return results
+
+
+def main():
+    legacy = run_suite("legacy: Lock + str(key)", LegacyCallbacks())
+    monitor = InputMonitor()  # 不调用 start()，只测回调本身
+    current = run_suite("current: per-thread accumulators", monitor)
+
+    print("\n[speedup]")
+    for k in legacy:
+        print(f"  {k:<10} x{legacy[k] / current[k]:.2f}")
+
+    # 计数正确性 sanity check
+    kb, ms = monitor.pop_accumulated_counts()
+    print(f"\ncounted keys={kb}, mouse={ms}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+物品定义内存与详情渲染基准
+
+对比:
+- legacy: SELECT * 得到的 dict 行 (保留 effect_json 原文)，每次点击重新生成效果列表并格式化 HTML
+- current: __slots__ 的 ItemRecord (effect / recipe 已解析)，详情 HTML 每个物品只渲染一次
+测量物品表常驻内存 (tracemalloc) 与背包/坊市点击时获取详情的耗时，并检查两者渲染的 HTML 相同。
+
+用法:
+    python tools/benchmark_item_records.py
+无图形环境时可设置 PYNPUT_BACKEND=dummy。
+"""
+import sys
+import os
+import json
+import statistics
+import time
+import tracemalloc
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.item_manager import ItemManager, ItemRecord
+from src.services.data_loader import DataLoader
+
+CLICKS = 20000
+
+
+def legacy_load():
+    """旧版 _load_from_db 的行结构"""
+    items = {}
+    with DataLoader.static_conn() as conn:
+        conn.row_factory = lambda c, r: dict(zip([col[0] for col in c.description], r))
+        for row in conn.execute("SELECT * FROM item_definitions").fetchall():
+            if row['effect_json']:
+                row['effect'] = json.loads(row['effect_json'])
+            items[row['id']] = row
+        for r_row in conn.execute("SELECT * FROM recipes").fetchall():
+            item = items.get(r_row['result_item_id'])
+            if item is not None:
+                if r_row['ingredients_json']:
+                    item['recipe'] = json.loads(r_row['ingredients_json'])
+                item['craft_time'] = r_row['craft_time']
+                item['success_rate'] = r_row['success_rate']
+    return items
+
+
+def current_load():
+    items = {}
+    with DataLoader.static_conn() as conn:
+        for item_id, name, itype, tier, description, price, effect_json in conn.execute(
+            "SELECT id, name, type, tier, description, price, effect_json FROM item_definitions"
+        ):
+            items[item_id] = ItemRecord(item_id, name, itype, tier, description, price,
+                                        json.loads(effect_json) if effect_json else None)
+        for res_id, ing_json, craft_time, success_rate in conn.execute(
+            "SELECT result_item_id, ingredients_json, craft_time, success_rate FROM recipes"
+        ):
+            item = items.get(res_id)
+            if item is not None:
+                item.recipe = json.loads(ing_json) if ing_json else None
+                item.craft_time, item.success_rate = craft_time, success_rate
+    return items
+
+
+def measure_memory(load):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    items = load()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return items, sum(s.size_diff for s in after.compare_to(before, "filename"))
+
+
+def measure_clicks(fn, ids):
+    samples = []
+    for i in range(CLICKS):
+        t0 = time.perf_counter()
+        fn(ids[i % len(ids)])
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    manager = ItemManager()
+    legacy_items, legacy_mem = measure_memory(legacy_load)
+    current_items, current_mem = measure_memory(current_load)
+    ids = list(current_items)
+    print(f"{len(ids)} items, {CLICKS} detail lookups\n")
+
+    print(f"  item table memory: legacy {legacy_mem / 1024:7.1f} KiB, current {current_mem / 1024:7.1f} KiB")
+    legacy_t = measure_clicks(lambda iid: ItemManager._render_details_html(legacy_items[iid]), ids)
+    current_t = measure_clicks(manager.get_item_details_html, ids)
+    print(f"  detail html p50:   legacy {legacy_t:7.2f} us,  current {current_t:7.2f} us (x{legacy_t / current_t:.0f})")
+
+    same = all(ItemManager._render_details_html(legacy_items[iid]) == manager.get_item_details_html(iid) for iid in ids)
+    print(f"\n  identical html: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+存档写入基准
+
+背包中有数百种物品时，对比:
+- legacy: 旧版 save_data 的整表重写 (DELETE 背包/坊市/一面之缘后全部重新插入)
+- current: 脏数据追踪后的增量写入 (只 upsert/delete 变化的行)
+分别测量 GUI 线程上生成快照的耗时与写入 (单事务) 的耗时。
+
+写入发生在临时目录的独立数据库上，不会修改用户存档。
+
+用法:
+    python tools/benchmark_save_data.py [物品种类数]
+无图形环境时可设置 PYNPUT_BACKEND=dummy。
+"""
+import sys
+import os
+import json
+import statistics
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cultivator import Cultivator
+from src.database import DatabaseManager
+
+ENTRIES = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+ROUNDS = 200
+
+
+def legacy_snapshot(c):
+    """旧版 save_data 在 GUI 线程上构造的完整快照"""
+    status = {
+        "layer_index": c.layer_index, "current_exp": c.exp, "money": c.money,
+        "stat_body": c.body, "stat_mind": c.mind, "stat_luck": c.affection,
+        "talent_points": c.talent_points, "talent_json": json.dumps(c.talents),
+        "last_save_time": int(time.time()), "equipped_title": c.equipped_title,
+        "death_count": c.death_count, "legacy_points": c.legacy_points,
+        "daily_reward_claimed": c.daily_reward_claimed,
+        "last_market_refresh_time": int(c.last_market_refresh),
+    }
+    inventory = [(iid, count) for iid, count in c.inventory.items() if count > 0]
+    market = [(g['id'], g['price'], g['discount']) for g in c.market_goods]
+    used_once = [(iid,) for iid in c.used_once_items]
+    return status, inventory, market, used_once
+
+
+def legacy_write(conn, status, inventory, market, used_once):
+    columns = list(status.keys())
+    conn.execute(f"UPDATE player_status SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = 1",
+                 [status[c] for c in columns])
+    conn.execute("DELETE FROM player_inventory")
+    conn.executemany("INSERT INTO player_inventory (item_id, count) VALUES (?, ?)", inventory)
+    conn.execute("DELETE FROM market_stock")
+    conn.executemany("INSERT INTO market_stock (item_id, count, price, discount) VALUES (?, 1, ?, ?)", market)
+    conn.execute("DELETE FROM used_once_items")
+    conn.executemany("INSERT INTO used_once_items (item_id) VALUES (?)", used_once)
+
+
+def mutate(c, i):
+    # 一次典型的游戏内变化: 掉落一件物品 + 修为增长
+    iid = f"bench_item_{i % ENTRIES}"
+    c.inventory[iid] = c.inventory.get(iid, 0) + 1
+    c.exp += 10
+
+
+def report(label, samples):
+    p50 = statistics.median(samples) * 1e6
+    print(f"  {label:<20} p50 {p50:9.1f} us")
+    return p50
+
+
+def run(manager, c, label, snapshot, write):
+    snap_t, write_t = [], []
+    for i in range(ROUNDS):
+        mutate(c, i)
+        t0 = time.perf_counter()
+        data = snapshot(c)
+        snap_t.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        with manager._get_conn() as conn:
+            write(conn, data)
+        write_t.append(time.perf_counter() - t0)
+
+    print(f"[{label}]")
+    return report("snapshot (GUI)", snap_t), report("write (worker)", write_t)
+
+
+def main():
+    c = Cultivator()
+    c.inventory = {f"bench_item_{i}": i % 7 + 1 for i in range(ENTRIES)}
+    c.used_once_items = {f"bench_item_{i}" for i in range(0, ENTRIES, 10)}
+    print(f"{ENTRIES} inventory entries, {ROUNDS} saves (1 item + exp changed per save)\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        # 基线: 两种方式都从一份完整存档开始
+        with manager._get_conn() as conn:
+            legacy_write(conn, *legacy_snapshot(c))
+        c._reset_dirty()
+
+        legacy = run(manager, c, "legacy: full rewrite", legacy_snapshot,
+                     lambda conn, data: legacy_write(conn, *data))
+        current = run(manager, c, "current: dirty delta", lambda c: c._drain_save_delta(),
+                      lambda conn, delta: delta.write(conn))
+        manager.engine.dispose()
+
+    print("\n[speedup]")
+    print(f"  snapshot x{legacy[0] / current[0]:.2f}")
+    print(f"  write    x{legacy[1] / current[1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+SQLite 连接调优基准
+
+对比旧的连接方式 (每次调用新建 sqlite3.connect，默认 PRAGMA，rollback journal)
+与当前的连接池 + sqlite_factory 调优 (WAL / synchronous=NORMAL / cache / mmap)：
+- 每分钟活动记录写入延迟 (单行 INSERT + commit)
+- 统计查询延迟 (get_aggregated_stats 的按小时聚合)
+
+两组都在临时目录的独立数据库上运行，基准数据不会写入用户存档。
+
+用法:
+    python tools/benchmark_sqlite_tuning.py [天数]
+"""
+import sys
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlmodel import SQLModel, create_engine
+from src.database import DatabaseManager
+
+DAYS = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+WRITES = 200
+QUERIES = 20
+
+STATS_SQL = """
+    SELECT strftime('%H', timestamp, 'unixepoch', 'localtime') as time_bucket,
+           SUM(keys_count), SUM(mouse_count), COUNT(*)
+    FROM activity_logs_minute
+    WHERE timestamp >= ? AND timestamp <= ?
+    GROUP BY time_bucket
+    ORDER BY time_bucket ASC
+"""
+
+
+def seed_rows(now):
+    start = now - DAYS * 86400
+    return [
+        DatabaseManager.make_activity_row(ts, 60 + ts % 50, 20 + ts % 13)
+        for ts in range(start, now, 60)
+    ]
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p50 = statistics.median(samples) * 1000
+    p95 = samples[int(len(samples) * 0.95) - 1] * 1000
+    print(f"  {label:<24} p50 {p50:8.3f} ms   p95 {p95:8.3f} ms")
+    return p50
+
+
+def bench_legacy(db_path, rows, now):
+    # 旧实现: 建表后每次操作都新开连接
+    SQLModel.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+    with sqlite3.connect(db_path) as conn:
+        DatabaseManager.write_activities(conn, rows)
+
+    writes = []
+    for i in range(WRITES):
+        row = DatabaseManager.make_activity_row(now + i * 60, 80, 30)
+        t0 = time.perf_counter()
+        conn = sqlite3.connect(db_path)
+        with conn:
+            DatabaseManager.write_activities(conn, [row])
+        conn.close()
+        writes.append(time.perf_counter() - t0)
+
+    queries = []
+    for _ in range(QUERIES):
+        t0 = time.perf_counter()
+        conn = sqlite3.connect(db_path)
+        conn.execute(STATS_SQL, (now - DAYS * 86400, now)).fetchall()
+        conn.close()
+        queries.append(time.perf_counter() - t0)
+    return writes, queries
+
+
+def bench_tuned(db_path, rows, now):
+    manager = DatabaseManager(f"sqlite:///{db_path}")
+    with manager._get_conn() as conn:
+        DatabaseManager.write_activities(conn, rows)
+
+    writes = []
+    for i in range(WRITES):
+        row = DatabaseManager.make_activity_row(now + i * 60, 80, 30)
+        t0 = time.perf_counter()
+        manager.insert_activities([row])
+        writes.append(time.perf_counter() - t0)
+
+    queries = []
+    for _ in range(QUERIES):
+        t0 = time.perf_counter()
+        manager.get_aggregated_stats(now - DAYS * 86400, now, 'hour')
+        queries.append(time.perf_counter() - t0)
+    manager.engine.dispose()
+    return writes, queries
+
+
+def main():
+    now = int(time.time())
+    rows = seed_rows(now)
+    print(f"seeded {len(rows)} minute rows ({DAYS} days), {WRITES} writes, {QUERIES} queries\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("[legacy: sqlite3.connect per call, default pragmas]")
+        lw, lq = bench_legacy(os.path.join(tmp, "legacy.db"), rows, now)
+        legacy_w = report("per-minute write", lw)
+        legacy_q = report("hourly stats query", lq)
+
+        print("[current: pooled connections, WAL + tuned pragmas]")
+        tw, tq = bench_tuned(os.path.join(tmp, "tuned.db"), rows, now)
+        tuned_w = report("per-minute write", tw)
+        tuned_q = report("hourly stats query", tq)
+
+    print("\n[speedup]")
+    print(f"  write  x{legacy_w / tuned_w:.2f}")
+    print(f"  query  x{legacy_q / tuned_q:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+构建只读静态数据包
+
+将 src/data/*.json (物品、丹方、事件、对话) 编译为 src/data/static_data.db，
+随程序一起发布 (PyInstaller spec 的 datas 已包含 src/data)。运行时以只读方式打开，
+不再导入用户数据库。数据包中记录了各 JSON 文件的 sha256，文件变化后数据包视为过期，
+运行时自动回退到导入用户数据库，重新运行本脚本即可。
+
+用法 (打包前执行):
+    python tools/build_static_pack.py [输出路径]
+"""
+import sys
+import os
+import sqlite3
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.data_loader import DataLoader, STATIC_PACK_FILE, STATIC_PACK_FORMAT, STATIC_TABLES
+from src.utils.schema_migration import create_tables_from_models
+
+
+def build(output):
+    tmp = output + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        create_tables_from_models(conn, STATIC_TABLES + ("system_metadata",))
+        synced = DataLoader.sync(conn, DataLoader.source_paths(), force=True)
+        conn.execute("INSERT OR REPLACE INTO system_metadata (key, value) VALUES ('pack_format', ?)",
+                     (STATIC_PACK_FORMAT,))
+        conn.commit()
+        # 查询规划统计 + 紧凑存储 (只读，无空闲页)
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp, output)
+    print(f"Static pack written: {output} ({os.path.getsize(output) // 1024} KB, sources: {', '.join(synced)})")
+    return synced
+
+
+if __name__ == "__main__":
+    build(sys.argv[1] if len(sys.argv) > 1 else STATIC_PACK_FILE)
@@ -0,0 +1,97 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.achievement_manager import AchievementManager
+
+
+def ach(ach_id, ctype, target, threshold):
+    return {"id": ach_id, "condition_type": ctype, "condition_target": target,
+            "threshold": threshold, "status": 0, "unlocked_at": None, "category": "action"}
+
+
+class MockCultivator:
+    money = 0
+    inventory = {}
+
+
+class TestAchievementIndex(unittest.TestCase):
+    def setUp(self):
+        self.manager = AchievementManager()
+        self.manager._build_index([
+            ach("kb", "stat_total", "keyboard", 100),
+            ach("rich", "currency", "money", 1000),
+            ach("poor", "currency_low", "money", 10),
+            ach("deaths", "stat_total", "deaths", 5),
+        ])
+        self.evaluated = []
+        original = self.manager._evaluate
+
+        def spy(a, stats, cultivator):
+            self.evaluated.append(a["id"])
+            return original(a, stats, cultivator)
+        self.manager._evaluate = spy
+
+    def check(self, **stats):
+        self.evaluated.clear()
+        with patch("src.services.achievement_manager.persistence_worker") as worker:
+            unlocked = self.manager._check(dict(stats), MockCultivator())
+        return [a["id"] for a in unlocked], sorted(self.evaluated), worker
+
+    def test_only_dependents_of_changed_stats_are_evaluated(self):
+        self.check(keyboard=0, money=50)
+        # 未变化: 不评估任何成就
+        self.assertEqual(self.check(keyboard=0, money=50)[1], [])
+        # keyboard 变化: 只评估依赖 keyboard 的成就
+        self.assertEqual(self.check(keyboard=50, money=50)[1], ["kb", "poor"])
+
+    def test_unlock_is_batched_and_removed_from_index(self):
+        self.check(keyboard=0, money=0)
+        unlocked, _, worker = self.check(keyboard=1500, money=5)
+        self.assertEqual(sorted(unlocked), ["kb", "poor"])
+        worker.submit.assert_called_once()
+        self.assertEqual(self.manager._achievements["kb"]["status"], 1)
+
+        # 已解锁的成就不再评估
+        self.assertEqual(self.check(keyboard=1600, money=2000)[1], ["rich"])
+
+    def test_progress_view_is_cached_until_stats_change(self):
+        self.check(keyboard=25, money=50)
+        progress = {a["id"]: a for a in self.manager.get_progress(MockCultivator())}
+        self.assertEqual(progress["kb"]["current"], 25)
+        self.assertAlmostEqual(progress["kb"]["progress"], 0.25)
+        self.assertIsNone(progress["poor"]["progress"])  # 低于阈值类条件无法度量进度
+        # 统计中没有的目标: 无法度量，而不是 0 进度
+        self.assertIsNone(progress["deaths"]["current"])
+        self.assertIsNone(progress["deaths"]["progress"])
+
+        version = self.manager.progress_version
+        self.assertIs(self.manager.get_progress(MockCultivator()), self.manager.get_progress(MockCultivator()))
+        self.check(keyboard=25, money=50)
+        self.assertEqual(self.manager.progress_version, version)
+        self.check(keyboard=30, money=50)
+        self.assertGreater(self.manager.progress_version, version)
+
+    def test_claim_reward_is_queued_without_waiting(self):
+        self.check(keyboard=0, money=50)
+        self.check(keyboard=150, money=50)
+        self.manager._achievements["kb"].update(reward_type="title", reward_value="title_focus")
+
+        with patch("src.services.achievement_manager.persistence_worker") as worker:
+            ok, msg = self.manager.claim_reward(MockCultivator(), "kb")
+            again, _ = self.manager.claim_reward(MockCultivator(), "kb")
+        self.assertTrue(ok)
+        self.assertIn("[入定]", msg)
+        self.assertFalse(again)
+        self.assertEqual(self.manager._achievements["kb"]["status"], 2)
+        worker.flush.assert_not_called()
+        worker.submit.assert_called_once()
+        self.assertIsNotNone(worker.submit.call_args.kwargs["after_commit"])
+
+
+if __name__ == '__main__':
+    unittest.main()
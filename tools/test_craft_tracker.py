@@ -0,0 +1,63 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.item_manager import CraftTracker
+from src.utils.tracked import TrackedDict
+
+
+class MockItemManager:
+    def __init__(self, recipes):
+        self.recipes = recipes
+        self.recipe_users = {}
+        for recipe_id, recipe in recipes.items():
+            for mat_id, count in recipe.items():
+                self.recipe_users.setdefault(mat_id, []).append((recipe_id, count))
+
+
+def brute_force(recipes, inventory):
+    return {rid for rid, recipe in recipes.items()
+            if all(inventory.get(m, 0) >= c for m, c in recipe.items())}
+
+
+class TestCraftTracker(unittest.TestCase):
+    def setUp(self):
+        self.recipes = {
+            "pill_a": {"herb": 2, "water": 1},
+            "pill_b": {"herb": 1},
+            "pill_c": {"ore": 3, "water": 2},
+        }
+        self.tracker = CraftTracker(MockItemManager(self.recipes))
+        self.inventory = TrackedDict({"herb": 1}, lambda k, old: self.tracker.on_change(k, self.inventory.get(k, 0)))
+        self.tracker.reset(self.inventory)
+
+    def test_incremental_matches_full_check(self):
+        self.assertEqual(self.tracker.craftable, {"pill_b"})
+        steps = [("water", 1), ("herb", 2), ("ore", 3), ("water", 2), ("herb", 0), ("ore", None), ("herb", 5)]
+        for item_id, count in steps:
+            version = self.tracker.version
+            before = set(self.tracker.craftable)
+            if count is None:
+                del self.inventory[item_id]
+            else:
+                self.inventory[item_id] = count
+            self.assertEqual(self.tracker.craftable, brute_force(self.recipes, self.inventory), (item_id, count))
+            self.assertEqual(self.tracker.version != version, self.tracker.craftable != before)
+
+        self.assertEqual(self.tracker.missing["pill_c"], {"ore"})
+
+    def test_unrelated_items_and_reset(self):
+        version = self.tracker.version
+        self.inventory["junk"] = 99
+        self.assertEqual(self.tracker.version, version)
+
+        self.tracker.reset({"ore": 3, "water": 2})
+        self.assertEqual(self.tracker.craftable, {"pill_c"})
+        self.assertGreater(self.tracker.version, version)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import sys
+import os
+import json
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import DatabaseManager
+from src.services.data_loader import DataLoader, HASH_KEY_PREFIX
+from tools.build_static_pack import build as build_static_pack
+
+
+ITEMS = {"tier_0": {"materials": [
+    {"id": "herb", "name": "灵草", "type": "material", "tier": 0, "price": 5, "desc": "", "effect": {}},
+], "pills": [
+    {"id": "pill", "name": "丹药", "type": "consumable", "tier": 0, "price": 20, "desc": "",
+     "effect": {"exp": 10}, "recipe": {"herb": 2}},
+]}}
+EVENTS = [{"id": "evt_1", "type": "random", "weight": 5}]
+DIALOGUES = [{"id": "dia_1", "text": "你好", "type": "idle"}]
+
+
+class TestDataLoaderSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.manager = DatabaseManager(f"sqlite:///{os.path.join(self.tmp, 'test.db')}")
+        self.paths = {}
+        for name, data in (("items", ITEMS), ("events", EVENTS), ("dialogues", DIALOGUES)):
+            self.paths[name] = os.path.join(self.tmp, f"{name}.json")
+            self.write(name, data)
+
+    def tearDown(self):
+        self.manager.engine.dispose()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write(self, name, data):
+        with open(self.paths[name], 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def sync(self, force=False):
+        with self.manager._get_conn() as conn:
+            return DataLoader.sync(conn, self.paths, force=force)
+
+    def count(self, table):
+        with self.manager._get_conn() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_only_changed_sources_reload(self):
+        self.assertEqual(self.sync(), ["items", "events", "dialogues"])
+        self.assertEqual(self.count("item_definitions"), 2)
+        self.assertEqual(self.count("recipes"), 1)
+
+        # 内容未变: 不重新导入
+        self.assertEqual(self.sync(), [])
+
+        self.write("events", EVENTS + [{"id": "evt_2", "type": "random"}])
+        self.assertEqual(self.sync(), ["events"])
+        self.assertEqual(self.count("event_definitions"), 2)
+
+        self.assertEqual(self.sync(force=True), ["items", "events", "dialogues"])
+
+    def test_invalid_file_keeps_previous_data(self):
+        self.sync()
+        with open(self.paths["events"], 'w', encoding='utf-8') as f:
+            f.write("{broken")
+        with self.assertRaises(ValueError):
+            self.sync()
+        self.assertEqual(self.count("event_definitions"), 1)
+        # 失败的同步不更新哈希: 恢复原文件后与数据库一致，无需重新导入
+        self.write("events", EVENTS)
+        self.assertEqual(self.sync(), [])
+
+    def test_static_pack_matches_sources(self):
+        pack = os.path.join(self.tmp, "static_data.db")
+        build_static_pack(pack)
+        self.assertTrue(DataLoader.static_pack_available(pack))
+
+        # 数据文件变化后 (哈希不一致) 数据包视为过期
+        conn = sqlite3.connect(pack)
+        conn.execute("UPDATE system_metadata SET value = 'stale' WHERE key = ?", (HASH_KEY_PREFIX + "events",))
+        conn.commit()
+        conn.close()
+        self.assertFalse(DataLoader.static_pack_available(pack))
+
+    def test_build_script_does_not_create_user_database(self):
+        # 打包机/CI 上运行构建脚本不应创建或迁移用户数据库
+        home = os.path.join(self.tmp, "home")
+        os.makedirs(home)
+        env = dict(os.environ, HOME=home, LOCALAPPDATA=home)
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "build_static_pack.py")
+        subprocess.run([sys.executable, script, os.path.join(self.tmp, "pack.db")],
+                       env=env, check=True, capture_output=True)
+        created = [name for _, _, files in os.walk(home) for name in files]
+        self.assertNotIn("user_data.db", created)
+
+    def test_numeric_version_order(self):
+        self.assertGreater(DataLoader._version_key("1000"), DataLoader._version_key("999"))
+        self.assertGreater(DataLoader._version_key("007"), DataLoader._version_key("006"))
+
+
+if __name__ == '__main__':
+    unittest.main()
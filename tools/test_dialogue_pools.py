@@ -0,0 +1,77 @@
+import sys
+import os
+import unittest
+from collections import Counter
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.dialogue_manager import dialogue_manager
+
+
+class MockCultivator:
+    def __init__(self, layer, mind, state):
+        self.layer_index = layer
+        self.mind = mind
+        self.current_state_name = state
+
+
+def expected_texts(dialogues, c, clicks):
+    """旧版逐条过滤 (min_daily_clicks 按今日点击数判断)"""
+    texts = set()
+    for d in dialogues:
+        cond = d["conditions"]
+        if "min_layer" in cond and c.layer_index < cond["min_layer"]: continue
+        if "max_layer" in cond and c.layer_index > cond["max_layer"]: continue
+        if "min_mind" in cond and c.mind < cond["min_mind"]: continue
+        if "required_state" in cond and c.current_state_name != cond["required_state"]: continue
+        if "min_daily_clicks" in cond and clicks < cond["min_daily_clicks"]: continue
+        texts.add(d["text"])
+    return texts
+
+
+class TestDialoguePools(unittest.TestCase):
+    def setUp(self):
+        self._saved = dialogue_manager.dialogues
+        dialogue_manager.dialogues = [
+            {"id": "common", "text": "common", "conditions": {}, "weight": 10},
+            {"id": "low", "text": "low", "conditions": {"max_layer": 1}, "weight": 10},
+            {"id": "mind50", "text": "mind50", "conditions": {"min_mind": 50}, "weight": 10},
+            {"id": "mind80", "text": "mind80", "conditions": {"min_mind": 80, "min_layer": 2}, "weight": 10},
+            {"id": "work", "text": "work", "conditions": {"required_state": "WORK"}, "weight": 10},
+            {"id": "clicks", "text": "clicks", "conditions": {"min_daily_clicks": 5000}, "weight": 10},
+            {"id": "rare", "text": "rare", "conditions": {}, "weight": 0},
+        ]
+        dialogue_manager.invalidate()
+
+    def tearDown(self):
+        dialogue_manager.dialogues = self._saved
+        dialogue_manager.invalidate()
+
+    def test_pool_matches_linear_filter(self):
+        for layer in (0, 1, 2, 5):
+            for mind in (0, 49, 50, 79, 80, 100):
+                for state in ("IDLE", "WORK"):
+                    for clicks in (0, 4999, 5000, 20000):
+                        c = MockCultivator(layer, mind, state)
+                        key = (layer, mind, state, clicks)
+                        drawn = {dialogue_manager.get_random_dialogue(c, clicks) for _ in range(200)}
+                        self.assertEqual(drawn, expected_texts(dialogue_manager.dialogues, c, clicks) - {"rare"}, key)
+
+    def test_weighted_draw_and_reload(self):
+        c = MockCultivator(5, 0, "IDLE")
+        counts = Counter(dialogue_manager.get_random_dialogue(c) for _ in range(3000))
+        self.assertEqual(set(counts), {"common"})
+
+        dialogue_manager.dialogues.append({"id": "heavy", "text": "heavy", "conditions": {}, "weight": 90})
+        dialogue_manager.invalidate()
+        counts = Counter(dialogue_manager.get_random_dialogue(c) for _ in range(3000))
+        self.assertAlmostEqual(counts["heavy"] / 3000, 0.9, delta=0.03)
+
+        dialogue_manager.dialogues = []
+        dialogue_manager.invalidate()
+        self.assertEqual(dialogue_manager.get_random_dialogue(c), "...")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import sys
+import os
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.event_engine import EventEngine
+
+
+class MockCultivator:
+    layer_index = 2
+    money = 0
+    mind = 0
+
+
+class EffectCultivator(MockCultivator):
+    def __init__(self):
+        self.exp = 0
+        self.items = {}
+
+    def gain_exp(self, amount):
+        self.exp += amount
+
+    def modify_stat(self, stat, value):
+        setattr(self, stat, getattr(self, stat) + value)
+
+    def gain_item(self, item_id, count=1):
+        self.items[item_id] = self.items.get(item_id, 0) + count
+
+
+class MockItemManager:
+    def get_item(self, item_id):
+        return {"name": "灵草"} if item_id == "herb" else None
+
+    def get_item_name(self, item_id):
+        return "灵草" if item_id == "herb" else item_id
+
+
+class TestEventSelection(unittest.TestCase):
+    def setUp(self):
+        self.engine = EventEngine(None, None)
+        self.engine.history = set()
+        self.cultivator = MockCultivator()
+
+    def draw(self, n=2000, state="IDLE"):
+        return Counter(
+            (evt or {}).get("id") for evt in (self.engine.check_triggers(self.cultivator, state) for _ in range(n))
+        )
+
+    def test_dynamic_conditions(self):
+        self.engine.events = [
+            {"id": "rich", "conditions": {"min_money": 100}},
+            {"id": "once", "unique": True},
+            {"id": "work_only", "required_state": "WORK"},
+        ]
+        self.assertEqual(set(self.draw()), {"once"})
+
+        self.cultivator.money = 100
+        self.engine.history.add("once")
+        self.assertEqual(set(self.draw()), {"rich"})
+        self.assertEqual(set(self.draw(state="WORK")), {"rich", "work_only"})
+
+        self.cultivator.money = 0
+        self.assertEqual(set(self.draw()), {None})
+
+    def test_weighted_draw_and_reassignment(self):
+        self.engine.events = [{"id": "a", "weight": 90}, {"id": "b", "weight": 10},
+                              {"id": "c", "weight": 100, "min_layer": 5}]
+        counts = self.draw(5000)
+        self.assertNotIn("c", counts)
+        self.assertAlmostEqual(counts["a"] / 5000, 0.9, delta=0.03)
+
+        # 替换事件列表后分桶缓存失效
+        self.engine.events = [{"id": "c", "weight": 1, "min_layer": 5}]
+        self.assertEqual(set(self.draw(100)), {None})
+        self.cultivator.layer_index = 5
+        self.assertEqual(set(self.draw(100)), {"c"})
+
+
+
+class TestEffectPrograms(unittest.TestCase):
+    def setUp(self):
+        self.engine = EventEngine(None, MockItemManager())
+        self.engine.history = set()
+
+    def test_invalid_events_rejected_at_load(self):
+        with self.assertLogs("BongoCultivator", level="WARNING") as logs:
+            self.engine.events = [
+                {"id": "ok", "effects": {"exp": [5, 5], "luck": 1}},
+                {"id": "bad_value", "effects": {"money": "lots"}},
+                {"id": "bad_range", "effects": {"exp": [10, 1]}},
+                {"id": "bad_choice", "choices": [{"result": {}}]},
+                {"id": "bad_weight", "weight": "often"},
+                {"id": "null_weight", "weight": None},
+                {"id": "negative_weight", "weight": -1},
+                {"id": "bad_layer", "conditions": {"min_layer": [1]}},
+                {"id": "str_weight", "weight": "5", "conditions": {"max_layer": "3"}},
+            ]
+        self.assertEqual([r.id for r in self.engine._records], ["ok", "str_weight"])
+        self.assertEqual(len(self.engine.events), 9)
+        # 数字字符串按数值处理，可正常分桶抽取
+        rec = self.engine._records_by_id["str_weight"]
+        self.assertEqual((rec.weight, rec.max_layer), (5, 3))
+        self.assertEqual(self.engine._bucket(0, None).static_total, 15)
+        self.assertTrue(any("'luck'" in line for line in logs.output))
+
+    def test_compiled_effects_and_choices(self):
+        self.engine.events = [{
+            "id": "cave", "is_unique": True,
+            "effects": {"exp": 30, "items": {"herb": 2}, "money": -5},
+            "choices": [{"text": "深入", "result": {
+                "success_chance": 1.0,
+                "success_effect": {"text": "得宝", "body": 1},
+                "fail_effect": {"mind": 5},
+            }}],
+        }]
+        c = EffectCultivator()
+        c.body = 0
+        with patch.object(self.engine, "_record_history") as record:
+            text = self.engine.trigger_event(self.engine.events[0], c)
+        self.assertEqual(text.split("\n"), ["修为 +30", "获得: 灵草 x2", "灵石 -5", "[自动选择] 深入", "得宝", "体魄 +1"])
+        self.assertEqual((c.exp, c.items, c.money, c.body), (30, {"herb": 2}, 0, 1))
+        record.assert_called_once_with("cave")
+        self.assertIn("cave", self.engine.history)
+
+        # 不在事件列表中的事件临时编译
+        c.body = 0
+        text = self.engine.trigger_event({"id": "adhoc", "effects": {"body": [2, 2]}}, c)
+        self.assertEqual((text, c.body), ("体魄 +2", 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import sys
+import os
+import pickle
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.item_manager import ItemRecord
+
+
+class TestItemRecord(unittest.TestCase):
+    def test_dict_interface(self):
+        item = ItemRecord("herb_pill", "聚气丹", "spirit", 1, "一枚丹药", 50, {"exp": 100})
+        self.assertEqual(item["name"], "聚气丹")
+        self.assertEqual(item.get("effect", {}), {"exp": 100})
+        self.assertEqual(item.category, "pills")  # id 含 pill
+
+        # 未设置的可选字段与旧版 dict 行一样视为不存在
+        self.assertEqual(item.get("recipe", {}), {})
+        self.assertNotIn("recipe", item)
+        self.assertIsNone(item.get("desc"))
+        with self.assertRaises(KeyError):
+            item["craft_time"]
+
+        item.recipe = {"herb": 2}
+        self.assertIn("recipe", item)
+        self.assertEqual(ItemRecord("ore", "铁", "mineral", 0).category, "materials")
+
+    def test_pickle_round_trip(self):
+        item = ItemRecord("ore", "铁", "mineral", 0, None, 5, None)
+        item.recipe, item.craft_time = {"x": 1}, 5
+        copy = pickle.loads(pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL))
+        self.assertEqual([getattr(copy, k) for k in ItemRecord.__slots__],
+                         [getattr(item, k) for k in ItemRecord.__slots__])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import sys
+import os
+import random
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import Qt, QCoreApplication
+from PyQt6.QtTest import QAbstractItemModelTester
+from src.item_manager import CraftTracker
+from src.ui.list_models import InventoryListModel, RecipeListModel
+from src.utils.tracked import TrackedDict
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+class MockItemManager:
+    def __init__(self):
+        self.recipes = {"pill_a": {"herb": 2}, "pill_b": {"ore": 1}}
+        self.recipe_users = {"herb": [("pill_a", 2)], "ore": [("pill_b", 1)]}
+        self.tier_lists = {0: {"pills": ["pill_a", "pill_b", "pill_no_recipe"]}}
+        self.items = {"pill_a": {"name": "A", "recipe": {"herb": 2}}, "pill_b": {"name": "B", "recipe": {"ore": 1}},
+                      "pill_no_recipe": {"name": "C"}}
+
+    def get_item(self, item_id):
+        return self.items.get(item_id)
+
+
+class MockCultivator:
+    """与 Cultivator 相同的通知方式: TrackedDict 修改后回调 (item_id, old, new)"""
+
+    def __init__(self, inventory):
+        self.item_manager = MockItemManager()
+        self._listeners = []
+        self.craft_tracker = CraftTracker(self.item_manager)
+        self.inventory = TrackedDict(inventory, self._on_change)
+        self.craft_tracker.reset(self.inventory)
+
+    def _on_change(self, item_id, old):
+        new = self.inventory.get(item_id, 0)
+        self.craft_tracker.on_change(item_id, new)
+        for callback in self._listeners:
+            callback(item_id, old or 0, new)
+
+    def add_inventory_listener(self, callback):
+        self._listeners.append(callback)
+
+
+def rows(model, role=Qt.ItemDataRole.UserRole):
+    return [model.index(r).data(role) for r in range(model.rowCount())]
+
+
+class TestInventoryListModel(unittest.TestCase):
+    def test_patches_match_full_rebuild(self):
+        c = MockCultivator({"herb": 1, "ore": 0, "water": 3})
+        model = InventoryListModel(c, lambda iid, count: f"{iid} x{count}")
+        tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+        inserted, removed = [], []
+        model.rowsInserted.connect(lambda parent, first, last: inserted.append(first))
+        model.rowsRemoved.connect(lambda parent, first, last: removed.append(first))
+        self.assertEqual(rows(model), ["herb", "water"])
+
+        rng = random.Random(3)
+        ids = ["herb", "ore", "water", "gem", "leaf"]
+        for _ in range(300):
+            iid = rng.choice(ids)
+            op = rng.random()
+            if op < 0.2 and iid in c.inventory:
+                del c.inventory[iid]
+            else:
+                c.inventory[iid] = rng.choice([0, 1, 2, 5])
+            expected = [i for i, n in c.inventory.items() if n > 0]
+            self.assertEqual(sorted(rows(model)), sorted(expected))
+            self.assertEqual(rows(model, Qt.ItemDataRole.DisplayRole),
+                             [f"{i} x{c.inventory[i]}" for i in rows(model)])
+        self.assertTrue(inserted and removed)
+        del tester
+
+
+class TestRecipeListModel(unittest.TestCase):
+    def test_craftable_rows_update(self):
+        c = MockCultivator({"herb": 2})
+        model = RecipeListModel(c)
+        tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+        model.set_tier(0)
+        self.assertEqual(rows(model), ["pill_a", "pill_b"])
+        self.assertEqual(rows(model, Qt.ItemDataRole.DisplayRole), ["A [可炼制]", "B [材料不足]"])
+
+        changed = []
+        model.dataChanged.connect(lambda top, bottom, roles: changed.append((top.row(), bottom.row())))
+        c.inventory["ore"] = 1
+        c.inventory["herb"] = 1
+        self.assertEqual(changed, [(1, 1), (0, 0)])
+        self.assertEqual(rows(model, Qt.ItemDataRole.DisplayRole), ["A [材料不足]", "B [可炼制]"])
+        del tester
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import sys
+import os
+import threading
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.persistence_worker import PersistenceWorker
+
+
+class TestPersistenceWorker(unittest.TestCase):
+    def setUp(self):
+        self.worker = PersistenceWorker(max_pending=2, overflow_wait=0.05)
+        self.ran = []
+        self.release = threading.Event()
+        started = threading.Event()
+
+        def blocking(conn):
+            started.set()
+            self.release.wait(5)
+
+        # 写线程卡在第一个任务上，随后的两个任务填满队列
+        self.worker.submit(blocking, description="blocking")
+        self.assertTrue(started.wait(5))
+        self.worker.submit(self.job("a"), description="a")
+        self.worker.submit(self.job("save"), key="save", description="save")
+
+    def tearDown(self):
+        self.release.set()
+        self.worker.flush()
+
+    def job(self, name):
+        def run(conn):
+            self.ran.append((name, threading.current_thread().name))
+        return run
+
+    def test_full_queue_never_runs_job_on_caller(self):
+        errors = []
+        self.worker.submit(self.job("overflow"), description="overflow", on_error=lambda: errors.append(1))
+        self.assertEqual(errors, [1])
+        self.assertEqual(self.ran, [])
+
+        self.release.set()
+        self.assertTrue(self.worker.flush())
+        # 排队任务按提交顺序执行，且都在写线程上
+        self.assertEqual([name for name, _ in self.ran], ["a", "save"])
+        self.assertEqual({thread for _, thread in self.ran}, {"PersistenceWorker"})
+
+    def test_full_queue_coalesces_keyed_job(self):
+        self.worker.submit(self.job("save2"), key="save", description="save")
+        self.release.set()
+        self.assertTrue(self.worker.flush())
+        self.assertEqual([name for name, _ in self.ran], ["a", "save2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
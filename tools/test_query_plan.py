@@ -0,0 +1,76 @@
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import DatabaseManager
+from src.utils.schema_migration import run_schema_migrations
+
+# 与 DatabaseManager 中的查询保持一致
+RANGE_SQL = """
+    SELECT timestamp, keys_count, mouse_count FROM activity_logs_minute
+    WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp
+"""
+AGGREGATE_SQL = """
+    SELECT bucket % 100 AS h, SUM(keys_count), SUM(mouse_count), SUM(active_minutes)
+    FROM activity_rollup_hour WHERE bucket BETWEEN ? AND ?
+    GROUP BY h ORDER BY h
+"""
+RECENT_EVENTS_SQL = "SELECT * FROM player_events ORDER BY timestamp DESC LIMIT 50"
+
+
+def query_plan(conn, sql, params=()):
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+class TestQueryPlan(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "test.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def assert_indexed(self, conn):
+        plan = query_plan(conn, RANGE_SQL, (0, 1))
+        self.assertIn("COVERING INDEX ix_activity_logs_minute_ts_cover", plan)
+
+        # 聚合统计读取小时汇总表，按主键范围查找
+        plan = query_plan(conn, AGGREGATE_SQL, (0, 1))
+        self.assertIn("SEARCH activity_rollup_hour USING INTEGER PRIMARY KEY", plan)
+
+        plan = query_plan(conn, RECENT_EVENTS_SQL)
+        self.assertIn("INDEX ix_player_events_timestamp", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_fresh_database_uses_indexes(self):
+        manager = DatabaseManager(f"sqlite:///{self.db_path}")
+        with manager._get_conn() as conn:
+            self.assert_indexed(conn)
+        manager.engine.dispose()
+
+    def test_migration_adds_indexes_to_old_database(self):
+        # 旧版本结构: 无索引
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE activity_logs_minute (id INTEGER PRIMARY KEY, timestamp INTEGER, keys_count INTEGER, mouse_count INTEGER)")
+        conn.execute("CREATE TABLE player_events (id INTEGER PRIMARY KEY, timestamp INTEGER, event_type TEXT, message TEXT)")
+        conn.commit()
+        conn.close()
+
+        self.assertTrue(run_schema_migrations(self.db_path))
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.assert_indexed(conn)
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication
+from src.config import APM_WINDOWS
+from src.services import retention_manager
+from src.services.persistence_worker import persistence_worker
+from src.services.retention_manager import RetentionManager
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+class MockMonitor:
+    def __init__(self):
+        self.windows = []
+
+    def get_apm(self, window):
+        self.windows.append(window)
+        return 0, 0
+
+
+class TestRetentionManager(unittest.TestCase):
+    def setUp(self):
+        self.monitor = MockMonitor()
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.archive = os.path.join(tmp, "archive.jsonl.gz")
+        self.manager = RetentionManager(self.monitor, archive_path=self.archive)
+        self.manager._last_run = 0
+
+    def test_failed_maintenance_can_be_rescheduled(self):
+        with patch.object(RetentionManager, "_prune", side_effect=RuntimeError("disk full")):
+            self.manager.run()
+            self.assertTrue(persistence_worker.flush())
+
+        # 失败已回滚: 不再卡在 "已提交" 状态，也不记为已完成
+        self.assertFalse(self.manager._scheduled)
+        self.assertEqual(self.manager._last_run, 0)
+
+        with patch.object(RetentionManager, "run") as run:
+            self.manager._on_timer()
+        run.assert_called_once()
+
+    def test_legacy_database_is_not_fully_vacuumed(self):
+        # 旧数据库 (auto_vacuum=NONE): 不在写线程上做整库 VACUUM
+        path = os.path.join(os.path.dirname(self.archive), "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE t (x BLOB)")
+        conn.executemany("INSERT INTO t VALUES (zeroblob(4096))", [()] * 400)
+        conn.commit()
+        conn.execute("DELETE FROM t")
+        conn.commit()
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        class LegacyDb:
+            @contextmanager
+            def _get_conn(self):
+                yield conn
+
+        with patch.object(retention_manager, "db_manager", LegacyDb()):
+            self.manager._vacuum()
+        conn.close()
+        self.assertNotIn("VACUUM", statements)
+        self.assertFalse([sql for sql in statements if "incremental_vacuum" in sql or "auto_vacuum =" in sql])
+
+    def test_idle_window_is_supported(self):
+        self.manager._is_idle()
+        self.assertIn(self.monitor.windows[-1], APM_WINDOWS)
+
+        with patch.object(retention_manager, "MAINTENANCE_IDLE_SECONDS", 120):
+            self.assertEqual(retention_manager._idle_window(), 300)
+        with patch.object(retention_manager, "MAINTENANCE_IDLE_SECONDS", 10 ** 6):
+            self.assertEqual(retention_manager._idle_window(), max(APM_WINDOWS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import schema_migration
+from src.utils.schema_migration import (
+    run_schema_migrations, get_schema_version, LATEST_SCHEMA_VERSION
+)
+
+
+class TestSchemaMigration(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "old.db")
+        # 旧版本结构: 无 system_metadata、无分类列、无索引
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE activity_logs_minute (id INTEGER PRIMARY KEY, timestamp INTEGER, keys_count INTEGER, mouse_count INTEGER)")
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def columns(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return {row[1] for row in conn.execute("PRAGMA table_info(activity_logs_minute)")}
+        finally:
+            conn.close()
+
+    def version(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return get_schema_version(conn)
+        finally:
+            conn.close()
+
+    def test_applies_pending_and_records_version(self):
+        self.assertTrue(run_schema_migrations(self.db_path))
+        self.assertIn("key_backspace", self.columns())
+        self.assertNotIn("weekday", self.columns())
+        self.assertEqual(self.version(), LATEST_SCHEMA_VERSION)
+
+        # 已是最新: 不再执行任何步骤
+        with patch.object(schema_migration, "add_missing_columns", side_effect=AssertionError):
+            self.assertFalse(run_schema_migrations(self.db_path))
+
+    def test_backfills_rollups_and_totals(self):
+        conn = sqlite3.connect(self.db_path)
+        # 2026-01-03 (周六) 与 2026-01-05 (周一) 本地正午各 2 分钟
+        saturday = int(time.mktime((2026, 1, 3, 12, 0, 0, 0, 0, -1)))
+        monday = int(time.mktime((2026, 1, 5, 12, 0, 0, 0, 0, -1)))
+        conn.executemany(
+            "INSERT INTO activity_logs_minute (timestamp, keys_count, mouse_count) VALUES (?, ?, ?)",
+            [(saturday, 10, 1), (saturday + 60, 30, 2), (monday, 5, 5), (monday + 60, 1, 0)]
+        )
+        conn.commit()
+        conn.close()
+
+        self.assertTrue(run_schema_migrations(self.db_path))
+        conn = sqlite3.connect(self.db_path)
+        try:
+            totals = conn.execute(
+                "SELECT keys_count, mouse_count, active_minutes, max_actions, weekend_minutes FROM player_stat_totals"
+            ).fetchall()
+        finally:
+            conn.close()
+        self.assertEqual(totals, [(46, 8, 4, 32, 2)])
+
+    def test_failed_step_rolls_back_everything(self):
+        def broken(conn):
+            raise RuntimeError("boom")
+
+        migrations = schema_migration.MIGRATIONS + [(LATEST_SCHEMA_VERSION + 1, "broken", broken)]
+        with patch.object(schema_migration, "MIGRATIONS", migrations), \
+             patch.object(schema_migration, "LATEST_SCHEMA_VERSION", LATEST_SCHEMA_VERSION + 1):
+            with self.assertRaises(RuntimeError):
+                run_schema_migrations(self.db_path)
+
+        self.assertNotIn("key_backspace", self.columns())
+        self.assertEqual(self.version(), 0)
+
+    def test_failed_migration_aborts_init_and_reruns(self):
+        from src.database import DatabaseManager
+
+        calls = []
+
+        def flaky(conn):
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return 0
+
+        latest = LATEST_SCHEMA_VERSION + 1
+        migrations = schema_migration.MIGRATIONS + [(latest, "flaky", flaky)]
+        with patch.object(schema_migration, "MIGRATIONS", migrations), \
+             patch.object(schema_migration, "LATEST_SCHEMA_VERSION", latest):
+            # 迁移失败: 初始化中止，旧库不会被 create_all() 补表后标记为最新
+            with self.assertRaises(RuntimeError):
+                DatabaseManager(f"sqlite:///{self.db_path}").engine.dispose()
+            self.assertEqual(self.version(), 0)
+            self.assertNotIn("key_backspace", self.columns())
+
+            # 下次启动重新执行失败的步骤
+            DatabaseManager(f"sqlite:///{self.db_path}").engine.dispose()
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(self.version(), latest)
+            self.assertIn("key_backspace", self.columns())
+
+    def test_new_database_is_stamped_latest(self):
+        from src.database import DatabaseManager
+
+        path = os.path.join(self.tmp, "new.db")
+        DatabaseManager(f"sqlite:///{path}").engine.dispose()
+        conn = sqlite3.connect(path)
+        try:
+            self.assertEqual(get_schema_version(conn), LATEST_SCHEMA_VERSION)
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.static_cache import StaticCache
+
+
+class TestStaticCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "static_cache.pickle")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_roundtrip_returns_copies(self):
+        with patch("src.services.static_cache.static_data_key", return_value="k1"):
+            cache = StaticCache(self.path)
+            self.assertIsNone(cache.get("items"))
+            cache.put("items", {"herb": {"effect": {"exp": 1}}})
+
+            # 新进程: 一次读取文件
+            fresh = StaticCache(self.path)
+            items = fresh.get("items")
+            self.assertEqual(items, {"herb": {"effect": {"exp": 1}}})
+            items["herb"]["effect"]["exp"] = 99
+            self.assertEqual(fresh.get("items")["herb"]["effect"]["exp"], 1)
+
+    def test_key_change_invalidates(self):
+        with patch("src.services.static_cache.static_data_key", return_value="k1"):
+            StaticCache(self.path).put("events", [1, 2, 3])
+        with patch("src.services.static_cache.static_data_key", return_value="k2"):
+            self.assertIsNone(StaticCache(self.path).get("events"))
+        with patch("src.services.static_cache.static_data_key", return_value=None):
+            self.assertIsNone(StaticCache(self.path).get("events"))
+
+
+if __name__ == '__main__':
+    unittest.main()